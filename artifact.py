@@ -0,0 +1,78 @@
+"""シフト表の型付きバイナリ形式（NumPy .npz）。
+
+段階間の受け渡し（temp_shift）と履歴はこの形式で保存し、CSV は人が見るための出力としてのみ使う。
+CSV と違い、読み込み時に型を推定し直したり 1〜4 を文字列に戻したりする必要が無い。
+
+    codes        int8 (看護師, 日)   シフトコード（code_table の添字。0 は未割当）
+    fixed        bool (看護師, 日)   前段で割当済みのセル
+    rest_points  int16 (看護師,)     休みスコア（休=2, 半休=1）
+    code_table, nurses, columns      文字列
+
+code_table は保存時の schedule_matrix.SHIFT_CODES で、読み込み時に現在のコードへ付け替えるため、
+シフトの種類が増えても過去の履歴をそのまま読める。
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from schedule_matrix import CODE, SHIFT_CODES, ScheduleMatrix
+
+FORMAT_VERSION = 1
+SUFFIX = '.npz'
+
+
+def save(path, schedule, fixed=None) -> Path:
+    """schedule（DataFrame か ScheduleMatrix）を path に保存する。
+
+    fixed を省略すると DataFrame では値のあるセル、ScheduleMatrix では m.fixed を保存する。
+    """
+    m = schedule if isinstance(schedule, ScheduleMatrix) else ScheduleMatrix.from_frame(schedule)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:  # np.savez にファイル名を渡すと拡張子が付け足される
+        np.savez(
+            f,
+            version=np.int16(FORMAT_VERSION),
+            codes=m.codes.astype(np.int8),
+            fixed=np.asarray(m.fixed if fixed is None else fixed, dtype=bool),
+            rest_points=m.counters.rest.astype(np.int16),
+            code_table=np.array(SHIFT_CODES, dtype=str),
+            nurses=np.array(m.nurses, dtype=str),
+            columns=np.array(m.columns, dtype=str),
+        )
+    return path
+
+
+def load(path) -> ScheduleMatrix:
+    """save したファイルを ScheduleMatrix として読み込む。"""
+    with np.load(path, allow_pickle=False) as data:
+        version = int(data['version'])
+        if version > FORMAT_VERSION:
+            raise ValueError(f'{path}: unsupported format version {version}')
+        table = data['code_table'].tolist()
+        unknown = [s for s in table if s not in CODE]
+        if unknown:
+            raise ValueError(f'{path}: unknown shifts {unknown}')
+        remap = np.array([CODE[s] for s in table], dtype=np.int8)
+        return ScheduleMatrix(data['nurses'].tolist(), remap[data['codes']], data['fixed'].copy(),
+                              data['columns'].tolist())
+
+
+def read_frame(path) -> pd.DataFrame:
+    """save したファイルをシフト表の DataFrame（index=看護師, 列=day_i, 未割当は None）として読み込む。"""
+    return load(path).to_frame()
+
+
+def read_rest_points(path) -> dict:
+    """看護師 → 休みスコア（休=2, 半休=1）。シフト表を復元せずに読む。"""
+    with np.load(path, allow_pickle=False) as data:
+        return dict(zip(data['nurses'].tolist(), data['rest_points'].tolist()))
+
+
+def read_schedule(path) -> pd.DataFrame:
+    """.npz か CSV（shift_final.csv・shift_summary.csv・旧形式の履歴）のシフト表を読み込む。"""
+    if Path(path).suffix == SUFFIX:
+        return read_frame(path)
+    df = pd.read_csv(path, index_col=0, dtype=str)
+    return df[[c for c in df.columns if c.startswith('day_')]]
@@ -0,0 +1,172 @@
+"""複数の病棟・期間のシフトをプロセスプールでまとめて作成する。
+
+マニフェスト（CSV / JSON / TOML）の各行が1ジョブ（病棟, 年, 月, 希望休CSV, テンプレート）。
+ジョブごとに Config を作り pipeline.run を別プロセスで実行する。失敗したジョブは
+summary に記録し、残りのジョブはそのまま続ける。
+
+    python batch.py jobs.csv --workers 4 --threads 2
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import argparse
+import csv
+import json
+import sys
+import time
+import traceback
+
+from config import Config, default_config
+
+MANIFEST_COLUMNS = ('ward', 'year', 'month', 'requests', 'template')
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    ward: str
+    year: int
+    month: int
+    requests: str
+    template: str | None = None
+
+    @property
+    def name(self) -> str:
+        return f'{self.ward}/{self.year}-{self.month:02d}'
+
+    def config(self, base: Config) -> Config:
+        """base をこのジョブの期間・入力ファイルで上書きした Config（履歴は病棟ごと）。"""
+        return base.with_overrides(
+            year=self.year, month=self.month, req_shift_path=self.requests, template_path=self.template,
+            history_dir=str(Path(base.history_dir) / self.ward),
+        )
+
+    def output_dir(self, root) -> Path:
+        return Path(root) / self.ward / f'{self.year}-{self.month:02d}'
+
+
+def load_manifest(path) -> list[BatchJob]:
+    """マニフェストを読み込む。CSV は MANIFEST_COLUMNS の列、JSON / TOML は jobs の配列。"""
+    path = Path(path)
+    if path.suffix == '.csv':
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    elif path.suffix == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            rows = tomllib.load(f)['jobs']
+    else:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        rows = data['jobs'] if isinstance(data, dict) else data
+
+    jobs = []
+    for i, row in enumerate(rows, 1):
+        missing = [c for c in MANIFEST_COLUMNS[:4] if not str(row.get(c) or '').strip()]
+        if missing:
+            raise ValueError(f'{path}: {i}件目のジョブに {", ".join(missing)} がありません')
+        jobs.append(BatchJob(
+            ward=str(row['ward']).strip(),
+            year=int(row['year']),
+            month=int(row['month']),
+            requests=str(row['requests']).strip(),
+            template=str(row.get('template') or '').strip() or None,
+        ))
+    return jobs
+
+
+def run_job(job: BatchJob, base: Config, output_root, threads=None, engine='cpsat', excel=True,
+            use_hint=True) -> dict:
+    """1ジョブを実行し、ステータスと実行時間の dict を返す（例外は送出しない）。"""
+    # ワーカープロセスで import する（親プロセスでは ortools / pandas を読み込まない）
+    from pipeline import ScheduleError, run
+    from solver_params import SolverParams
+    from validator import summarize, validate
+
+    result = {'job': job.name, **asdict(job), 'output_dir': str(job.output_dir(output_root))}
+    started = time.perf_counter()
+    try:
+        config = job.config(base)
+        params = SolverParams.from_config(config, num_workers=threads)
+        schedule = run(output_dir=result['output_dir'], excel=excel, engine=engine, params=params,
+                       use_hint=use_hint, config=config)
+    except ScheduleError as e:
+        result.update(status='infeasible', error=str(e))
+    except Exception as e:
+        result.update(status='failed', error=f'{type(e).__name__}: {e}', traceback=traceback.format_exc())
+    else:
+        result.update(
+            status='ok',
+            issues=schedule.issues,
+            solve_time=sum(info['wall_time'] for info in schedule.solve_log),
+            solves=[{k: info[k] for k in ('name', 'status', 'wall_time')} for info in schedule.solve_log],
+            violations=summarize(validate(schedule.shifts, config.period, config.requests, config.yakin_workers,
+                                          config.target_rest_score)),
+        )
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+def run_batch(jobs, output_root='output/batch', workers=None, threads=None, base: Config | None = None,
+              engine='cpsat', excel=True, use_hint=True) -> list[dict]:
+    """jobs を workers プロセスで並列に実行し、マニフェスト順の結果のリストを返す。
+
+    threads は各ジョブの CP-SAT の探索ワーカー数（num_workers）。
+    結果は output_root/batch_summary.json にも書き出す。
+    """
+    base = base or default_config()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, job, base, output_root, threads, engine, excel, use_hint) for job in jobs]
+        results = []
+        for job, future in zip(jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:  # ワーカープロセスの異常終了など
+                results.append({'job': job.name, **asdict(job), 'status': 'failed',
+                                'error': f'{type(e).__name__}: {e}'})
+
+    summary = {
+        'elapsed': time.perf_counter() - started,
+        'workers': workers,
+        'threads': threads,
+        'counts': {s: sum(r['status'] == s for r in results) for s in ('ok', 'infeasible', 'failed')},
+        'jobs': results,
+    }
+    out = Path(output_root)
+    out.mkdir(parents=True, exist_ok=True)
+    with open(out / 'batch_summary.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='マニフェストの各病棟・期間のシフト表をまとめて作成します。')
+    parser.add_argument('manifest', help='ジョブの一覧（CSV: ward,year,month,requests,template / JSON / TOML）')
+    parser.add_argument('--config', help='共通の設定ファイル（main.py の --config と同じ）')
+    parser.add_argument('--output-dir', default='output/batch', help='出力先（<病棟>/<年-月>/ に書き出す）')
+    parser.add_argument('--workers', type=int, help='同時に実行するジョブ数（省略時は CPU 数）')
+    parser.add_argument('--threads', type=int, help='ジョブごとの CP-SAT 探索ワーカー数')
+    parser.add_argument('--engine', choices=('cpsat', 'greedy'), default='cpsat')
+    parser.add_argument('--no-excel', action='store_true', help='Excel出力を行わない')
+    parser.add_argument('--no-hint', action='store_true', help='過去の結果を初期解ヒントに使わない')
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest)
+    base = Config.from_file(args.config) if args.config else default_config()
+    print(f"=== {len(jobs)} 件のシフト作成 ===")
+    results = run_batch(jobs, args.output_dir, args.workers, args.threads, base, args.engine,
+                        excel=not args.no_excel, use_hint=not args.no_hint)
+    for r in results:
+        mark = '✅' if r['status'] == 'ok' else '❌'
+        line = f"{mark} {r['job']}: {r['status']}"
+        if 'elapsed' in r:
+            line += f" ({r['elapsed']:.1f}秒)"
+        if r.get('error'):
+            line += f" {r['error']}"
+        print(line)
+    print(f"=== 完了（{Path(args.output_dir) / 'batch_summary.json'}） ===")
+    return 0 if all(r['status'] == 'ok' for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
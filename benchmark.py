@@ -0,0 +1,213 @@
+"""合成インスタンスでシフト作成の各ステージの実行時間とメモリを計測する。
+
+    python benchmark.py                       # 既定のケース
+    python benchmark.py --suite full          # 14〜300人 × 28〜365日
+    python benchmark.py --case 100x91 --engine greedy --seed 3
+    python benchmark.py --engine cpsat --encoding bool,table   # CP-SAT モデルの表し方を比較
+
+ケースごとに新しいプロセスで実行し（最大常駐メモリをケース間で混ぜないため）、
+結果は JSON（既定は output/bench/bench-<日時>.json）に書き出す。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+import argparse
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ENGINES = ('cpsat', 'greedy')
+SUITES = {
+    'quick': ['14x28', '14x31', '30x31', '14x91'],
+    'full': ['14x28', '14x31', '50x31', '100x31', '100x91', '300x91', '300x365'],
+}
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    nurses: int
+    days: int
+    density: float = 0.1
+    night_ratio: float = 0.5
+    seed: int = 0
+
+    @classmethod
+    def parse(cls, text, **options) -> 'BenchCase':
+        """「人数x日数」（例: 100x91）から作成する。"""
+        nurses, days = text.lower().split('x')
+        return cls(int(nurses), int(days), **options)
+
+    @property
+    def name(self) -> str:
+        return f'{self.nurses}x{self.days}'
+
+
+class StageTimer:
+    """ステージごとの実行時間・最大常駐メモリ（・Python のメモリ確保量のピーク）を記録する。"""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def __call__(self, name, func, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stage = {'seconds': time.perf_counter() - started, 'rss_peak_mb': _rss_peak_mb()}
+            if self.trace_memory:
+                stage['py_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+            self.stages[name] = stage
+
+
+def _rss_peak_mb() -> float:
+    # Linux は KB、macOS は bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def run_case(case: BenchCase, engine='cpsat', params=None, excel=True, trace_memory=False,
+             encoding='bool') -> dict:
+    """1ケースを計測して結果の dict を返す（ワーカープロセスで実行する）。
+
+    encoding は cpsat の変数の表し方（optimize_cp.ENCODINGS）。greedy では使わない。
+    """
+    from config import TEMPLATE_PATH
+    from excel_export import write_schedule
+    from optimize_1 import build_strict_model, strict_frame
+    from optimize_2 import assign_matrix, repair_matrix, to_output_frame
+    from optimize_cp import ScheduleModel
+    from request_index import RequestIndex
+    from schedule_matrix import ScheduleMatrix
+    from solver_params import SolverParams, run_solver
+    from synthetic import generate_instance
+
+    params = params or SolverParams.from_config()
+    timer = StageTimer(trace_memory)
+    result = {'case': case.name, **asdict(case), 'engine': engine}
+    if engine == 'cpsat':
+        result['encoding'] = encoding
+    with tempfile.TemporaryDirectory() as tmp:
+        instance = timer('generate', generate_instance, case.nurses, case.days, case.density,
+                         case.night_ratio, seed=case.seed)
+        path = instance.to_csv(Path(tmp) / 'requests.csv')
+        period = instance.period
+        requests = timer('parse', RequestIndex.from_csv, path, period)
+
+        shifts = None
+        if engine == 'cpsat':
+            model = timer('build', ScheduleModel, requests, period=period, yakin_workers=instance.yakin_workers,
+                          encoding=encoding)
+            result['model'] = {'variables': len(model.model.Proto().variables),
+                               'constraints': len(model.model.Proto().constraints),
+                               'symmetry_classes': len(model.symmetry_classes)}
+            shifts = timer('solve', model.solve, params)
+            result['solve'] = model.solve_info
+        else:
+            model, x = timer('build', build_strict_model, requests, requests.nurses, period,
+                             instance.yakin_workers)
+            result['model'] = {'variables': len(model.Proto().variables),
+                               'constraints': len(model.Proto().constraints)}
+            solver, status, info = timer('solve', run_solver, model, params, 'strict')
+            result['solve'] = info
+            if info['status'] in ('OPTIMAL', 'FEASIBLE'):
+                strict = strict_frame(solver, x, requests.nurses, period.days)
+                m = timer('greedy_fill', lambda: assign_matrix(ScheduleMatrix.from_frame(strict), period))
+                timer('repair', repair_matrix, m)
+                shifts = m.to_frame()
+
+        result['status'] = 'ok' if shifts is not None else 'no_solution'
+        if shifts is not None and excel:
+            timer('excel', write_schedule, to_output_frame(shifts), TEMPLATE_PATH, Path(tmp) / 'out.xlsx',
+                  period.days)
+    result['stages'] = timer.stages
+    result['rss_peak_mb'] = _rss_peak_mb()
+    return result
+
+
+def run_benchmark(cases, engines=ENGINES, params=None, excel=True, trace_memory=False,
+                  encodings=('bool',)) -> dict:
+    """全ケース × エンジン（cpsat は × encodings）を1ケースずつ新しいプロセスで計測する。"""
+    import ortools
+
+    runs = []
+    for case in cases:
+        for engine, encoding in [(e, enc) for e in engines for enc in (encodings if e == 'cpsat' else ('bool',))]:
+            started = time.perf_counter()
+            try:
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    runs.append(pool.submit(run_case, case, engine, params, excel, trace_memory, encoding).result())
+            except Exception as e:
+                runs.append({'case': case.name, **asdict(case), 'engine': engine, 'status': 'failed',
+                             'error': f'{type(e).__name__}: {e}'})
+                if engine == 'cpsat':
+                    runs[-1]['encoding'] = encoding
+            runs[-1]['elapsed'] = time.perf_counter() - started
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'ortools': ortools.__version__,
+        'platform': platform.platform(),
+        'params': params.to_dict() if params else None,
+        'runs': runs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='合成インスタンスでシフト作成のステージごとの性能を計測します。')
+    parser.add_argument('--suite', choices=SUITES, default='quick', help='計測するケースの組')
+    parser.add_argument('--case', action='append', default=[], metavar='NxD',
+                        help='人数x日数（例: 300x365）。指定すると --suite の代わりに使う')
+    parser.add_argument('--engine', choices=ENGINES + ('both',), default='both')
+    parser.add_argument('--encoding', default='bool', metavar='ENC[,ENC]',
+                        help='cpsat の変数の表し方（bool / table。カンマ区切りで両方を比較）')
+    parser.add_argument('--density', type=float, default=0.1, help='希望休の入る割合')
+    parser.add_argument('--night-ratio', type=float, default=0.5, help='夜勤メンバーの割合')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, help='CP-SAT の探索ワーカー数')
+    parser.add_argument('--time-limit', type=float, default=10.0, help='CP-SAT の求解時間の上限（秒）')
+    parser.add_argument('--no-excel', action='store_true', help='Excel出力を計測しない')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='tracemalloc で Python のメモリ確保量のピークも記録する（遅くなる）')
+    parser.add_argument('--output', help='結果の JSON（省略時は output/bench/bench-<日時>.json）')
+    args = parser.parse_args(argv)
+
+    from solver_params import SolverParams
+
+    options = dict(density=args.density, night_ratio=args.night_ratio, seed=args.seed)
+    cases = [BenchCase.parse(c, **options) for c in (args.case or SUITES[args.suite])]
+    engines = ENGINES if args.engine == 'both' else (args.engine,)
+    encodings = tuple(e.strip() for e in args.encoding.split(','))
+    from optimize_cp import ENCODINGS
+    if unknown := [e for e in encodings if e not in ENCODINGS]:
+        parser.error(f'--encoding: {", ".join(unknown)}（{", ".join(ENCODINGS)} のいずれか）')
+    params = SolverParams.from_config(num_workers=args.workers, max_time_in_seconds=args.time_limit,
+                                      random_seed=args.seed)
+    results = run_benchmark(cases, engines, params, excel=not args.no_excel, trace_memory=args.trace_memory,
+                            encodings=encodings)
+
+    out = Path(args.output or f'output/bench/bench-{datetime.now():%Y%m%d-%H%M%S}.json')
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    for r in results['runs']:
+        stages = ' '.join(f"{k}={v['seconds']:.2f}s" for k, v in r.get('stages', {}).items())
+        engine = f"{r['engine']}/{r['encoding']}" if 'encoding' in r else r['engine']
+        objective = r.get('solve', {}).get('objective')
+        objective = f' obj={objective:g}' if objective is not None else ''
+        print(f"{r['case']:>8} {engine:<12} {r['status']:<11} {stages}{objective} rss={r.get('rss_peak_mb', 0):.0f}MB")
+    print(f"✅ 結果を {out} に保存しました。")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""期間の境界をまたぐ状態（前期間の末尾の夜勤・連続勤務/休み・累計回数）。
+
+各期間は単独で解くため、そのままでは前期間の最終日の夜勤の翌日（次期間の初日）に×が入らず、
+連続勤務・連続休みの日数も期間の初めで0に戻る。確定した期間のシフト表から BoundaryState を作り、
+次の期間の ScheduleModel(boundary=...) に渡すと、これらを引き継いで解く。
+"""
+from dataclasses import asdict, dataclass, field
+import json
+import re
+
+from config import FULL_OFF_SHIFTS, HALF_OFF_SHIFTS
+
+OFF_SHIFTS = set(FULL_OFF_SHIFTS + HALF_OFF_SHIFTS)
+DUTY_SHIFTS = ('早日', '残日')  # 木日祝の日勤
+DAY_COLUMN = re.compile(r'day_\d+')
+
+
+@dataclass(frozen=True)
+class BoundaryState:
+    """after_night は前期間の最終日が夜勤だった看護師、work_streak / rest_streak は期末の連続勤務 / 休みの日数
+    （×は勤務扱い）、nights / duties はこれまでの夜勤・早日残日の累計回数。"""
+    after_night: frozenset = frozenset()
+    work_streak: dict = field(default_factory=dict)
+    rest_streak: dict = field(default_factory=dict)
+    nights: dict = field(default_factory=dict)
+    duties: dict = field(default_factory=dict)
+    periods: int = 0  # 引き継いだ期間の数
+
+    @classmethod
+    def from_schedule(cls, shifts, previous: 'BoundaryState | None' = None, period=None) -> 'BoundaryState':
+        """確定したシフト表（index=看護師, 列=day_i）から次の期間に引き継ぐ状態を作る。
+
+        day_0 から period.days 日分の列だけを見る（period の省略時は day_i の列の数）。
+        列が足りない・空欄のセルがあるときは ValueError を送出する。
+        previous を渡すと累計回数を足し合わせ、期間全体が勤務 / 休みの看護師は連続日数もつなげる。
+        """
+        if period is not None:
+            days = period.days
+        else:
+            days = sum(DAY_COLUMN.fullmatch(str(c)) is not None for c in shifts.columns)
+        columns = [f'day_{d}' for d in range(days)]
+        missing = [c for c in columns if c not in shifts.columns]
+        if missing:
+            raise ValueError(f'schedule is missing day columns: {missing}')
+        shifts = shifts[columns]
+        blank = [(n, c) for n, row in shifts.iterrows() for c, v in row.items() if not isinstance(v, str) or not v]
+        if blank:
+            raise ValueError(f'schedule has blank cells: {blank}')
+        previous = previous or cls()
+        after_night, work, rest, nights, duties = set(), {}, {}, {}, {}
+        for n, row in shifts.iterrows():
+            values = list(row)
+            if values and values[-1] == '夜':
+                after_night.add(n)
+            work[n] = _trailing(values, lambda s: s not in OFF_SHIFTS, previous.work_streak.get(n, 0))
+            rest[n] = _trailing(values, lambda s: s in OFF_SHIFTS, previous.rest_streak.get(n, 0))
+            nights[n] = previous.nights.get(n, 0) + values.count('夜')
+            duties[n] = previous.duties.get(n, 0) + sum(values.count(s) for s in DUTY_SHIFTS)
+        return cls(frozenset(after_night), work, rest, nights, duties, previous.periods + 1)
+
+    def signature(self, n) -> tuple:
+        """n について引き継ぐ値（対称性の判定に使う）。"""
+        return (n in self.after_night, self.work_streak.get(n, 0), self.rest_streak.get(n, 0),
+                self.nights.get(n, 0), self.duties.get(n, 0))
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data['after_night'] = sorted(self.after_night)
+        return data
+
+    @classmethod
+    def from_dict(cls, data) -> 'BoundaryState':
+        data = dict(data)
+        data['after_night'] = frozenset(data.get('after_night', ()))
+        return cls(**data)
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+    @classmethod
+    def read(cls, path) -> 'BoundaryState':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def _trailing(values, pred, carried) -> int:
+    """末尾から pred を満たす日が続く日数（全日が満たすときは carried を足す）。"""
+    count = 0
+    for s in reversed(values):
+        if not pred(s):
+            return count
+        count += 1
+    return count + carried
@@ -1,19 +1,30 @@
-from datetime import date, datetime, timedelta
-import calendar
-import pandas as pd
+"""シフト作成の設定。
+
+モジュール定数は既定値。希望休CSVなどのデータは Config が初回アクセス時に読み込むため、
+このモジュールの import ではファイルを読まない（pandas も読み込まない）。
+"""
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+import json
+
+from period import PeriodCalendar, japanese_holidays, is_japanese_holiday  # noqa: F401
 
 # 初期設定
 REQ_SHIFT_PATH = 'data/req_shift_8.csv'
 # REQ_SHIFT_PATH = 'data/req_shift_t1.csv'
 TEMPLATE_PATH = 'data/shift_template.xlsx'
-TEMP_SHIFT_PATH = 'output/temp_shift.csv'
+TEMP_SHIFT_PATH = 'output/temp_shift.npz'  # optimize_1 → optimize_2 の受け渡し（artifact 形式）
+HISTORY_DIR = 'output/history'  # 期間ごとの確定シフト（初期解ヒントに使う）
 
 YEAR = 2025
 MONTH = 8
-DAYS_IN_MONTH = 31
+PERIOD = PeriodCalendar(YEAR, MONTH)  # 前月21日〜当月20日
+DAYS_IN_MONTH = PERIOD.days
 SHIFT_TYPES = [
     '休', '夜', '早', '残', '〇', '1', '2', '3', '4', '×',
-    '/訪', 'CT', '早日', '残日', '1/', '2/', '3/', '4/', '/休', '休/'
+    '/訪', 'CT', '早日', '残日', '1/', '2/', '3/', '4/', '/休', '休/', '2・CT'
 ]
 HOLIDAY_MAP = {
     '①': ['休'],
@@ -23,72 +34,139 @@ HOLIDAY_MAP = {
     '⑤': ['/休', '×'],
 }
 
-INPUT_CSV = pd.read_csv(REQ_SHIFT_PATH)
-NURSES = [n for n in INPUT_CSV['日付'].dropna().tolist() if n != '曜日']
 HOLIDAY_NO_WORKERS = ['久保', '小嶋', '久保（千）', '田浦']
-HOLIDAY_WORKERS = [n for n in NURSES if n not in HOLIDAY_NO_WORKERS]
+# 夜勤を行うメンバー（夜勤明けは必ず×とする）
+YAKIN_WORKERS = ['樋渡', '中山', '川原田', '友枝', '奥平', '前野', '森園']
+SATURDAY_WORKERS = ['小嶋', '久保（千）', '田浦']  # 土曜担当（外来優先）
+CT_WORKERS = ['久保', '三好', '前野']  # CT・2・CT を担当できるメンバー（久保優先）
+NO_OUTPATIENT_WORKERS = ['御書']  # 外来・CT・早日・残日に入らないメンバー
 FULL_OFF_SHIFTS = ['休']
 HALF_OFF_SHIFTS = ['休/', '/休', '1/', '2/', '3/', '4/', '/訪']
 TARGET_REST_SCORE = 13  # 各看護師が取得したい休みの目標
+REST_SPREAD = 2  # 貪欲割り振りで許す休みの差（最大と最小、休=1, 半休=0.5）
+
+# CP-SAT の求解設定（solver_params.SolverParams の項目。main.py の引数で上書き可能）
+SOLVER_PARAMS = {
+    'num_workers': 8,
+    'max_time_in_seconds': 10.0,
+    'relative_gap_limit': None,
+    'random_seed': None,
+    'presolve_level': 2,  # 0=無し, 1=軽量, 2=既定
+    'max_memory_in_mb': None,
+}
+
+start_date = datetime.combine(PERIOD.start, datetime.min.time())
+dates = [datetime.combine(d, datetime.min.time()) for d in PERIOD.dates]
+weekday_list = PERIOD.weekday_names
+
+
+@dataclass(frozen=True)
+class Config:
+    """1期間分の設定。
+
+    希望休（requests）や看護師リストなどは初回アクセス時に読み込んでキャッシュする。
+    期間ごとに別の Config を作れば、同じプロセスで複数の期間を扱える。
+    """
+    year: int = YEAR
+    month: int = MONTH
+    req_shift_path: str = REQ_SHIFT_PATH
+    template_path: str = TEMPLATE_PATH
+    temp_shift_path: str = TEMP_SHIFT_PATH
+    history_dir: str = HISTORY_DIR
+    target_rest_score: float = TARGET_REST_SCORE
+    rest_spread: float = REST_SPREAD  # 貪欲割り振りで許す休みの差（optimize_2.balance_rest_days）
+    yakin_workers: tuple[str, ...] = tuple(YAKIN_WORKERS)
+    weekday_crew: int | None = None  # 平日の体制（7 / 8 で固定。None なら8人体制優先）
+    encoding: str = 'bool'  # CP-SAT モデルの変数の表し方（optimize_cp.ENCODINGS）
+    solver_params: dict = field(default_factory=lambda: dict(SOLVER_PARAMS))
+
+    @classmethod
+    def from_file(cls, path, **overrides) -> 'Config':
+        """TOML か JSON の設定ファイルから作成する（キーは Config の項目名）。
+
+        overrides の None 以外の値はファイルの値より優先する。
+        """
+        path = Path(path)
+        if path.suffix == '.toml':
+            import tomllib
+            with open(path, 'rb') as f:
+                values = tomllib.load(f)
+        else:
+            with open(path, encoding='utf-8') as f:
+                values = json.load(f)
+        return cls().with_overrides(**values).with_overrides(**overrides)
+
+    def with_overrides(self, **overrides) -> 'Config':
+        """None 以外の値を上書きした新しい Config を返す。"""
+        return self.variant(**{k: v for k, v in overrides.items() if v is not None})
+
+    def variant(self, **values) -> 'Config':
+        """values（None も含む）で置き換えた新しい Config を返す。
+
+        期間・希望休CSVが変わらなければ読み込み済みの期間・希望休を引き継ぐ。
+        """
+        names = {f.name for f in fields(self)}
+        unknown = set(values) - names
+        if unknown:
+            raise ValueError(f'unknown config keys: {sorted(unknown)}')
+        if 'solver_params' in values:
+            values['solver_params'] = {**self.solver_params, **(values['solver_params'] or {})}
+        if values.get('yakin_workers') is not None:
+            values['yakin_workers'] = tuple(values['yakin_workers'])
+        new = replace(self, **values)
+        shared = [('period', ('year', 'month')),
+                  ('input_csv', ('req_shift_path',)),
+                  ('requests', ('year', 'month', 'req_shift_path'))]
+        for name, keys in shared:
+            if name in self.__dict__ and all(getattr(new, k) == getattr(self, k) for k in keys):
+                new.__dict__[name] = self.__dict__[name]
+        return new
+
+    @cached_property
+    def period(self) -> PeriodCalendar:
+        return PeriodCalendar(self.year, self.month)
+
+    @cached_property
+    def input_csv(self):
+        """希望休CSVの DataFrame。"""
+        import pandas as pd
+        return pd.read_csv(self.req_shift_path)
+
+    @cached_property
+    def requests(self):
+        """希望休CSVの RequestIndex（request_index を参照）。"""
+        from request_index import RequestIndex
+        return RequestIndex.from_frame(self.input_csv, self.period)
+
+    @property
+    def nurses(self) -> list[str]:
+        return self.requests.nurses
+
+    @property
+    def holiday_workers(self) -> list[str]:
+        return [n for n in self.nurses if n not in HOLIDAY_NO_WORKERS]
+
+
+_default = None
+
+
+def default_config() -> Config:
+    """モジュール定数どおりの Config（プロセス内で共有）。"""
+    global _default
+    if _default is None:
+        _default = Config()
+    return _default
+
+
+# 旧来の config.INPUT_CSV などは既定の Config から遅延して読み込む
+_LAZY = {
+    'INPUT_CSV': 'input_csv',
+    'NURSES': 'nurses',
+    'HOLIDAY_WORKERS': 'holiday_workers',
+}
+
 
-start_date = datetime(YEAR, MONTH - 1, 21)
-dates = [start_date + timedelta(days=i) for i in range(DAYS_IN_MONTH)]
-weekday_list = [calendar.day_name[d.weekday()] for d in dates]
-
-def japanese_holidays(year: int) -> list[date]:
-    """指定した年の日本の祝日を返します（1980–2099年対応）。"""
-    holidays = []
-
-    # 固定祝日
-    fixed = [
-        (1, 1), (2, 11), (2, 23),
-        (4, 29), (5, 3), (5, 4), (5, 5),
-        (8, 11), (11, 3), (11, 23),
-    ]
-    for m, d in fixed:
-        holidays.append(date(year, m, d))
-
-    # Happy Monday 制度
-    def nth_monday(month: int, nth: int) -> date:
-        d0 = date(year, month, 1)
-        offset = (0 - d0.weekday()) % 7  # 0=Mon
-        return d0 + timedelta(days=offset + 7 * (nth - 1))
-    holidays.append(nth_monday(1, 2))   # 成人の日
-    holidays.append(nth_monday(7, 3))   # 海の日
-    holidays.append(nth_monday(9, 3))   # 敬老の日
-    holidays.append(nth_monday(10, 2))  # スポーツの日
-
-    # 春分の日・秋分の日（近似式）
-    vernal = int(20.8431 + 0.242194 * (year - 1980) - ((year - 1980) // 4))
-    autumn = int(23.2488 + 0.242194 * (year - 1980) - ((year - 1980) // 4))
-    holidays.append(date(year, 3, vernal))
-    holidays.append(date(year, 9, autumn))
-
-    # 国民の休日（祝日に挟まれた平日）
-    holiday_set = set(holidays)
-    added = True
-    while added:
-        added = False
-        sorted_h = sorted(holiday_set)
-        for i in range(len(sorted_h) - 1):
-            if (sorted_h[i + 1] - sorted_h[i]).days == 2:
-                mid = sorted_h[i] + timedelta(days=1)
-                if mid.weekday() != 6 and mid not in holiday_set:
-                    holiday_set.add(mid)
-                    added = True
-                    break
-
-    # 振替休日（日曜の祝日の翌平日）
-    sorted_h = sorted(holiday_set)
-    for h in sorted_h:
-        if h.weekday() == 6:  # 日曜
-            next_day = h + timedelta(days=1)
-            while next_day in holiday_set:
-                next_day += timedelta(days=1)
-            holiday_set.add(next_day)
-
-    return sorted(holiday_set)
-
-def is_japanese_holiday(dt) -> bool:
-    """datetime.datetime から祝日かどうかを返す。"""
-    return dt.date() in japanese_holidays(dt.year)
\ No newline at end of file
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(default_config(), _LAZY[name])
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,86 @@
+"""看護師 × 日ごとに取りうるシフトの集合（ドメイン）を求める。
+
+CP-SAT のモデルはドメインに含まれる (看護師, 日, シフト) の組にだけ変数を作る。
+あり得ない組を変数ごと作らないことで、「== 0」の制約を大量に追加せずに済む。
+"""
+from config import HOLIDAY_NO_WORKERS, SHIFT_TYPES, YAKIN_WORKERS
+
+_ORDER = {s: i for i, s in enumerate(SHIFT_TYPES)}
+
+
+class ShiftDomains:
+    """allowed[n, d] は取りうるシフト（SHIFT_TYPES 順）、forced[n, d] は必ず入るシフト。
+
+    conflicts には必須のシフトが取りうるシフトに無いセル（解なし）の (n, d, シフト) が入る。
+    """
+
+    def __init__(self, allowed, forced, conflicts):
+        self.allowed = allowed
+        self.forced = forced
+        self.conflicts = conflicts
+
+    def __len__(self):
+        return sum(len(v) for v in self.allowed.values())
+
+    def keys(self):
+        """変数を作る (n, d, s) の組。"""
+        for (n, d), shifts in self.allowed.items():
+            for s in shifts:
+                yield n, d, s
+
+    def shifts(self, n, d) -> tuple:
+        return self.allowed.get((n, d), ())
+
+
+def forced_shifts(requests, nurses, period) -> dict:
+    """Strict1（木日祝の休み・第2木曜の/訪）と Strict2（希望休）で決まるセルのシフト。
+
+    両方で決まるセルで値が食い違う場合は、両方を集合で返す（呼び出し側で矛盾として扱う）。
+    """
+    forced = {}
+    # Strict1: 木日祝は特定看護師は休み(久保は第2木曜日は/訪(訪看日))
+    for d in range(period.days):
+        if not period.is_full(d):
+            continue
+        for n in HOLIDAY_NO_WORKERS:
+            if n not in nurses:
+                continue
+            forced[n, d] = {'/訪' if n == '久保' and d == period.second_thursday else '休'}
+    # Strict2: 希望休
+    for n in nurses:
+        for req in requests.by_nurse.get(n, []):
+            forced.setdefault((n, req.day), set()).add(req.shift)
+    return forced
+
+
+def build_domains(requests, nurses, period, candidates, yakin_workers=None, after_night=()) -> ShiftDomains:
+    """candidates(n, d) の候補から各セルのドメインを求める。
+
+    夜勤は yakin_workers のみ、×は夜勤メンバーの2日目以降のみとし、
+    Strict1・Strict2 で決まるセルはそのシフトだけにする。
+    after_night（前期間の最終日が夜勤の看護師）は初日が×に決まる。
+    """
+    yakin = set(YAKIN_WORKERS if yakin_workers is None else yakin_workers)
+    forced = forced_shifts(requests, nurses, period)
+    for n in after_night:
+        if n in nurses:
+            forced.setdefault((n, 0), set()).add('×')
+    allowed, fixed, conflicts = {}, {}, []
+    for n in nurses:
+        for d in range(period.days):
+            shifts = set(candidates(n, d))
+            if n not in yakin:
+                shifts -= {'夜', '×'}
+            elif d == 0:
+                shifts.discard('×')
+            must = forced.get((n, d))
+            if must:
+                if len(must) > 1:
+                    conflicts.extend((n, d, s) for s in sorted(must, key=_ORDER.get))
+                    shifts = set()
+                else:
+                    s, = must
+                    fixed[n, d] = s
+                    shifts = {s}
+            allowed[n, d] = tuple(sorted(shifts, key=_ORDER.get))
+    return ShiftDomains(allowed, fixed, conflicts)
@@ -0,0 +1,203 @@
+"""シフト表を Excel テンプレートに書き込む。
+
+テンプレートの配置（看護師名 → 行、日 → 列、見出しのセル）は最初の1回だけ読み取り、読み込んだ
+ブックと一緒にファイルの SHA-256 をキーにキャッシュする。書き込んだセルは保存後にテンプレートの値に
+戻すので、同じテンプレートへの2回目以降の出力ではテンプレートを解析し直さない。
+
+    write_schedule(df, 'data/shift_template.xlsx', 'output/shift_output.xlsx', period=config.period)
+    write_workbook([SheetData(df_3a, '3A'), SheetData(df_3b, '3B')], template, 'output/wards.xlsx')
+    export_workbooks([(df, path, period), ...], template, workers=4)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from io import BytesIO
+from pathlib import Path
+import hashlib
+import threading
+
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+
+SHEET = 'シフト表'
+# 見出しの入力セル（年・月・期間の開始月と終了月）は、見出しの行でこの順に並ぶ単位の直前の数値のセル。
+# 「～」より前の「月」が開始月、後の「月」が終了月。日付の行は =DATE(年, 開始月, 21) からの数式なので、
+# 期間の初日が前年になる1月の期間だけ最初の日の数式を前年の年で書き換える
+HEADER_UNITS = (('year', '年'), ('month', '月'), ('start_month', '月'), ('end_month', '月'))
+PERIOD_SEPARATOR = '～'
+
+
+@dataclass(frozen=True)
+class TemplateLayout:
+    """テンプレートのシフト表の配置。rows は看護師名 → 行、columns は d 日目 → 列（どちらも1始まり）。"""
+    digest: str
+    rows: dict
+    columns: tuple
+    date_row: int
+    template_values: dict  # 書き込むセル (行, 列) のテンプレートの値（保存後に戻す）
+    header: dict  # HEADER_UNITS の名前 → 見出しの入力セル (行, 列)。見出しが無ければ空
+
+    @classmethod
+    def parse(cls, sheet, digest='') -> 'TemplateLayout':
+        """「日付」「曜日」の行の下に続く看護師名の行と、日付の行の数式・日付が続く列を読み取る。"""
+        date_row = next(r for r in range(1, sheet.max_row + 1) if sheet.cell(r, 1).value == '日付')
+        columns = []
+        for c in range(3, sheet.max_column + 1):
+            value = sheet.cell(date_row, c).value
+            if not (isinstance(value, (date, datetime)) or (isinstance(value, str) and value.startswith('='))):
+                break
+            columns.append(c)
+        rows = {}
+        for r in range(date_row + 2, sheet.max_row + 1):
+            name = sheet.cell(r, 1).value
+            if not isinstance(name, str) or not name.strip():
+                break
+            rows[name.strip()] = r
+        header = _header_cells(sheet, date_row)
+        cells = [(r, c) for r in rows.values() for c in columns] + [(date_row, columns[0])] + list(header.values())
+        return cls(digest, rows, tuple(columns), date_row, {rc: sheet.cell(*rc).value for rc in cells}, header)
+
+    def fill(self, sheet, df, days=None, period=None):
+        """df（index=看護師, 列=day_i）を sheet に書き込む。テンプレートに無い看護師・列を超える日は書かない。
+
+        days の省略時は period の日数（period も無ければ df の列数）まで書く。
+        period（PeriodCalendar）を渡すと見出しの年月の入力セルも書き換える（日付の行は数式で決まる）。
+        """
+        if days is None:
+            days = len(df.columns) if period is None else period.days
+        columns = self.columns[:min(days, len(df.columns))]
+        values = df.iloc[:, :len(columns)].to_numpy(dtype=object)
+        for nurse, row in zip(df.index, values):
+            r = self.rows.get(nurse)
+            if r is None:
+                continue
+            for c, shift in zip(columns, row):
+                sheet.cell(r, c).value = shift
+        if period is not None:
+            if not self.header:
+                raise ValueError('template has no year/month header to write the period to')
+            values = {'year': period.year, 'month': period.month,
+                      'start_month': period.start.month, 'end_month': period.month}
+            for name, (r, c) in self.header.items():
+                sheet.cell(r, c).value = values[name]
+            if period.start.year != period.year:
+                year, month = (_coordinate(*self.header[k]) for k in ('year', 'start_month'))
+                offset = period.start.year - period.year
+                sheet.cell(self.date_row, self.columns[0]).value = \
+                    f'=DATE({year}{offset:+d},{month},{period.start.day})'
+
+    def reset(self, sheet):
+        """fill で書き込んだセルをテンプレートの値に戻す。"""
+        for (r, c), value in self.template_values.items():
+            sheet.cell(r, c).value = value
+
+
+def _coordinate(row, column) -> str:
+    return f'{get_column_letter(column)}{row}'
+
+
+def _header_cells(sheet, date_row) -> dict:
+    """日付の行より上で「年」を含む行から、HEADER_UNITS の入力セルを読み取る（見つからなければ空）。"""
+    for r in range(1, date_row):
+        labels = [(c, sheet.cell(r, c).value) for c in range(1, sheet.max_column + 1)]
+        if not any(v == HEADER_UNITS[0][1] for _, v in labels):
+            continue
+        header, units, last, separated = {}, list(HEADER_UNITS), None, False
+        for c, value in labels:
+            if isinstance(value, int):
+                last = c
+            elif value == PERIOD_SEPARATOR:
+                separated = True
+            elif units and value == units[0][1] and last is not None:
+                name = units[0][0]
+                if name == 'end_month' and not separated:
+                    continue  # 開始月と同じ側の「月」ではない
+                header[name] = (r, last)
+                units.pop(0)
+                last = None
+        return header if not units else {}
+    return {}
+
+
+@dataclass(frozen=True)
+class SheetData:
+    """write_workbook の1シート分（title はシート名、period は見出しの年月）。"""
+    shifts: object  # index=看護師, 列=day_i の DataFrame
+    title: str = SHEET
+    period: object = None
+
+
+_cache = {}  # digest → (TemplateLayout, Workbook, Lock)
+_cache_lock = threading.Lock()
+
+
+def load_template(path):
+    """path のテンプレートの (TemplateLayout, Workbook, Lock)。同じ内容のファイルは1回だけ解析する。
+
+    Workbook は出力のたびに使い回すため、書き込みから保存・reset までは Lock を取る。
+    """
+    data = Path(path).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    with _cache_lock:
+        if digest not in _cache:
+            wb = load_workbook(BytesIO(data))
+            _cache[digest] = (TemplateLayout.parse(wb[SHEET], digest), wb, threading.Lock())
+        return _cache[digest]
+
+
+def clear_template_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def write_schedule(df, template_path, output_path, days=None, period=None):
+    """シフト DataFrame（index=看護師, 列=day_i）を Excel テンプレートに書き込み保存する。"""
+    layout, wb, lock = load_template(template_path)
+    with lock:
+        sheet = wb[SHEET]
+        try:
+            layout.fill(sheet, df, days, period)
+            wb.save(output_path)
+        finally:
+            layout.reset(sheet)
+    return output_path
+
+
+def write_workbook(sheets, template_path, output_path):
+    """sheets（SheetData。病棟・月ごとなど）をテンプレートのシートの複製に1枚ずつ書き込み、1つのブックに保存する。"""
+    if not sheets:
+        raise ValueError('no sheets to write')
+    layout, wb, lock = load_template(template_path)
+    with lock:
+        template = wb[SHEET]
+        copies = [wb.copy_worksheet(template) for _ in sheets[1:]]
+        targets = [template] + copies
+        try:
+            for sheet, data in zip(targets, sheets):
+                layout.fill(sheet, data.shifts, period=data.period)
+            for sheet, data in zip(targets, sheets):
+                sheet.title = data.title
+            wb.save(output_path)
+        finally:
+            for sheet in copies:
+                wb.remove(sheet)
+            template.title = SHEET
+            layout.reset(template)
+    return output_path
+
+
+def _export(item, template_path):
+    df, output_path, *rest = item
+    return write_schedule(df, template_path, output_path, period=rest[0] if rest else None)
+
+
+def export_workbooks(items, template_path, workers=None):
+    """items の (シフト表, 出力先[, period]) を1ファイルずつ書き出し、出力先のリストを返す。
+
+    workers > 1 のときは workers プロセスで同時に書き出す（テンプレートの解析はプロセスごとに1回）。
+    """
+    items = list(items)
+    if not workers or workers == 1:
+        return [_export(item, template_path) for item in items]
+    with ProcessPoolExecutor(workers, initializer=load_template, initargs=(template_path,)) as pool:
+        return list(pool.map(_export, items, [template_path] * len(items)))
@@ -0,0 +1,88 @@
+"""過去のシフト表を CP-SAT の初期解ヒント（AddHint）として使う。
+
+同じ期間の前回結果があればそれを、無ければ前月の結果を曜日が揃うようにずらして使う。
+"""
+from pathlib import Path
+
+import pandas as pd
+
+import artifact
+from period import PeriodCalendar
+
+
+def history_path(history_dir, period) -> Path:
+    return Path(history_dir) / f'{period.year}-{period.month:02d}{artifact.SUFFIX}'
+
+
+def _existing(history_dir, period) -> Path | None:
+    """period の履歴（.npz が無ければ旧形式の .csv）。無ければ None。"""
+    path = history_path(history_dir, period)
+    for p in (path, path.with_suffix('.csv')):
+        if p.exists():
+            return p
+    return None
+
+
+def save_history(shifts: pd.DataFrame, history_dir, period):
+    """確定したシフト表を期間ごとの履歴（artifact の .npz）として保存する。"""
+    return artifact.save(history_path(history_dir, period), shifts)
+
+
+def align_to_period(prev: pd.DataFrame, prev_period, period) -> pd.DataFrame:
+    """前期間のシフト表を、曜日が一致するようにずらして period の列に並べ直す。"""
+    delta = (period.start - prev_period.start).days % 7
+    columns = {}
+    for d in range(period.days):
+        src = d + delta
+        while src >= prev_period.days:
+            src -= 7
+        columns[f'day_{d}'] = prev[f'day_{src}']
+    return pd.DataFrame(columns, index=prev.index)
+
+
+def load_hint(history_dir, period):
+    """ヒントに使うシフト表と、その出典を返す。見つからなければ (None, None)。"""
+    path = _existing(history_dir, period)
+    if path:
+        return artifact.read_schedule(path), str(path)
+
+    prev_year, prev_month = (period.year - 1, 12) if period.month == 1 else (period.year, period.month - 1)
+    prev_period = PeriodCalendar(prev_year, prev_month)
+    prev_path = _existing(history_dir, prev_period)
+    if prev_path:
+        return align_to_period(artifact.read_schedule(prev_path), prev_period, period), str(prev_path)
+    return None, None
+
+
+def add_hints(model, x, hint: pd.DataFrame, shift_types, days, blank_as_zero=False):
+    """hint の各セルを x[n, d, s] のヒントとして追加し、ヒントを与えたセル数を返す。
+
+    blank_as_zero=True のとき空欄のセルは全シフト0としてヒントを与える。
+    """
+    hinted = 0
+    for n in hint.index:
+        for d in range(days):
+            col = f'day_{d}'
+            value = hint.at[n, col] if col in hint.columns else None
+            if pd.isna(value):
+                if not blank_as_zero:
+                    continue
+                value = None
+            keys = [(n, d, s) for s in shift_types if (n, d, s) in x]
+            for key in keys:
+                model.AddHint(x[key], int(value == key[2]))
+            hinted += bool(keys)
+    return hinted
+
+
+def hint_report(hint: pd.DataFrame, result: pd.DataFrame) -> dict:
+    """ヒントを与えたセルのうち、結果でも同じ値だったセル数を集計する。"""
+    hinted = kept = 0
+    for n in result.index.intersection(hint.index):
+        for col in result.columns.intersection(hint.columns):
+            value = hint.at[n, col]
+            if pd.isna(value):
+                continue
+            hinted += 1
+            kept += int(str(result.at[n, col]) == str(value))
+    return {'hinted': hinted, 'kept': kept, 'kept_ratio': kept / hinted if hinted else None}
@@ -0,0 +1,141 @@
+"""ステージごとの実行時間・CP-SAT のモデル統計と求解統計・貪欲割り振りのカウンタを記録する。
+
+Profiler.activate() の間だけ記録する。無効時の stage() / count() は
+グローバル変数を1回見るだけなので、常に呼び出しておいてよい。
+
+    profiler = Profiler()
+    with profiler.activate():
+        schedule = build_schedule(...)
+    profiler.write('output/profile.json')
+"""
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+import json
+import time
+
+_active = None
+_NULL = nullcontext()
+
+
+class Profiler:
+    def __init__(self):
+        self.stages = []        # {'name': 'build/strict', 'seconds': ...}（入れ子は / 区切り）
+        self.counters = Counter()
+        self.solves = []        # CP-SAT の求解ごとのモデル統計・求解統計
+        self._stack = []
+
+    @contextmanager
+    def activate(self):
+        global _active
+        previous, _active = _active, self
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_seconds = time.perf_counter() - started
+            _active = previous
+
+    @contextmanager
+    def stage(self, name):
+        self._stack.append(name)
+        path = '/'.join(self._stack)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append({'name': path, 'seconds': time.perf_counter() - started})
+            self._stack.pop()
+
+    def to_dict(self) -> dict:
+        return {
+            'total_seconds': getattr(self, 'total_seconds', None),
+            'stages': self.stages,
+            'counters': dict(self.counters),
+            'solves': self.solves,
+        }
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def stage(name):
+    """with stage('build'): ... の区間の実行時間を記録する（無効時は何もしない）。"""
+    return _active.stage(name) if _active is not None else _NULL
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.counters[name] += n
+
+
+# よく使う順（新しい ortools の ConstraintProto は WhichOneof を持たないため has_* で判定する）
+_CONSTRAINT_KINDS = (
+    'linear', 'exactly_one', 'bool_or', 'bool_and', 'at_most_one', 'lin_max', 'table', 'automaton',
+    'bool_xor', 'int_prod', 'int_div', 'int_mod', 'element', 'all_diff', 'inverse', 'reservoir',
+    'interval', 'no_overlap', 'no_overlap_2d', 'cumulative', 'circuit', 'routes',
+)
+
+
+def _constraint_kind(c):
+    if hasattr(c, 'WhichOneof'):
+        return c.WhichOneof('constraint')
+    return next((k for k in _CONSTRAINT_KINDS if getattr(c, f'has_{k}')()), None)
+
+
+def model_stats(model) -> dict:
+    """CpModel の変数数・制約の種類ごとの数。"""
+    proto = model.Proto()
+    bools = sum(1 for v in proto.variables if len(v.domain) == 2 and v.domain[0] >= 0 and v.domain[1] <= 1)
+    return {
+        'variables': len(proto.variables),
+        'booleans': bools,
+        'constraints': len(proto.constraints),
+        'constraints_by_type': dict(Counter(_constraint_kind(c) for c in proto.constraints)),
+        'objective_terms': len(proto.objective.vars),
+        'hints': len(proto.solution_hint.vars),
+    }
+
+
+def response_stats(solver) -> dict:
+    """CpSolver の求解統計（presolve 後の変数数を含む）。"""
+    r = solver.ResponseProto()
+    return {
+        'wall_time': r.wall_time,
+        'user_time': r.user_time,
+        'deterministic_time': r.deterministic_time,
+        'num_conflicts': r.num_conflicts,
+        'num_branches': r.num_branches,
+        'num_booleans': r.num_booleans,
+        'num_integers': r.num_integers,
+        'num_fixed_booleans': r.num_fixed_booleans,
+        'num_restarts': r.num_restarts,
+        'num_lp_iterations': r.num_lp_iterations,
+        'objective': r.objective_value,
+        'best_bound': r.best_objective_bound,
+        'solution_info': r.solution_info,
+    }
+
+
+def record_solve(name, model, solver, status_name):
+    """求解1回分の統計を記録する。run_solver から呼ばれる。"""
+    if _active is None:
+        return
+    stats = model_stats(model)
+    response = response_stats(solver)
+    _active.solves.append({
+        'name': name,
+        'status': status_name,
+        'model': stats,
+        'response': response,
+        # presolve 前のモデルの変数数と、presolve 後にソルバーが読み込んだ変数数
+        'presolve': {
+            'variables_before': stats['variables'],
+            'variables_after': response['num_booleans'] + response['num_integers'],
+        },
+    })
@@ -0,0 +1,195 @@
+"""完成したシフト表を大近傍探索（LNS）で改善する。
+
+    python lns.py output/schedule.npz --time-limit 60 --workers 4
+
+近傍（連続した数日・数人の看護師・全土曜日）のセルだけを自由にし、それ以外のセルを現在の
+シフトに固定して CP-SAT で解き直し、目的関数が改善したときだけ採用する。目的関数は
+optimize_cp.ScheduleModel と同じ（休みスコアの不足・偏り、早日残日と土曜外来の偏り、体制など）。
+workers > 1 のときは近傍を workers 個ずつ別プロセスで同時に解き、最も良い解を採用する。
+
+モデルの制約を満たさないシフト表（greedy エンジンの結果など）から始めた場合は、ドメイン外の
+セルを常に自由にし、最初に解が見つかった近傍の解から改善を始める。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+import argparse
+import random
+import sys
+import time
+
+from ortools.sat.python import cp_model
+import pandas as pd
+
+import artifact
+from optimize_cp import SHIFT_CODE, ScheduleModel
+from period import HALF
+from solver_params import SolverParams
+
+NEIGHBOURHOODS = ('days', 'nurses', 'saturdays')
+
+
+@dataclass(frozen=True)
+class Neighbourhood:
+    kind: str
+    cells: frozenset  # 自由にする (看護師, 日)
+
+    @classmethod
+    def make(cls, kind, nurses, period, rng, block_days=7, nurse_count=4) -> 'Neighbourhood':
+        """days: 連続した block_days 日, nurses: nurse_count 人の全日, saturdays: 全土曜日。"""
+        if kind == 'days':
+            block = min(block_days, period.days)
+            start = rng.randrange(period.days - block + 1)
+            cells = {(n, d) for n in nurses for d in range(start, start + block)}
+        elif kind == 'nurses':
+            chosen = rng.sample(list(nurses), min(nurse_count, len(nurses)))
+            cells = {(n, d) for n in chosen for d in range(period.days)}
+        elif kind == 'saturdays':
+            cells = {(n, d) for n in nurses for d, t in enumerate(period.day_types) if t == HALF}
+        else:
+            raise ValueError(f'unknown neighbourhood: {kind!r}')
+        return cls(kind, frozenset(cells))
+
+
+@dataclass
+class LNSResult:
+    shifts: pd.DataFrame
+    objective: float | None  # None はモデルの制約を満たす解が見つからなかった
+    initial_objective: float | None
+    iterations: int = 0
+    history: list[dict] = field(default_factory=list)  # 採用した解（経過秒・目的関数値・近傍）
+
+
+def solve_neighbourhood(model: ScheduleModel, shifts: pd.DataFrame, cells=frozenset(), params=None):
+    """cells 以外のセルを shifts に固定して解き直し、(目的関数値, シフト表) を返す。解が無ければ (None, None)。
+
+    ドメイン外の値のセルは固定せず、自由にするセルには shifts の値をヒントとして与える。
+    """
+    m = model.model.Clone()
+    for n in model.nurses:
+        for d in range(model.days):
+            value = shifts.at[n, f'day_{d}'] if n in shifts.index else None
+            if value not in model.domains.shifts(n, d):
+                continue
+            var, target = ((model.y[n, d], SHIFT_CODE[value]) if model.encoding == 'table'
+                           else (model.x[n, d, value], 1))
+            if (n, d) in cells:
+                m.AddHint(var, target)
+            else:
+                m.Add(var == target)
+    solver = (params or SolverParams()).apply(cp_model.CpSolver())
+    status = solver.Solve(m)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, None
+    return solver.ObjectiveValue(), model.to_frame(solver)
+
+
+_worker_model = None
+
+
+def _init_worker(requests, period, options):
+    global _worker_model
+    _worker_model = ScheduleModel(requests, period=period, strict_rest=False, symmetry=False, **options)
+
+
+def _solve_in_worker(shifts, cells, params):
+    return solve_neighbourhood(_worker_model, shifts, cells, params)
+
+
+def improve_schedule(shifts: pd.DataFrame, requests=None, period=None, time_limit=60.0, workers=1,
+                     params: SolverParams | None = None, step_time=5.0, seed=0, kinds=NEIGHBOURHOODS,
+                     block_days=7, nurse_count=4, **options) -> LNSResult:
+    """shifts を time_limit 秒の間 LNS で改善する。
+
+    step_time は近傍1つの求解時間の上限、options は ScheduleModel に渡す
+    （target_rest_score, yakin_workers, weekday_crew, encoding）。休みスコアの目標は
+    ペナルティとして扱う（strict_rest=False）。
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    # 固定したセルが辞書式順序の制約と食い違わないよう、対称性の除去は行わない
+    model = ScheduleModel(requests, period=period, strict_rest=False, symmetry=False, **options)
+    params = params or SolverParams.from_config()
+    if workers > 1:
+        params = params.with_overrides(num_workers=1)  # 近傍どうしで並列にする
+    best, _ = solve_neighbourhood(model, shifts, params=params.with_overrides(max_time_in_seconds=step_time))
+    result = LNSResult(shifts, best, best)
+    result.history.append({'elapsed': time.perf_counter() - started, 'objective': best, 'kind': 'initial'})
+
+    pool = (ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model.requests, model.period, options))
+            if workers > 1 else None)
+    try:
+        while (remaining := time_limit - (time.perf_counter() - started)) > 0:
+            step = params.with_overrides(max_time_in_seconds=min(step_time, remaining), random_seed=rng.randrange(2**31))
+            batch = [Neighbourhood.make(kinds[(result.iterations + i) % len(kinds)], model.nurses, model.period, rng,
+                                        block_days, nurse_count) for i in range(workers)]
+            if pool is None:
+                outcomes = [solve_neighbourhood(model, result.shifts, nb.cells, step) for nb in batch]
+            else:
+                futures = [pool.submit(_solve_in_worker, result.shifts, nb.cells, step) for nb in batch]
+                outcomes = [f.result() for f in futures]
+            result.iterations += len(batch)
+            found = [(obj, df, nb) for (obj, df), nb in zip(outcomes, batch) if obj is not None]
+            if not found:
+                continue
+            obj, df, nb = min(found, key=lambda t: t[0])
+            if result.objective is None or obj < result.objective:
+                result.shifts, result.objective = df, obj
+                result.history.append({'elapsed': time.perf_counter() - started, 'objective': obj, 'kind': nb.kind})
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='完成したシフト表を大近傍探索で改善します。')
+    parser.add_argument('schedule', nargs='?', default='output/schedule.npz',
+                        help='改善するシフト表（schedule.npz・履歴の .npz か shift_final.csv）')
+    parser.add_argument('--config', help='設定ファイル（main.py の --config と同じ）')
+    parser.add_argument('--time-limit', type=float, default=60.0, help='全体の時間（秒）')
+    parser.add_argument('--step-time', type=float, default=5.0, help='近傍1つの求解時間の上限（秒）')
+    parser.add_argument('--workers', type=int, default=1, help='同時に解く近傍の数（プロセス数）')
+    parser.add_argument('--neighbourhood', action='append', choices=NEIGHBOURHOODS,
+                        help='使う近傍（複数指定可。省略時はすべてを順に使う）')
+    parser.add_argument('--block-days', type=int, default=7, help='days 近傍の日数')
+    parser.add_argument('--nurses', type=int, default=4, help='nurses 近傍の人数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='output/shift_lns.csv',
+                        help='改善したシフト表の出力先（.npz なら artifact 形式、それ以外は CSV）')
+    args = parser.parse_args(argv)
+
+    from config import Config, default_config
+    from optimize_2 import summarize, to_output_frame
+    from scenarios import schedule_metrics
+
+    config = Config.from_file(args.config) if args.config else default_config()
+    shifts = artifact.read_schedule(args.schedule)
+    result = improve_schedule(
+        shifts, config.requests, config.period, args.time_limit, args.workers,
+        SolverParams.from_config(config), args.step_time, args.seed,
+        tuple(args.neighbourhood or NEIGHBOURHOODS), args.block_days, args.nurses,
+        target_rest_score=config.target_rest_score, yakin_workers=config.yakin_workers,
+        weekday_crew=config.weekday_crew, encoding=config.encoding,
+    )
+    if result.objective is None:
+        print("❌ 制約を満たすシフト表が見つかりませんでした。")
+        return 1
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if out.suffix == artifact.SUFFIX:
+        artifact.save(out, result.shifts)
+    else:
+        summarize(to_output_frame(result.shifts)).to_csv(out, encoding='utf-8-sig')
+    print(pd.DataFrame({'before': schedule_metrics(shifts, config),
+                        'after': schedule_metrics(result.shifts, config)}).to_string())
+    initial = 'なし' if result.initial_objective is None else f'{result.initial_objective:g}'
+    print(f"目的関数: {initial} → {result.objective:g}"
+          f"（{result.iterations}近傍, 採用{len(result.history) - 1}回）")
+    print(f"✅ 改善したシフト表を {out} に保存しました。")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,51 +1,66 @@
-import subprocess
+import argparse
 import sys
-import pandas as pd
-from openpyxl import load_workbook
 
-TEMPLATE_PATH = "data/shift_template.xlsx"
-TEMP_SHIFT_PATH = "output/shift_final.csv"
-OUTPUT_PATH = "output/shift_output.xlsx"
+from config import Config
+from optimize_cp import ENCODINGS
+from pipeline import ENGINES, ScheduleError, run
+from solver_params import PRESOLVE_LEVELS, SolverParams
 
-# 1. optimize_1.py を実行して temp_shift_output_1.csv を生成
-print("=== Step 1: Strict1~3の最適化 ===")
-ret1 = subprocess.run([sys.executable, "optimize_1.py"])
-if ret1.returncode != 0:
-    print("optimize_1.py の実行に失敗しました")
-    sys.exit(1)
 
-# 2. optimize_2.py を実行して、temp_shift_output_1.csv を使って次の最適化
-print("=== Step 2: 追加最適化 ===")
-ret2 = subprocess.run([sys.executable, "optimize_2.py"])
-if ret2.returncode != 0:
-    print("optimize_2.py の実行に失敗しました")
-    sys.exit(1)
-# CSV読込
-df = pd.read_csv(TEMP_SHIFT_PATH, index_col=0)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='看護師シフト表を作成します。')
+    parser.add_argument('--config', help='設定ファイル（TOML / JSON。キーは config.Config の項目名）')
+    parser.add_argument('--year', type=int, help='対象年（省略時は設定の値）')
+    parser.add_argument('--month', type=int, help='対象月（前月21日〜当月20日）')
+    parser.add_argument('--requests', help='希望休CSV（省略時は設定の req_shift_path）')
+    parser.add_argument('--template', help='Excelテンプレート（省略時は設定の template_path）')
+    parser.add_argument('--output-dir', default='output', help='出力先ディレクトリ')
+    parser.add_argument('--no-excel', action='store_true', help='Excel出力を行わない')
+    parser.add_argument('--no-csv', action='store_true', help='CSV出力を行わない（schedule.npz のみ）')
+    parser.add_argument('--no-hint', action='store_true', help='過去の結果を初期解ヒントに使わない（履歴にも保存しない）')
+    parser.add_argument('--profile', action='store_true',
+                        help='ステージごとの実行時間・モデル統計を出力先の profile.json に書き出す')
+    parser.add_argument('--engine', choices=ENGINES, default='cpsat',
+                        help='cpsat: 単一CP-SATモデル / greedy: optimize_1 → optimize_2')
+    parser.add_argument('--encoding', choices=ENCODINGS,
+                        help='CP-SAT モデルの変数の表し方（bool: シフトごとの BoolVar, table: 日ごとの IntVar と automaton）')
+    solver = parser.add_argument_group('CP-SAT', '省略時は設定の solver_params の値')
+    solver.add_argument('--workers', type=int, help='探索ワーカー数 (num_workers)')
+    solver.add_argument('--time-limit', type=float, help='求解時間の上限（秒）')
+    solver.add_argument('--gap', type=float, help='相対ギャップで打ち切る (relative_gap_limit)')
+    solver.add_argument('--seed', type=int, help='乱数シード')
+    solver.add_argument('--presolve', type=int, choices=PRESOLVE_LEVELS, help='0=無し, 1=軽量, 2=既定')
+    solver.add_argument('--max-memory-mb', type=int, help='ソルバーのメモリ上限（MB）')
+    solver.add_argument('--log-search', action='store_true', help='CP-SAT の探索ログを表示する')
+    args = parser.parse_args(argv)
 
-# Excelテンプレートをロード
-wb = load_workbook(TEMPLATE_PATH)
-sheet = wb['シフト表']
+    overrides = dict(year=args.year, month=args.month, req_shift_path=args.requests, template_path=args.template,
+                     encoding=args.encoding)
+    config = Config.from_file(args.config, **overrides) if args.config else Config().with_overrides(**overrides)
+    params = SolverParams.from_config(
+        config,
+        num_workers=args.workers,
+        max_time_in_seconds=args.time_limit,
+        relative_gap_limit=args.gap,
+        random_seed=args.seed,
+        presolve_level=args.presolve,
+        max_memory_in_mb=args.max_memory_mb,
+        log_search_progress=args.log_search or None,
+    )
 
-# テンプレートの看護師リスト(A6:A19など)を取得
-nurse_rows = list(range(6, 6 + len(df.index)))
-nurse_names_in_excel = [sheet.cell(row=r, column=1).value for r in nurse_rows]
+    print("=== シフト作成 ===")
+    try:
+        schedule = run(output_dir=args.output_dir, excel=not args.no_excel, engine=args.engine, params=params,
+            use_hint=not args.no_hint, config=config, profile=args.profile, csv=not args.no_csv)
+    except ScheduleError as e:
+        print(f"❌ {e}")
+        return 1
+    for issue in schedule.issues:
+        print(f"⚠️ {issue}")
+    print(f"✅ シフト表を {args.output_dir} に保存しました。")
+    print("=== 完了 ===")
+    return 0
 
-# 日付の列(C列:3番目以降)
-col_offset = 3
-date_cols = df.columns.tolist()[:31]  # 31日分のみ
 
-# データを書き込み
-for i, nurse in enumerate(df.index):
-    if nurse not in nurse_names_in_excel:
-        continue
-    row_idx = nurse_names_in_excel.index(nurse) + 6
-    for j, day_col in enumerate(date_cols):
-        shift = df.at[nurse, day_col]
-        sheet.cell(row=row_idx, column=col_offset + j, value=shift)
-
-wb.save(OUTPUT_PATH)
-print(f"✅ シフト表を {OUTPUT_PATH} に保存しました。")
-
-
-print("=== 完了 ===")
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,137 +1,135 @@
 from ortools.sat.python import cp_model
 import pandas as pd
-import calendar
-from datetime import datetime, timedelta
 from config import (
-    TEMP_SHIFT_PATH, YEAR, MONTH, DAYS_IN_MONTH, SHIFT_TYPES, HOLIDAY_MAP, INPUT_CSV, NURSES, HOLIDAY_NO_WORKERS, is_japanese_holiday
+    TEMP_SHIFT_PATH, SHIFT_TYPES, YAKIN_WORKERS, default_config
 )
-
-start_date = datetime(YEAR, MONTH - 1, 21)
-dates = [start_date + timedelta(days=i) for i in range(DAYS_IN_MONTH)]
-weekday_list = [calendar.day_name[d.weekday()] for d in dates]
-
-# ==========モデル定義=========
-model = cp_model.CpModel()
-x = {}
-for n in NURSES:
-    for d in range(DAYS_IN_MONTH):
-        for s in SHIFT_TYPES:
-            x[n, d, s] = model.NewBoolVar(f'x_{n}_{d}_{s}')
-
-
-# 休日フラグを作成（木曜・日曜はfull、土曜はhalf）
-holiday_flags = []
-for d in dates:
-    if is_japanese_holiday(d):
-        # 祝日は木曜・日曜扱い（full）
-        holiday_flags.append('full')
-    elif d.weekday() == 3 or d.weekday() == 6:
-        # 木曜または日曜
-        holiday_flags.append('full')
-    elif d.weekday() == 5:
-        # 土曜
-        holiday_flags.append('half')
-    else:
-        holiday_flags.append('none')
-
-# 日付をindex番号に変換する関数を定義
-def date_to_index(day):
-    return day - 21 if day >= 21 else day + 10
-
-
-# ==========Strict制約==========
-# Strict1: 木日は特定看護師は休み(久保は第2木曜日は/訪(訪看日))
-thursday_indices = [i for i, wd in enumerate(weekday_list) if wd == 'Thursday']
-second_thu = thursday_indices[1] if len(thursday_indices) >= 2 else None
-
-for d in range(DAYS_IN_MONTH):
-    if holiday_flags[d] in ['full']:
-        for n in HOLIDAY_NO_WORKERS:
-            if n == '久保' and second_thu is not None and d == second_thu:
-                model.Add(x['久保', d, '/訪'] == 1)
-            else:
-                model.Add(x[n, d, '休'] == 1)
-
-
-# Strict2: 希望休をStrictに反映する
-# 各看護師ごとに「休み希望日」と「希望種別」をセットで格納
-day_cols = [col for col in INPUT_CSV.columns if str(col).isdigit()]
-req_dayoff = {}
-for nurse in NURSES:
-    reqs = []
-    for col in day_cols:
-        val = INPUT_CSV.loc[INPUT_CSV['日付'] == nurse, col]
-        typ = str(val.values[0]).strip() if col in INPUT_CSV.columns and not val.empty else ''
-        if typ in HOLIDAY_MAP:
-            day = int(col)
-            reqs.append((day, typ))  # (日付, 希望種別)
-    req_dayoff[nurse] = reqs
-
-shift_types = {
-    '①': '休',
-    '②': '休',
-    '③': '休/',
-    '④': '/休',
-    '⑤': '/休'
-}
-
-for nurse, reqs in req_dayoff.items():
-    for day, typ in reqs:
-        idx = date_to_index(day)
-        if typ in ['①', '②']:
-            shift = '休'
-        elif typ == '③':
-            shift = '休/'
-        elif typ in ['④', '⑤']:
-            shift = '/休'
-        else:
-            continue
-        model.Add(x[nurse, idx, shift] == 1)
-        for s in SHIFT_TYPES:
-            if s != shift:
-                model.Add(x[nurse, idx, s] == 0)
-
-
-# Strict3: 夜勤を各日に必ず1人、かつ均等に入れる
-YAKIN_WORKERS = ['樋渡', '中山', '川原田', '友枝', '奥平', '前野', '森園'] # 「御書」「三好」「久保」「三好」「前野」「田浦」は夜勤無し
-
-for d in range(DAYS_IN_MONTH):
-    model.Add(sum(x[n, d, '夜'] for n in YAKIN_WORKERS) == 1)
-
-total_night_days = sum(1 for d in range(DAYS_IN_MONTH))
-base, rem = divmod(total_night_days, len(YAKIN_WORKERS))
-night_counts = [model.NewIntVar(base, base + (1 if i < rem else 0), f'{n}_night_count') for i, n in enumerate(YAKIN_WORKERS)]
-for i, n in enumerate(YAKIN_WORKERS):
-    model.Add(night_counts[i] == sum(x[n, d, '夜'] for d in range(DAYS_IN_MONTH)))
-
-# Strict4: 夜勤の翌日は必ず「×」
-for n in YAKIN_WORKERS:
-    for d in range(DAYS_IN_MONTH - 1):
-        model.Add(x[n, d + 1, '×'] == x[n, d, '夜'])
-        for s in SHIFT_TYPES:
-            if s != '×':
-                model.Add(x[n, d, '夜'] + x[n, d + 1, s] <= 1)
-
-
-# ==========最適化==========
-solver = cp_model.CpSolver()
-status = solver.Solve(model)
-
-if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+import artifact
+from domains import build_domains
+from hints import add_hints, hint_report
+import instrument
+from request_index import as_request_index
+from solver_params import SolverParams, run_solver
+
+# optimize_1 が割り当てるシフト（ヒントはこれ以外を空欄として扱う）
+STRICT_SHIFTS = ['夜', '×', '休', '休/', '/休', '/訪']
+
+
+def build_strict_model(requests, nurses, period, yakin_workers=None):
+    """Strict1~4 の CP-SAT モデルを作成し、(model, x) を返す。
+
+    x[n, d, s] はシフトの割当変数で、Strict で決まり得る組（夜勤メンバーの夜・×と、
+    Strict1・Strict2 で決まるセル）にだけ作る。x に無い組は常に0。
+    """
+    if yakin_workers is None:
+        yakin_workers = YAKIN_WORKERS
+    yakin_workers = [n for n in yakin_workers if n in nurses]
+    if not yakin_workers:
+        raise ValueError('yakin_workers has no nurse on the roster')
+    days = period.days
+
+    # ==========モデル定義=========
+    with instrument.stage('domains'):
+        domains = build_domains(requests, nurses, period, lambda n, d: ('夜', '×'), yakin_workers)
+    model = cp_model.CpModel()
+    x = {key: model.NewBoolVar('x_{}_{}_{}'.format(*key)) for key in domains.keys()}
+
+    # ==========Strict制約==========
+    # Strict1: 木日は特定看護師は休み(久保は第2木曜日は/訪(訪看日))。祝日は木曜・日曜扱い
+    # Strict2: 希望休をStrictに反映する（どちらもドメインで他のシフトは除外済み）
+    for (n, d), s in domains.forced.items():
+        model.Add(x[n, d, s] == 1)
+    if domains.conflicts:
+        model.AddBoolOr([])  # 必須のシフトが食い違うセルがある（解なし）
+
+    # Strict3: 夜勤を各日に必ず1人、かつ均等に入れる
+    for d in range(days):
+        model.Add(sum(x.get((n, d, '夜'), 0) for n in yakin_workers) == 1)
+
+    total_night_days = days
+    base, rem = divmod(total_night_days, len(yakin_workers))
+    night_counts = [model.NewIntVar(base, base + (1 if i < rem else 0), f'{n}_night_count') for i, n in enumerate(yakin_workers)]
+    for i, n in enumerate(yakin_workers):
+        model.Add(night_counts[i] == sum(x.get((n, d, '夜'), 0) for d in range(days)))
+
+    # Strict4: 夜勤の翌日は必ず「×」
+    for n in yakin_workers:
+        for d in range(days - 1):
+            night = x.get((n, d, '夜'))
+            cross = x.get((n, d + 1, '×'))
+            if night is None and cross is None:
+                continue
+            model.Add((cross if cross is not None else 0) == (night if night is not None else 0))
+            if night is None:
+                continue
+            for s in domains.shifts(n, d + 1):
+                if s != '×':
+                    model.Add(night + x[n, d + 1, s] <= 1)
+
+    return model, x
+
+
+def strict_frame(solver, x, nurses, days) -> pd.DataFrame:
+    """求解結果を nurse × day_i の DataFrame にする（どのシフトにも入らないセルは None）。"""
     result = []
-    for n in NURSES:
+    for n in nurses:
         row = []
-        for d in range(DAYS_IN_MONTH):
-            shift = ''
+        for d in range(days):
+            shift = None
             for s in SHIFT_TYPES:
-                if solver.Value(x[n, d, s]):
+                if (n, d, s) in x and solver.Value(x[n, d, s]):
                     shift = s
                     break
             row.append(shift)
-        result.append([n] + row)
-    columns = ['nurse'] + [f'day_{i}' for i in range(DAYS_IN_MONTH)]
-    df = pd.DataFrame(result, columns=columns)
-    df.to_csv(TEMP_SHIFT_PATH, index=False, encoding='utf-8-sig')
-    print(f"✅ シフトCSVを {TEMP_SHIFT_PATH} に保存しました。")
-else:
-    print("❌ 解が見つかりませんでした。")
\ No newline at end of file
+        result.append(row)
+    columns = [f'day_{i}' for i in range(days)]
+    return pd.DataFrame(result, index=pd.Index(nurses, name='nurse'), columns=columns)
+
+
+def solve_strict(requests=None, nurses=None, period=None, params=None, solve_log=None, hint=None,
+                 yakin_workers=None):
+    """Strict1~4 を満たすシフトを求め、nurse × day_i の DataFrame を返す（未割当は NaN）。
+
+    requests は RequestIndex（希望休CSVの DataFrame も可）。nurses の省略時は希望休CSVの全員。
+    requests・period の省略時は config.default_config() の値を使う。
+
+    解が見つからない場合は None を返す。solve_log（list）を渡すと求解情報を追記する。
+    hint（過去のシフト表）を渡すと Strict の対象シフトを初期解ヒントとして与える。
+    yakin_workers は夜勤メンバー（省略時は config.YAKIN_WORKERS）。
+    """
+    if period is None:
+        period = default_config().period
+    if requests is None:
+        requests = default_config().requests
+    requests = as_request_index(requests, period)
+    if nurses is None:
+        nurses = requests.nurses
+    days = period.days
+    with instrument.stage('build_model'):
+        model, x = build_strict_model(requests, nurses, period, yakin_workers)
+
+    # ==========初期解ヒント==========
+    if hint is not None:
+        hint = hint.where(hint.isin(STRICT_SHIFTS))
+        add_hints(model, x, hint, SHIFT_TYPES, days, blank_as_zero=True)
+
+    # ==========最適化==========
+    solver, status, info = run_solver(model, params or SolverParams.from_config(), 'strict')
+    if solve_log is not None:
+        solve_log.append(info)
+
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return None
+
+    df = strict_frame(solver, x, nurses, days)
+    if hint is not None:
+        info['hints'] = hint_report(hint, df)
+    return df
+
+
+if __name__ == '__main__':
+    df = solve_strict()
+    if df is not None:
+        artifact.save(TEMP_SHIFT_PATH, df)
+        print(f"✅ Strict 割当を {TEMP_SHIFT_PATH} に保存しました。")
+    else:
+        print("❌ 解が見つかりませんでした。")
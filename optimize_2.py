@@ -1,628 +1,601 @@
-from ortools.sat.python import cp_model
-import pandas as pd
+from collections import deque
+import heapq
+import itertools
 import random
-import calendar
-from datetime import datetime, timedelta
+import numpy as np
 from config import (
-    TEMP_SHIFT_PATH, YEAR, MONTH, DAYS_IN_MONTH, SHIFT_TYPES, NURSES, FULL_OFF_SHIFTS, HALF_OFF_SHIFTS, TARGET_REST_SCORE, is_japanese_holiday
+    TEMP_SHIFT_PATH, PERIOD, TARGET_REST_SCORE, REST_SPREAD, SATURDAY_WORKERS, CT_WORKERS, NO_OUTPATIENT_WORKERS
 )
+import artifact
+import instrument
+from period import WEEKDAY, HALF
+from optimize_cp import CT_SHIFTS, MAX_REST_STREAK, MAX_WORK_STREAK, OUTPATIENT_SHIFTS
+from schedule_matrix import CODE, EMPTY, FULL_OFF, OFF, REST_POINTS, WORK, ScheduleMatrix, code_mask
 
-# 夜勤を行うメンバー（夜勤明けは必ず×とする）
-YAKIN_WORKERS = ['樋渡', '中山', '川原田', '友枝', '奥平', '前野', '森園']
-
-start_date = datetime(YEAR, MONTH - 1, 21)
-dates = [start_date + timedelta(days=i) for i in range(DAYS_IN_MONTH)]
-weekday_list = [calendar.day_name[d.weekday()] for d in dates]
-
-# Load temp_shift produced by optimize_1.
-# We must keep the shift assignments written by optimize_1 intact.
-orig_df = pd.read_csv(TEMP_SHIFT_PATH, index_col=0)
-fixed_mask = orig_df.notna()  # True where the shift was pre-assigned
-df = orig_df.copy()
-days = [col for col in df.columns if col.startswith('day_')]
-nurse_names = df.index.tolist()
-date_cols = df.columns.tolist()
-
-model = cp_model.CpModel()
-
-# Soft制約：休みスコアが13に近づくように
-rest_score_vars = {}
-deviation_vars = {}
-for n in nurse_names:
-    rest_score_vars[n] = model.NewIntVar(0, 26, f"rest_score_{n}")
-    deviation_vars[n] = model.NewIntVar(0, 26, f"deviation_{n}")
-
-# 1. 初期化と休み数の把握
-initial_rest_score = {}
-for n in nurse_names:
-    score = 0
-    for d in date_cols:
-        shift = df.at[n, d]
-        if shift in FULL_OFF_SHIFTS:
-            score += 1
-        elif shift in HALF_OFF_SHIFTS:
-            score += 0.5
-    initial_rest_score[n] = score
-
-
-# 看護師ごとの現在の休みスコア（2点満点制）を初期化
-current_rest_score = {}
-for n in nurse_names:
-    score = 0
-    for d in date_cols:
-        shift = df.at[n, d]
-        if shift in FULL_OFF_SHIFTS:
-            score += 2
-        elif shift in HALF_OFF_SHIFTS:
-            score += 1
-    current_rest_score[n] = score
+FINAL_ARTIFACT_PATH = 'output/shift_final.npz'
+FINAL_SHIFT_PATH = 'output/shift_final.csv'
+SUMMARY_PATH = 'output/shift_summary.csv'
 
 # 休み制御用の優先度付き休みシフトリスト
 rest_shifts_priority = ['休', '休/', '/休']
 
 # 土曜担当メンバー
-土曜担当 = ['小嶋', '久保（千）', '田浦']
+土曜担当 = SATURDAY_WORKERS
+
+# 割り振り対象外（休み・夜勤・夜勤明け）
+BUSY = code_mask(['休', '休/', '/休', '夜', '×'])
+# 早日・残日に入れない
+FULL_DAY_FORBIDDEN = code_mask(['休', '休/', '/休', '×', '夜', '/訪'])
+
+REST, HALF_REST, NIGHT, CROSS = CODE['休'], CODE['休/'], CODE['夜'], CODE['×']
+
+CT = code_mask(CT_SHIFTS)
+OUTPATIENT = code_mask(OUTPATIENT_SHIFTS)
+
+
+def eligible_codes(nurses) -> np.ndarray:
+    """[看護師, シフトコード] で、その看護師が入れる勤務なら True。
+
+    CT・2・CT は CT_WORKERS のみ、外来・CT・早日・残日は NO_OUTPATIENT_WORKERS 以外、
+    久保は勤務なら CT・2・CT（土曜の2/は半休扱い）のみ（optimize_cp.ScheduleModel.candidates と同じ担当）。
+    """
+    eligible = np.ones((len(nurses), len(CODE)), dtype=bool)
+    for i, n in enumerate(nurses):
+        if n not in CT_WORKERS:
+            eligible[i] &= ~CT
+        if n in NO_OUTPATIENT_WORKERS:
+            eligible[i] &= ~OUTPATIENT
+        if n == '久保':
+            eligible[i] &= OFF | CT
+    return eligible
+
+
+def rest_totals(df):
+    """看護師ごとの休み合計（休=1, 半休=0.5）を返す。"""
+    m = ScheduleMatrix.from_frame(df)
+    return dict(zip(m.nurses, (m.rest_points() / 2).tolist()))
+
+
+def _pick(candidates, counts, rank):
+    """担当数が最小の看護師を選ぶ（同数の場合は名前順）。"""
+    return min(candidates, key=lambda i: (counts[i], rank[i]))
+
 
 # 休み割当用の関数
-def assign_rest_shifts(nurses, col):
+def assign_rest_shifts(m, nurses, d, target_rest_score=TARGET_REST_SCORE):
     """Assign rest shifts prioritizing nurses still lacking days off."""
     # 各看護師が目標休み数にどれだけ足りていないかを計算
-    need = {
-        n: TARGET_REST_SCORE * 2 - current_rest_score.get(n, 0)
-        for n in nurses
-    }
+    rest = m.counters.rest
+    need = {i: target_rest_score * 2 - rest[i] for i in nurses}
     # 休みが不足している順に並べる
-    sorted_nurses = sorted(nurses, key=lambda n: need[n], reverse=True)
-    for n in sorted_nurses:
-        if fixed_mask.at[n, col]:
+    sorted_nurses = sorted(nurses, key=lambda i: need[i], reverse=True)
+    for i in sorted_nurses:
+        if m.fixed[i, d]:
             continue  # don't overwrite pre-assigned shifts
-        remaining = need[n]
+        remaining = need[i]
         if remaining <= 0:
             continue
         if remaining >= 2:
-            df.at[n, col] = '休'
-            current_rest_score[n] += 2
+            m.set(i, d, REST)
+            instrument.count('greedy.rest_assigned')
         elif remaining >= 1:
-            df.at[n, col] = '休/'
-            current_rest_score[n] += 1
-
-
-def balance_rest_days():
-    """Simple post-process to even out total rest days."""
-    totals = {}
-    for n in nurse_names:
-        total = 0
-        for d in date_cols:
-            shift = df.at[n, d]
-            if shift in FULL_OFF_SHIFTS:
-                total += 1
-            elif shift in HALF_OFF_SHIFTS:
-                total += 0.5
-        totals[n] = total
-
-    # 偏りが多少残ってもよいので差が2以上の場合のみ調整
-    while max(totals.values()) - min(totals.values()) > 2:
-        high = max(totals, key=totals.get)
-        low = min(totals, key=totals.get)
-        moved = False
-        for idx, col in enumerate(date_cols):
-            high_shift = df.at[high, col]
-            low_shift = df.at[low, col]
-            if fixed_mask.at[high, col] or fixed_mask.at[low, col]:
-                continue  # keep original assignments intact
-            # 夜勤の翌日の×は動かさない
-            if (
-                high_shift == '×'
-                and idx > 0
-                and df.at[high, date_cols[idx - 1]] == '夜'
-            ):
-                continue
-            # 夜勤シフトの移動は行わない
-            if low_shift == '夜':
-                continue
-            if high_shift in FULL_OFF_SHIFTS and low_shift not in FULL_OFF_SHIFTS + HALF_OFF_SHIFTS:
-                df.at[high, col], df.at[low, col] = low_shift, '休'
-                totals[high] -= 1
-                totals[low] += 1
-                moved = True
+            m.set(i, d, HALF_REST)
+            instrument.count('greedy.half_rest_assigned')
+
+
+def balance_rest_days(m, spread=round(REST_SPREAD * 2)):
+    """休みスコアの最大と最小の差が spread（休=2, 半休=1。既定は config.REST_SPREAD）以下になるよう、同じ日の「休」と勤務を入れ替える。
+
+    看護師は休みスコアの最大・最小ヒープで管理し、「休」を渡せる日・受け取れる日を看護師ごとの
+    集合で持つので、入れ替え先を探すたびに全日を走査しない。休みの多い看護師から順に、休みの
+    少ない看護師との共通の日を探し、どの組でも差を縮められなくなったら終わる。
+    受け取れる日はシフトコードごとに分けて持ち、「休」を渡す看護師が入れる勤務（eligible_codes）の日だけ使う。
+    """
+    codes, fixed = m.codes, m.fixed
+    totals = m.counters.rest  # 休みスコア（休=2, 半休=1）
+    n_nurses = codes.shape[0]
+    after = np.zeros_like(fixed)
+    after[:, 1:] = (codes[:, 1:] == CROSS) & (codes[:, :-1] == NIGHT)
+    movable = ~fixed & ~after
+    eligible = eligible_codes(m.nurses)
+    # gives[i]: i の「休」を勤務と入れ替えられる日
+    # takes[i][c]: i の勤務 c を「休」にできる日（夜勤・×は動かさない）
+    gives = [set(np.flatnonzero(movable[i] & FULL_OFF[codes[i]]).tolist()) for i in range(n_nurses)]
+    takes = [{} for _ in range(n_nurses)]
+    for i, d in zip(*np.nonzero(movable & ~OFF[codes] & (codes != NIGHT) & (codes != CROSS))):
+        takes[i].setdefault(int(codes[i, d]), set()).add(int(d))
+
+    high = [(-int(t), i) for i, t in enumerate(totals)]
+    low = [(int(t), i) for i, t in enumerate(totals)]
+    heapq.heapify(high)
+    heapq.heapify(low)
+
+    def top(heap, sign):
+        while heap and sign * heap[0][0] != totals[heap[0][1]]:
+            heapq.heappop(heap)  # スコアが変わった古い要素
+        return heap[0][1] if heap else None
+
+    def partner(h):
+        """h から「休」を受け取って差が縮まる (看護師, 日)。休みの少ない看護師から順に探す。"""
+        popped, found = [], None
+        while (i := top(low, 1)) is not None and totals[h] - totals[i] > spread:
+            popped.append(heapq.heappop(low))
+            common = [d for c, days in takes[i].items() if eligible[h, c] for d in gives[h] & days]
+            if common:
+                found = (i, min(common))
                 break
-        if not moved:
+        for item in popped:
+            heapq.heappush(low, item)
+        return found
+
+    while n_nurses and totals[top(high, -1)] - totals[top(low, 1)] > spread:
+        instrument.count('repair.balance_rounds')
+        floor = totals[top(low, 1)]
+        tried, move = [], None
+        # 休みの多い順に、入れ替え先が見つかるまで試す
+        while (h := top(high, -1)) is not None and totals[h] - floor > spread:
+            heapq.heappop(high)
+            tried.append(h)
+            move = partner(h)
+            if move:
+                break
+        for i in tried:
+            heapq.heappush(high, (-int(totals[i]), i))
+        if not move:
+            instrument.count('repair.balance_unreachable')
+            break
+        l, d = move
+        h = tried[-1]
+        c = int(codes[l, d])
+        m.set(h, d, c)
+        m.set(l, d, REST)
+        gives[h].discard(d)
+        takes[h].setdefault(c, set()).add(d)
+        takes[l][c].discard(d)
+        gives[l].add(d)
+        for i in (h, l):
+            heapq.heappush(high, (-int(totals[i]), i))
+            heapq.heappush(low, (int(totals[i]), i))
+        instrument.count('repair.balance_moves')
+
+
+# 連続勤務・連続休みの解消で動かす休み（外来の半日などは動かさない）
+SWAPPABLE_REST = code_mask(rest_shifts_priority)
+# 1か所の解消で調べる入れ替え先の数（これで1人あたり O(日数) に収まる）
+SWAP_CANDIDATES = 16
+# 解消できなかった看護師を走査し直す回数（ほかの看護師の入れ替えで相手が見つかることがある）
+REPAIR_PASSES = 3
+
+
+def repair_streaks(m, max_work=MAX_WORK_STREAK, max_rest=MAX_REST_STREAK):
+    """max_work 日を超える連続勤務と max_rest 日を超える連続休みを、看護師ごとに1回の走査で解消する。
+
+    看護師 i の勤務日 a と休み b を入れ替え、a が休み・b が勤務の看護師 j とは同じ日のセルどうしを
+    交換するので、各日の配置と各看護師の休みスコアは変わらない（j は i の a の勤務に、i は j の b の
+    勤務に入れる看護師で、j の a と i の b は休みスコアが同じ休みに限る）。連続勤務で交換相手が
+    いないときは、a に休んでいて a の勤務に入れる看護師（休みの多い順）に勤務を渡す。
+    どれもできない連続は配置を崩さないようそのままにし、解消できなかった看護師だけ REPAIR_PASSES 回まで
+    走査し直す。固定セル・夜勤・夜勤明けの×は動かさない。入れ替え先の候補（長い連続勤務・連続休みの
+    中の日から順）は看護師ごとに前もって求めておく。
+
+    解消できなかった連続の (看護師, 日, 'work' / 'rest') のリストを返す（日は max を超えた日）。
+    """
+    night = m.codes == NIGHT
+    after = np.zeros_like(night)
+    after[:, 1:] = (m.codes[:, 1:] == CROSS) & night[:, :-1]
+    movable = ~m.fixed & ~night & ~after
+    eligible = eligible_codes(m.nurses)
+    rows, unresolved = range(m.shape[0]), []
+    for _ in range(REPAIR_PASSES):
+        unresolved = [u for i in rows for u in _repair_row(m, i, movable, eligible, max_work, max_rest)]
+        rows = sorted({i for i, _, _ in unresolved})
+        if not rows:
             break
+    instrument.count('repair.streak_unresolved', sum(kind == 'work' for _, _, kind in unresolved))
+    instrument.count('repair.rest_streak_unresolved', sum(kind == 'rest' for _, _, kind in unresolved))
+    return [(m.nurses[i], d, kind) for i, d, kind in unresolved]
+
+
+def _run_length(row, k, mask, limit):
+    """k を mask の値にしたときの k を含む連続日数（limit を超えたら打ち切る）。"""
+    length, j = 1, k - 1
+    while j >= 0 and mask[row[j]] and length <= limit:
+        length, j = length + 1, j - 1
+    j = k + 1
+    while j < len(row) and mask[row[j]] and length <= limit:
+        length, j = length + 1, j + 1
+    return length
+
+
+def _candidates(row, movable, mask):
+    """mask の日のうち動かせる日（含まれる連続日数が長い順。同じ長さなら早い日から）。"""
+    run = np.zeros(len(row), dtype=np.int64)
+    start = 0
+    for d in range(len(row) + 1):
+        if d == len(row) or not mask[row[d]]:
+            run[start:d] = d - start
+            start = d + 1
+    days = np.flatnonzero(movable & mask[row])
+    return deque(int(d) for d in days[np.argsort(-run[days], kind='stable')])
+
+
+def _partner(m, movable, eligible, i, a, b, max_work, max_rest):
+    """i の勤務日 a と休み b の入れ替えに付き合える看護師（a が休み・b が勤務。いなければ None）。"""
+    codes = m.codes
+    ok = (SWAPPABLE_REST[codes[:, a]] & (REST_POINTS[codes[:, a]] == REST_POINTS[codes[i, b]])
+          & WORK[codes[:, b]] & eligible[i, codes[:, b]] & eligible[:, codes[i, a]]
+          & movable[:, a] & movable[:, b])
+    ok[i] = False
+    for j in np.flatnonzero(ok):
+        if (_run_length(codes[j], a, WORK, max_work) <= max_work
+                and _run_length(codes[j], b, OFF, max_rest) <= max_rest):
+            return int(j)
+    return None
+
+
+def _exchange_first(m, movable, eligible, i, pairs, max_work, max_rest):
+    """pairs の (勤務日, 休み) を順に SWAP_CANDIDATES 組まで試し、入れ替えた組を返す（無ければ None）。
+
+    i と相手の看護師の a のセルどうし・b のセルどうしを交換する。
+    """
+    for a, b in itertools.islice(pairs, SWAP_CANDIDATES):
+        j = _partner(m, movable, eligible, i, a, b, max_work, max_rest)
+        if j is not None:
+            m.swap(i, a, j, a)
+            m.swap(i, b, j, b)
+            return a, b
+    return None
 
 
-def ensure_min_rest_days_balanced():
-    """各看護師にTARGET_REST_SCOREを満たすよう、出勤人数を考慮しながら「休」または半休を割り当てる"""
-
-    # 1. 各看護師の現在の休日日数
-    rest_totals = {}
-    for n in nurse_names:
-        total = 0
-        for d in date_cols:
-            shift = df.at[n, d]
-            if shift in FULL_OFF_SHIFTS:
-                total += 1
-            elif shift in HALF_OFF_SHIFTS:
-                total += 0.5
-        rest_totals[n] = total
-
-    # 2. 各日付の出勤者数を数える（休みでない人数）
-    work_count_per_day = {}
-    for d in date_cols:
-        count = 0
-        for n in nurse_names:
-            shift = df.at[n, d]
-            if shift not in FULL_OFF_SHIFTS + HALF_OFF_SHIFTS:
-                count += 1
-        work_count_per_day[d] = count
-
-    # 3. 出勤余裕がある日から順に並べる
-    sorted_days = sorted(date_cols, key=lambda d: work_count_per_day[d], reverse=True)
-
-    # 4. 看護師ごとに、必要休み数を満たすよう割り当て（半休含む）
-    for n in nurse_names:
-        while rest_totals[n] < TARGET_REST_SCORE:
-            inserted = False
-            for d in sorted_days:
-                if fixed_mask.at[n, d]:
-                    continue
-                shift = df.at[n, d]
-                if shift in FULL_OFF_SHIFTS + HALF_OFF_SHIFTS:
-                    continue
-                if shift != '' and not pd.isna(shift):
-                    continue
-                if shift == '×' and date_cols.index(d) > 0 and df.at[n, date_cols[date_cols.index(d)-1]] == '夜':
-                    continue
-                if work_count_per_day[d] > 7:
-                    # 残りスコアに応じて「休」または半休を割り当て
-                    remaining = TARGET_REST_SCORE - rest_totals[n]
-                    if remaining >= 1:
-                        df.at[n, d] = '休'
-                        rest_totals[n] += 1
-                        work_count_per_day[d] -= 1
-                        inserted = True
-                        break
-                    elif remaining >= 0.5:
-                        df.at[n, d] = '休/'  # 半休として割り当て
-                        rest_totals[n] += 0.5
-                        work_count_per_day[d] -= 1
-                        inserted = True
-                        break
-            if not inserted:
-                break
+def _hand_off(m, movable, eligible, i, days, max_work, max_rest):
+    """days（連続勤務の中の i の勤務日。後ろから）のどれかで、休んでいる看護師に i の勤務を渡す。
+
+    受け取るのは a の勤務に入れて連続勤務が max_work 日以内に収まり、渡したあとも休みスコアが
+    i 以上の看護師（休みの多い順）。渡した日を返す（無ければ None）。
+    """
+    codes, rest = m.codes, m.counters.rest
+    for a in reversed(days):
+        if _run_length(codes[i], a, OFF, max_rest) > max_rest:
+            continue
+        ok = (SWAPPABLE_REST[codes[:, a]] & movable[:, a] & eligible[:, codes[i, a]]
+              & (rest - REST_POINTS[codes[:, a]] >= rest[i]))
+        ok[i] = False
+        for j in sorted(np.flatnonzero(ok), key=lambda j: -rest[j]):
+            if _run_length(codes[j], a, WORK, max_work) <= max_work:
+                m.swap(i, a, j, a)
+                return a
+    return None
+
+
+def _live(candidates, row, mask):
+    """candidates のうち今も mask の日（先頭から続く、そうでなくなった日は取り除く）。"""
+    while candidates and not mask[row[candidates[0]]]:
+        candidates.popleft()
+    return (d for d in candidates if mask[row[d]])
+
+
+def _repair_row(m, i, movable, eligible, max_work, max_rest):
+    """i の行を1回走査して連続を解消し、解消できなかった (i, 日, 'work' / 'rest') のリストを返す。"""
+    row = m.codes[i]
+    rest_days = work_days = None  # 入れ替え先の候補（必要になったときに作る）
+    work = rest = 0
+    breakable = deque()  # 現在の連続勤務のうち休みにできる日
+    unresolved, failed = [], None  # failed: 解消できなかった連続勤務の初日
+    for d in range(len(row)):
+        if OFF[row[d]]:
+            rest, work = rest + 1, 0
+            breakable.clear()
+        else:
+            work, rest = work + 1, 0
+            if movable[i, d]:
+                breakable.append(d)
+        while breakable and breakable[0] < d - max_work:
+            breakable.popleft()  # 休みにしても残りが max_work 日を超える
+
+        if work > max_work and breakable:
+            if rest_days is None:
+                rest_days = _candidates(row, movable[i], SWAPPABLE_REST)
+            lo = d - work
+            pairs = ((a, b) for a in reversed(breakable)
+                     if _run_length(row, a, OFF, max_rest) <= max_rest
+                     for b in _live(rest_days, row, SWAPPABLE_REST)
+                     if not lo <= b <= d + 1 and _run_length(row, b, WORK, max_work) <= max_work)
+            done = _exchange_first(m, movable, eligible, i, pairs, max_work, max_rest)
+            if done:
+                a = done[0]
+                instrument.count('repair.streak_exchanges')
+            else:
+                a = _hand_off(m, movable, eligible, i, breakable, max_work, max_rest)
+                if a is not None:
+                    instrument.count('repair.streak_handoffs')
+            if a is None:
+                breakable.clear()  # この連続は配置を崩さずには解消できない
+            else:
+                while breakable and breakable[0] <= a:
+                    breakable.popleft()
+                work, rest = d - a, int(a == d)
+        if work > max_work and failed != d - work + 1:
+            failed = d - work + 1
+            unresolved.append((i, d, 'work'))
+
+        elif rest == max_rest + 1:  # 連続休みごとに1回だけ試す
+            if work_days is None:
+                work_days = _candidates(row, movable[i], WORK)
+            lo = d - rest
+            pairs = ((a, b) for b in range(d, max(lo + 1, d - max_rest), -1)
+                     if movable[i, b] and SWAPPABLE_REST[row[b]]
+                     for a in _live(work_days, row, WORK)
+                     if not lo <= a <= d + 1 and _run_length(row, a, OFF, max_rest) <= max_rest)
+            done = _exchange_first(m, movable, eligible, i, pairs, max_work, max_rest)
+            if done:
+                b = done[1]
+                if b == d:
+                    work, rest = 1, 0
+                    breakable.append(d)
+                else:
+                    rest = d - b
+                instrument.count('repair.rest_streak_exchanges')
+            else:
+                unresolved.append((i, d, 'rest'))
+    return unresolved
 
 
-# シフトカウント初期化（平日用）
-shift_names_weekday = ['1', '2', '3', '4', '早', '残', '〇', 'CT', '2・CT']
-shift_counts_weekday = {n: {s: 0 for s in shift_names_weekday} for n in nurse_names}
+def fill_shifts(orig_df, period=PERIOD, seed=0, target_rest_score=TARGET_REST_SCORE, rest_spread=REST_SPREAD):
+    """optimize_1 の結果（Strict 割当済み）を元に残りのシフトを割り振った DataFrame を返す。
 
-# シフトカウント初期化（土曜用）
-shift_names_saturday = ['1/', '2/', '3/', '4/', '早', '残', '〇']
-shift_counts_saturday = {n: {s: 0 for s in shift_names_saturday} for n in nurse_names}
+    optimize_1 で割り当て済みのセルは変更しない。seed は外来の割当順を決める乱数の種で、
+    同じ入力と seed からは同じシフト表になる。target_rest_score は休みを割り当てる目標、rest_spread は
+    後処理で許す看護師間の休みの差（どちらも休=1, 半休=0.5）。
+    """
+    m = ScheduleMatrix.from_frame(orig_df)  # fixed は割当済みのセル
+    fill_matrix(m, period, seed, target_rest_score, rest_spread)
+    return m.to_frame()
 
 
-# シフト割り振り
-for d, col in enumerate(date_cols):
-    weekday = weekday_list[d]
-    busy_shifts = ['休', '休/', '/休', '夜', '×']
+def fill_matrix(m, period=PERIOD, seed=0, target_rest_score=TARGET_REST_SCORE, rest_spread=REST_SPREAD):
+    """ScheduleMatrix 上で貪欲割り振りと後処理を行う（m を直接更新する）。"""
+    with instrument.stage('greedy_fill'):
+        assign_matrix(m, period, seed, target_rest_score)
+    with instrument.stage('repair'):
+        return repair_matrix(m, rest_spread)
 
-    # 2. 平日（月・火・水・金）の処理
-    if weekday in ['Monday', 'Tuesday', 'Wednesday', 'Friday'] and not is_japanese_holiday(dates[d]):
-        assigned_nurses = set()
-        available_nurses = [n for n in nurse_names if df.at[n, col] not in busy_shifts and not fixed_mask.at[n, col]]
 
-        n_to_assign = 8 if len(available_nurses) >= 8 else 7
+def assign_matrix(m, period=PERIOD, seed=0, target_rest_score=TARGET_REST_SCORE):
+    """日程ごとの貪欲割り振り。残った空欄は「休」にする（m を直接更新する）。
 
-        # CT, 2・CT 割り当て
-        if n_to_assign == 8:
-            if '久保' in available_nurses:
-                df.at['久保', col] = 'CT'
-                shift_counts_weekday['久保']['CT'] += 1
-                assigned_nurses.add('久保')
-            else:
-                candidates = [n for n in ['三好', '前野'] if n in available_nurses]
-                if candidates:
-                    min_count = min(shift_counts_weekday[n]['CT'] for n in candidates)
-                    assign = min([n for n in candidates if shift_counts_weekday[n]['CT'] == min_count])
-                    df.at[assign, col] = 'CT'
-                    shift_counts_weekday[assign]['CT'] += 1
-                    assigned_nurses.add(assign)
-        else: # 7人しか割り振れない時
-            if '久保' in available_nurses:
-                df.at['久保', col] = '2・CT'
-                shift_counts_weekday['久保']['2・CT'] += 1
-                assigned_nurses.add('久保')
+    外来の割当順は seed を種にした乱数で決める。
+    """
+    rng = random.Random(seed)
+    codes, fixed = m.codes, m.fixed
+    n_nurses, days = codes.shape
+    nurse_names = m.nurses
+    # 同数の候補は名前順で選ぶ
+    rank = {i: r for r, i in enumerate(sorted(range(n_nurses), key=lambda i: nurse_names[i]))}
+
+    def idx(names):
+        return [m.index[n] for n in names if n in m.index]
+
+    kubo = m.index.get('久保')
+    gai_team = idx(土曜担当)
+    ct_team = [i for i in idx(CT_WORKERS) if i != kubo]
+    no_outpatient = set(idx(NO_OUTPATIENT_WORKERS))
+
+    # シフトカウント初期化（平日用・土曜用）: [看護師, シフトコード]
+    shift_counts_weekday = np.zeros((n_nurses, len(CODE)), dtype=np.int64)
+    shift_counts_saturday = np.zeros((n_nurses, len(CODE)), dtype=np.int64)
+
+    def assign(i, d, s, counts=None):
+        m.set(i, d, CODE[s])
+        if counts is not None:
+            counts[i, CODE[s]] += 1
+
+    def empty_unfixed(d):
+        return [i for i in range(n_nurses) if codes[i, d] == EMPTY and not fixed[i, d]]
+
+    # シフト割り振り
+    for d in range(days):
+        day_type = period.day_types[d]
+
+        # 2. 平日（月・火・水・金、祝日を除く）の処理
+        if day_type == WEEKDAY:
+            assigned_nurses = set()
+            available_nurses = [i for i in range(n_nurses) if not BUSY[codes[i, d]] and not fixed[i, d]]
+
+            n_to_assign = 8 if len(available_nurses) >= 8 else 7
+
+            # CT, 2・CT 割り当て（8人以上ならCT、7人しか割り振れない時は2・CT）
+            ct = 'CT' if n_to_assign == 8 else '2・CT'
+            if kubo in available_nurses:
+                assign(kubo, d, ct, shift_counts_weekday)
+                assigned_nurses.add(kubo)
             else:
-                candidates = [n for n in ['三好', '前野'] if n in available_nurses]
+                candidates = [i for i in ct_team if i in available_nurses]
                 if candidates:
-                    min_count = min(shift_counts_weekday[n]['2・CT'] for n in candidates)
-                    assign = min([n for n in candidates if shift_counts_weekday[n]['2・CT'] == min_count])
-                    df.at[assign, col] = '2・CT'
-                    shift_counts_weekday[assign]['2・CT'] += 1
-                    assigned_nurses.add(assign)
-
-        # 8人以上割り当てれる時
-        # 「小嶋」「久保（千）」「田浦」が「1」「2」「3」「4」を均等に割り当てる
-        if n_to_assign == 8:
-            gai_shift = random.sample(['1', '2', '3', '4'], k=4)
-            gai_members = [n for n in 土曜担当 if n in available_nurses]
+                    a = _pick(candidates, shift_counts_weekday[:, CODE[ct]], rank)
+                    assign(a, d, ct, shift_counts_weekday)
+                    assigned_nurses.add(a)
+
+            # 「小嶋」「久保（千）」「田浦」が外来（8人なら1〜4、7人なら1・3・4）を均等に割り当てる
+            gai_codes = ['1', '2', '3', '4'] if n_to_assign == 8 else ['1', '3', '4']
+            gai_shift = rng.sample(gai_codes, k=len(gai_codes))
+            gai_members = [i for i in gai_team if i in available_nurses]
             assigned_gai = set()
             for s in gai_shift:
-                # 各シフトごとの担当数が最小の人を選ぶ
-                if gai_members:
-                    count_dict = {n: shift_counts_weekday[n][s] for n in gai_members if n not in assigned_gai}
-                    if count_dict:
-                        min_count = min(count_dict.values())
-                        candidates = [n for n, c in count_dict.items() if c == min_count]
-                        assign = sorted(candidates)[0]  # 複数候補がいる場合は名前順で決定
-                        df.at[assign, col] = s
-                        shift_counts_weekday[assign][s] += 1
-                        assigned_nurses.add(assign)
-                        assigned_gai.add(assign)
-
-            # 残り外来を他から均等割り
-            remain = 4 - len(gai_members)
-            if remain > 0:
-                other_candidates = [
-                    n
-                    for n in available_nurses
-                    if n not in assigned_nurses
-                    and n != '御書'
-                    and not fixed_mask.at[n, col]
-                ]  # 御書は外来に入らない
-                for s in gai_shift[len(gai_members):]:
-                    if other_candidates:
-                        min_count = min(shift_counts_weekday[n][s] for n in other_candidates)
-                        assign = min([n for n in other_candidates if shift_counts_weekday[n][s] == min_count])
-                        df.at[assign, col] = s
-                        shift_counts_weekday[assign][s] += 1
-                        assigned_nurses.add(assign)
-                        other_candidates.remove(assign)
-
-        else: # 7人しか割り振れない時
-            gai_shift = random.sample(['1', '3', '4'], k=3)
-            gai_members = [n for n in 土曜担当 if n in available_nurses]
-            assigned_gai = set()
-            for s in gai_shift:
-                # 各シフトごとの担当数が最小の人を選ぶ
-                if gai_members:
-                    count_dict = {n: shift_counts_weekday[n][s] for n in gai_members if n not in assigned_gai}
-                    if count_dict:
-                        min_count = min(count_dict.values())
-                        candidates = [n for n, c in count_dict.items() if c == min_count]
-                        assign = sorted(candidates)[0]  # 複数候補がいる場合は名前順で決定
-                        df.at[assign, col] = s
-                        shift_counts_weekday[assign][s] += 1
-                        assigned_nurses.add(assign)
-                        assigned_gai.add(assign)
-
-            # 残り外来を他から均等割り
-            remain = 3 - len(gai_members)
-            if remain > 0:
-                other_candidates = [
-                    n
-                    for n in available_nurses
-                    if n not in assigned_nurses
-                    and n != '御書'
-                    and not fixed_mask.at[n, col]
-                ]  # 御書は外来に入らない
-                for s in gai_shift[len(gai_members):]:
-                    if other_candidates:
-                        min_count = min(shift_counts_weekday[n][s] for n in other_candidates)
-                        assign = min([n for n in other_candidates if shift_counts_weekday[n][s] == min_count])
-                        df.at[assign, col] = s
-                        shift_counts_weekday[assign][s] += 1
-                        assigned_nurses.add(assign)
-                        other_candidates.remove(assign)
-
-
-        # 病棟シフト（早・残・〇）
-        byoto_shifts = ['早', '残', '〇']
-        remain_candidates = [n for n in available_nurses if n not in assigned_nurses]
-        for s in byoto_shifts:
-            if remain_candidates:
-                min_count = min(shift_counts_weekday[n][s] for n in remain_candidates)
-                assign = min([n for n in remain_candidates if shift_counts_weekday[n][s] == min_count])
-                df.at[assign, col] = s
-                shift_counts_weekday[assign][s] += 1
-                assigned_nurses.add(assign)
-                remain_candidates.remove(assign)
-
-        # 休み割り振り（残った人）
-        remain_nurses = [
-            n
-            for n in nurse_names
-            if (df.at[n, col] == '' or pd.isna(df.at[n, col]))
-            and n in available_nurses
-            and not fixed_mask.at[n, col]
-        ]
-        assign_rest_shifts(remain_nurses, col)
-
-    # 3. 木曜・日曜（B日程）の処理
-    elif weekday in ['Thursday', 'Sunday'] or is_japanese_holiday(dates[d]):
-        forbidden_shifts = ['休', '休/', '/休', '×', '夜', '/訪']
-        candidates = [
-            n
-            for n in nurse_names
-            if df.at[n, col] not in forbidden_shifts and not fixed_mask.at[n, col]
-        ]
-
-        # 「早日」「残日」を1人ずつ均等割当
-        early_counts = {n: (df == '早日').loc[n].sum() for n in candidates}
-        min_early = min(early_counts.values()) if early_counts else 0
-        candidates_early = [n for n in candidates if early_counts[n] == min_early]
-
-        if candidates_early:
-            assign_early = sorted(candidates_early)[0]
-            df.at[assign_early, col] = '早日'
-
-        late_counts = {n: (df == '残日').loc[n].sum() for n in candidates if n != assign_early}
-        min_late = min(late_counts.values()) if late_counts else 0
-        candidates_late = [n for n in late_counts if late_counts[n] == min_late]
-        if candidates_late:
-            assign_late = sorted(candidates_late)[0]
-            df.at[assign_late, col] = '残日'
-
-        # 残りの人は休みスコアに基づき割当
-        rest_candidates = [
-            n
-            for n in candidates
-            if df.at[n, col] not in ['早日', '残日'] and not fixed_mask.at[n, col]
-        ]
-        assign_rest_shifts(rest_candidates, col)
-
-        # 他の看護師で空白の人には休み割当優先度付きで割当
-        remain_nurses = [
-            n
-            for n in nurse_names
-            if (df.at[n, col] == '' or pd.isna(df.at[n, col]))
-            and df.at[n, col] not in busy_shifts
-            and not fixed_mask.at[n, col]
-        ]
-        assign_rest_shifts(remain_nurses, col)
-
-    # 4. 土曜（C日程）の処理
-    elif weekday == 'Saturday':
-        assigned_nurses = set()
-        busy_shifts = ['休', '休/', '/休', '×', '夜']
-
-        # 「久保」が出勤の場合、「2/」優先
-        if '久保' in nurse_names and df.at['久保', col] not in busy_shifts:
-            df.at['久保', col] = '2/'
-            shift_counts_saturday['久保']['2/'] += 1
-            assigned_nurses.add('久保')
-            gai_shift = random.sample(['1/', '3/', '4/'], k=3)
-            for s, nurse in zip(gai_shift, 土曜担当): # 「小嶋」「久保（千）」「田浦」から優先に外来「1/」「3/」「4/」に入る
-                if nurse in nurse_names and df.at[nurse, col] not in busy_shifts and not fixed_mask.at[nurse, col]:
-                    df.at[nurse, col] = s
-                    shift_counts_saturday[nurse][s] += 1
-                    assigned_nurses.add(nurse)
-                else:
-                    candidates = [
-                        n
-                        for n in nurse_names
-                        if n not in assigned_nurses
-                        and n not in 土曜担当
-                        and df.at[n, col] not in busy_shifts
-                        and n != '御書'
-                        and not fixed_mask.at[n, col]
-                    ]  # 御書は外来に入らない
-                    if candidates:
-                        min_count = min(shift_counts_saturday[n][s] for n in candidates)
-                        assign = min([n for n in candidates if shift_counts_saturday[n][s] == min_count])
-                        df.at[assign, col] = s
-                        shift_counts_saturday[assign][s] += 1
-                        assigned_nurses.add(assign)
-            
-        # 「久保」が休みの場合
-        else: 
-            # 外来は土曜担当から優先
-            gai_shift = random.sample(['1/', '2/', '3/', '4/'], k=4)
-            for s, nurse in zip(gai_shift, 土曜担当):
-                # 「小嶋」「久保（千）」「田浦」から優先に外来「1/」「2/」「3/」「4/」に入る
-                if nurse in nurse_names and df.at[nurse, col] not in busy_shifts and not fixed_mask.at[nurse, col]:
-                    df.at[nurse, col] = s
-                    shift_counts_saturday[nurse][s] += 1
-                    assigned_nurses.add(nurse)
-                else:
-                    candidates = [
-                        n
-                        for n in nurse_names
-                        if n not in assigned_nurses
-                        and n not in 土曜担当
-                        and df.at[n, col] not in busy_shifts
-                        and n != '御書'
-                        and not fixed_mask.at[n, col]
-                    ]  # 御書は外来に入らない
-                    if candidates:
-                        min_count = min(shift_counts_saturday[n][s] for n in candidates)
-                        assign = min([n for n in candidates if shift_counts_saturday[n][s] == min_count])
-                        df.at[assign, col] = s
-                        shift_counts_saturday[assign][s] += 1
-                        assigned_nurses.add(assign)
-
-            # 残り外来を他から均等割り
-            gai_members = [n for n in 土曜担当 if n in assigned_nurses]
-            remain = 4 - len(gai_members)
-            if remain > 0:
+                # 各シフトごとの担当数が最小の人を選ぶ（複数候補がいる場合は名前順で決定）
+                candidates = [i for i in gai_members if i not in assigned_gai]
+                if candidates:
+                    a = _pick(candidates, shift_counts_weekday[:, CODE[s]], rank)
+                    assign(a, d, s, shift_counts_weekday)
+                    assigned_nurses.add(a)
+                    assigned_gai.add(a)
+
+            # 残り外来を他から均等割り（御書は外来に入らない）
+            if len(gai_codes) - len(gai_members) > 0:
                 other_candidates = [
-                    n
-                    for n in nurse_names
-                    if n not in assigned_nurses
-                    and n != '御書'
-                    and not fixed_mask.at[n, col]
-                ]  # 御書は外来に入らない
+                    i for i in available_nurses
+                    if i not in assigned_nurses and i not in no_outpatient and not fixed[i, d]
+                ]
                 for s in gai_shift[len(gai_members):]:
                     if other_candidates:
-                        min_count = min(shift_counts_saturday[n][s] for n in other_candidates)
-                        assign = min([n for n in other_candidates if shift_counts_saturday[n][s] == min_count])
-                        df.at[assign, col] = s
-                        shift_counts_saturday[assign][s] += 1
-                        assigned_nurses.add(assign)
-                        other_candidates.remove(assign)
-
-        # 病棟シフト（早、残、〇）
-        病棟シフト = ['早', '残', '〇']
-        candidates = [
-            n
-            for n in nurse_names
-            if n not in assigned_nurses
-            and df.at[n, col] not in busy_shifts
-            and not fixed_mask.at[n, col]
-        ]
-        for s in 病棟シフト:
-            if candidates:
-                count_dict = {n: (df.loc[n] == s).sum() for n in candidates}
-                min_count = min(count_dict[n] for n in candidates)
-                assign = min([n for n in candidates if count_dict[n] == min_count])
-                df.at[assign, col] = s
-                assigned_nurses.add(assign)
-                candidates.remove(assign)
-
-        # 休み割り振り（休み不足が多い人から優先）
-        remain_nurses = [
-            n
-            for n in nurse_names
-            if (df.at[n, col] == '' or pd.isna(df.at[n, col]))
-            and df.at[n, col] not in busy_shifts
-            and not fixed_mask.at[n, col]
-        ]
-        assign_rest_shifts(remain_nurses, col)
-
-    # その他の日は特に処理なし
-    else:
-        # 休み割当が必要な場合は割当
-        remain_nurses = [
-            n
-            for n in nurse_names
-            if (df.at[n, col] == '' or pd.isna(df.at[n, col]))
-            and df.at[n, col] not in busy_shifts
-            and not fixed_mask.at[n, col]
-        ]
-        assign_rest_shifts(remain_nurses, col)
-
-# 最終的に空白やNaNのシフトは「休」に置換（休み割当不可の人も含む）
-for d, col in enumerate(date_cols):
-    for n in nurse_names:
-        if df.at[n, col] == '' or pd.isna(df.at[n, col]):
-            df.at[n, col] = '休'
-
-balance_rest_days()
-
-
-def prevent_seven_day_streaks():
-    """Ensure nobody works 7 days in a row by inserting rest days."""
-    off_codes = FULL_OFF_SHIFTS + HALF_OFF_SHIFTS
-    for n in nurse_names:
-        streak = 0
-        for i, col in enumerate(date_cols):
-            shift = df.at[n, col]
-            if shift in off_codes:
-                streak = 0
-                continue
-
-            streak += 1
-            if streak >= 7:
-                # Try to change one of the last 7 days to a rest day
-                changed = False
-                for j in range(i, i - 7, -1):
-                    col_j = date_cols[j]
-                    shift_j = df.at[n, col_j]
-                    if fixed_mask.at[n, col_j]:
-                        continue
-                    # Do not modify night shift or the x immediately after it
-                    if shift_j == "夜":
-                        continue
-                    if (
-                        shift_j == "×"
-                        and j > 0
-                        and df.at[n, date_cols[j - 1]] == "夜"
-                    ):
-                        continue
-                    df.at[n, col_j] = "休"
-                    changed = True
-                    streak = 0
-                    break
-
-                if not changed and not fixed_mask.at[n, col] and shift != "夜":
-                    df.at[n, col] = "休"
-                    streak = 0
-
-
-def prevent_four_day_rest_streaks():
-    """
-    休みが4日連続した場合、固定されていない休みを他の勤務日と入れ替えて休みを分散させる。
-    入れ替え候補が見つからなければ、何も変更せずそのままにする。
-    """
-    off_codes = FULL_OFF_SHIFTS + HALF_OFF_SHIFTS
-    for n in nurse_names:
-        streak = 0
-        for i, col in enumerate(date_cols):
-            shift = df.at[n, col]
-            if shift in off_codes:
-                streak += 1
-                if streak >= 4:
-                    swapped = False
-                    # 直近4日の休みのうち、固定されていない休みを探す
-                    for j in range(i, i - 4, -1):
-                        col_j = date_cols[j]
-                        shift_j = df.at[n, col_j]
-                        if fixed_mask.at[n, col_j] or shift_j not in off_codes:
-                            continue
-                        # 連続休み期間以外から勤務日を探して入れ替える
-                        for k, col_k in enumerate(date_cols):
-                            if i - 3 <= k <= i:
-                                continue  # 連続休みの範囲は除外
-                            shift_k = df.at[n, col_k]
-                            if fixed_mask.at[n, col_k]:
-                                continue
-                            if shift_k in off_codes:
-                                continue
-                            if shift_k == '夜':
-                                continue
-                            if shift_k == '×' and k > 0 and df.at[n, date_cols[k-1]] == '夜':
-                                continue
-                            # 入れ替え実行
-                            df.at[n, col_j], df.at[n, col_k] = df.at[n, col_k], df.at[n, col_j]
-                            swapped = True
-                            streak = 0
-                            break
-                        if swapped:
-                            break
-                    # 入れ替え候補が見つからない場合は、何も変更せずそのままにする
-                    if not swapped:
-                        streak = 0  # 連続カウントだけリセットして次へ
+                        a = _pick(other_candidates, shift_counts_weekday[:, CODE[s]], rank)
+                        assign(a, d, s, shift_counts_weekday)
+                        assigned_nurses.add(a)
+                        other_candidates.remove(a)
+
+            # 病棟シフト（早・残・〇）
+            remain_candidates = [i for i in available_nurses if i not in assigned_nurses]
+            for s in ['早', '残', '〇']:
+                if remain_candidates:
+                    a = _pick(remain_candidates, shift_counts_weekday[:, CODE[s]], rank)
+                    assign(a, d, s, shift_counts_weekday)
+                    assigned_nurses.add(a)
+                    remain_candidates.remove(a)
+
+            # 休み割り振り（残った人）
+            available = set(available_nurses)
+            remain_nurses = [i for i in empty_unfixed(d) if i in available]
+            assign_rest_shifts(m, remain_nurses, d, target_rest_score)
+
+        # 3. 木曜・日曜・祝日（B日程）の処理
+        elif period.is_full(d):
+            candidates = [i for i in range(n_nurses) if not FULL_DAY_FORBIDDEN[codes[i, d]] and not fixed[i, d]]
+            duty_candidates = [i for i in candidates if i not in no_outpatient]  # 御書は早日・残日に入らない
+
+            # 「早日」「残日」を1人ずつ均等割当
+            assign_early = None
+            if duty_candidates:
+                assign_early = _pick(duty_candidates, m.counters.by_code[:, CODE['早日']], rank)
+                assign(assign_early, d, '早日')
+
+            late_candidates = [i for i in duty_candidates if i != assign_early]
+            if late_candidates:
+                assign(_pick(late_candidates, m.counters.by_code[:, CODE['残日']], rank), d, '残日')
+
+            # 残りの人は休みスコアに基づき割当
+            rest_candidates = [
+                i for i in candidates
+                if codes[i, d] not in (CODE['早日'], CODE['残日']) and not fixed[i, d]
+            ]
+            assign_rest_shifts(m, rest_candidates, d, target_rest_score)
+
+            # 他の看護師で空白の人には休み割当優先度付きで割当
+            assign_rest_shifts(m, empty_unfixed(d), d, target_rest_score)
+
+        # 4. 土曜（C日程）の処理
+        elif day_type == HALF:
+            assigned_nurses = set()
+
+            def assign_saturday_outpatient(gai_shift):
+                # 「小嶋」「久保（千）」「田浦」から優先に外来に入る
+                for s, nurse in zip(gai_shift, 土曜担当):
+                    i = m.index.get(nurse)
+                    if i is not None and not BUSY[codes[i, d]] and not fixed[i, d]:
+                        assign(i, d, s, shift_counts_saturday)
+                        assigned_nurses.add(i)
+                    else:
+                        candidates = [
+                            j for j in range(n_nurses)
+                            if j not in assigned_nurses
+                            and j not in gai_team
+                            and not BUSY[codes[j, d]]
+                            and j not in no_outpatient
+                            and not fixed[j, d]
+                        ]  # 御書は外来に入らない
+                        if candidates:
+                            a = _pick(candidates, shift_counts_saturday[:, CODE[s]], rank)
+                            assign(a, d, s, shift_counts_saturday)
+                            assigned_nurses.add(a)
+
+            # 「久保」が出勤の場合、「2/」優先
+            if kubo is not None and not BUSY[codes[kubo, d]]:
+                assign(kubo, d, '2/', shift_counts_saturday)
+                assigned_nurses.add(kubo)
+                assign_saturday_outpatient(rng.sample(['1/', '3/', '4/'], k=3))
+
+            # 「久保」が休みの場合
             else:
-                # 勤務日なら連続休みカウントをリセット
-                streak = 0
-
-
-# 7日連続勤務を防止
-prevent_seven_day_streaks()
-# 4日連続休みを防止
-# prevent_four_day_rest_streaks()
-# 休み数を均等化
-ensure_min_rest_days_balanced()
-
-
- # 出力前に 1〜4 を整数に変換（Excelで数値認識させるため）
-for d in date_cols:
-    df[d] = df[d].apply(lambda x: int(x) if x in ['1', '2', '3', '4'] else x)
-
-df.to_csv("output/shift_final.csv", encoding="utf-8-sig")
-print("✅ シフト割り振りを実施し、shift_final.csv に保存しました。")
-
-# 各看護師の休み合計数を列として追加して保存
-df_with_rest_col = df.copy()
-rest_col = []
-for n in nurse_names:
-    total_rest = 0
-    for d in date_cols:
-        shift = df.at[n, d]
-        if shift in FULL_OFF_SHIFTS:
-            total_rest += 1
-        elif shift in HALF_OFF_SHIFTS:
-            total_rest += 0.5
-    rest_col.append(total_rest)
-df_with_rest_col['休み合計'] = rest_col
-df_with_rest_col.to_csv("output/shift_summary.csv", encoding="utf-8-sig")
-print("✅ 休み合計列付きのシフトCSVを shift_summary.csv に保存しました。")
\ No newline at end of file
+                # 外来は土曜担当から優先
+                gai_shift = rng.sample(['1/', '2/', '3/', '4/'], k=4)
+                assign_saturday_outpatient(gai_shift)
+
+                # 残り外来を他から均等割り
+                gai_members = [i for i in gai_team if i in assigned_nurses]
+                if 4 - len(gai_members) > 0:
+                    other_candidates = [
+                        i for i in range(n_nurses)
+                        if i not in assigned_nurses and i not in no_outpatient and not fixed[i, d]
+                    ]  # 御書は外来に入らない
+                    for s in gai_shift[len(gai_members):]:
+                        if other_candidates:
+                            a = _pick(other_candidates, shift_counts_saturday[:, CODE[s]], rank)
+                            assign(a, d, s, shift_counts_saturday)
+                            assigned_nurses.add(a)
+                            other_candidates.remove(a)
+
+            # 病棟シフト（早、残、〇）
+            candidates = [
+                i for i in range(n_nurses)
+                if i not in assigned_nurses and not BUSY[codes[i, d]] and not fixed[i, d]
+            ]
+            for s in ['早', '残', '〇']:
+                if candidates:
+                    a = _pick(candidates, m.counters.by_code[:, CODE[s]], rank)
+                    assign(a, d, s)
+                    assigned_nurses.add(a)
+                    candidates.remove(a)
+
+            # 休み割り振り（休み不足が多い人から優先）
+            assign_rest_shifts(m, empty_unfixed(d), d, target_rest_score)
+
+        # その他の日は特に処理なし
+        else:
+            # 休み割当が必要な場合は割当
+            assign_rest_shifts(m, empty_unfixed(d), d, target_rest_score)
+
+    # 最終的に空白のシフトは「休」に置換（休み割当不可の人も含む）
+    if instrument.enabled():
+        instrument.count('greedy.empty_to_rest', int((m.codes == EMPTY).sum()))
+    m.fill_empty(REST)
+    return m
+
+
+def repair_matrix(m, rest_spread=REST_SPREAD):
+    """割り振り後の後処理（休みの均等化・連続勤務と連続休みの解消）。rest_spread は許す休みの差（休=1）。"""
+    with instrument.stage('balance_rest_days'):
+        balance_rest_days(m, round(rest_spread * 2))
+    # 7日連続勤務・4日連続休みを防止
+    with instrument.stage('repair_streaks'):
+        repair_streaks(m)
+    return m
+
+
+def to_output_frame(df):
+    """出力前に 1〜4 を整数に変換（Excelで数値認識させるため）"""
+    out = df.copy()
+    for d in out.columns:
+        out[d] = out[d].apply(lambda x: int(x) if x in ['1', '2', '3', '4'] else x)
+    return out
+
+
+def summarize(df):
+    """各看護師の休み合計数を列として追加した DataFrame を返す。"""
+    df_with_rest_col = df.copy()
+    totals = rest_totals(df)
+    df_with_rest_col['休み合計'] = [totals[n] for n in df.index]
+    return df_with_rest_col
+
+
+if __name__ == '__main__':
+    # Load temp_shift produced by optimize_1.
+    # We must keep the shift assignments written by optimize_1 intact (fixed mask).
+    m = artifact.load(TEMP_SHIFT_PATH)
+    fill_matrix(m)
+    artifact.save(FINAL_ARTIFACT_PATH, m)
+    print(f"✅ シフト割り振りを実施し、{FINAL_ARTIFACT_PATH} に保存しました。")
+
+    df = to_output_frame(m.to_frame())
+    df.to_csv(FINAL_SHIFT_PATH, encoding="utf-8-sig")
+    print("✅ CSV を shift_final.csv に出力しました。")
+
+    summarize(df).to_csv(SUMMARY_PATH, encoding="utf-8-sig")
+    print("✅ 休み合計列付きのシフトCSVを shift_summary.csv に保存しました。")
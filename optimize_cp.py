@@ -0,0 +1,513 @@
+"""Strict 制約・日程ごとの配置・休み目標・連続勤務を1つの CP-SAT モデルで解く。
+
+optimize_1（Strict のみ）→ optimize_2（貪欲割り振りと後処理）の2段階に代わり、
+tests/test_shift_summary.py で確認しているルールを制約として持ち、
+休みスコアや日勤当番の偏りを目的関数で直接最小化する。
+"""
+from ortools.sat.python import cp_model
+import pandas as pd
+
+from config import (
+    SHIFT_TYPES, HOLIDAY_NO_WORKERS, YAKIN_WORKERS,
+    SATURDAY_WORKERS, CT_WORKERS, NO_OUTPATIENT_WORKERS, FULL_OFF_SHIFTS, HALF_OFF_SHIFTS,
+    TARGET_REST_SCORE, default_config,
+)
+from domains import build_domains
+from period import WEEKDAY, HALF
+from request_index import as_request_index
+from hints import add_hints, hint_report
+import instrument
+from solver_params import SolverParams, run_solver
+
+OFF_SHIFTS = FULL_OFF_SHIFTS + HALF_OFF_SHIFTS
+OFF_SET = set(OFF_SHIFTS)
+REST_OFF_SHIFTS = ['休', '休/', '/休']  # 勤務の無い休み（外来半日は含まない）
+
+# 平日（A日程）の配置。8人体制と7人体制（2・CT）のどちらか
+WEEKDAY_FULL_CREW = ['1', '2', '3', '4', 'CT', '早', '残', '〇']
+WEEKDAY_SHORT_CREW = ['1', '3', '4', '2・CT', '早', '残', '〇']
+# 木・日・祝（B日程）の配置
+FULL_DAY_CREW = ['早日', '残日']
+# 土曜（C日程）の配置
+SATURDAY_CREW = ['1/', '2/', '3/', '4/', '早', '残', '〇']
+
+OUTPATIENT_SHIFTS = ['1', '2', '3', '4', 'CT', '2・CT', '1/', '2/', '3/', '4/', '早日', '残日']
+CT_SHIFTS = ['CT', '2・CT']
+
+# 日種別ごとに存在するシフト（夜勤・夜勤明け・休みはどの日にもある）
+_COMMON_SHIFTS = ['夜', '×'] + REST_OFF_SHIFTS
+DAY_TYPE_SHIFTS = {
+    WEEKDAY: set(WEEKDAY_FULL_CREW + WEEKDAY_SHORT_CREW + _COMMON_SHIFTS),
+    HALF: set(SATURDAY_CREW + _COMMON_SHIFTS),
+}
+FULL_DAY_SHIFTS = set(FULL_DAY_CREW + _COMMON_SHIFTS + ['/訪'])
+
+# 平日の体制（None: 8人体制を優先し、揃わない日のみ7人体制）
+WEEKDAY_CREW_SIZES = (None, 7, 8)
+
+# 変数の表し方
+#   bool : x[n, d, s] の BoolVar と AddExactlyOne、夜→× と連続勤務は線形制約
+#   table: y[n, d] をシフトコードの IntVar とし、夜→× と連続勤務を看護師ごとに1つの AddAutomaton で表す。
+#          x[n, d, s] は目的関数・体制の集計に使うシフト（×以外）だけ作り、y と線形式1本で対応付ける
+ENCODINGS = ('bool', 'table')
+SHIFT_CODE = {s: i + 1 for i, s in enumerate(SHIFT_TYPES)}  # schedule_matrix.CODE と同じ（0は未割当）
+TABLE_IMPLIED_SHIFTS = ('×',)  # table では x を作らない（y の値と automaton で決まる）
+
+MAX_WORK_STREAK = 6  # 7日連続勤務は禁止
+MAX_REST_STREAK = 3  # 4日連続休みはペナルティ
+
+# 目的関数の重み
+W_REST_SHORTFALL = 1000
+W_SHORT_CREW = 1000
+W_REST_SPREAD = 20
+W_REST_STREAK = 5
+W_DUTY_SPREAD = 2
+W_OUTPATIENT_SPREAD = 1
+W_HALF_REST = 3
+W_NIGHT_SPREAD = 2  # 前期間からの累計の夜勤回数の偏り（boundary を渡したときのみ）
+W_NIGHT_QUOTA = 200  # 夜勤回数の上下限からの超過1回（strict_nights=False のときのみ）
+
+
+class ScheduleModel:
+    """1期間分のシフト表を表す CP-SAT モデル。
+
+    x[n, d, s] は看護師 n が d 日目にシフト s に入るかどうか。
+    strict_rest=True のときは休みスコアの目標を必須制約とする（探索が速い）。
+    strict_nights=False のときは看護師ごとの夜勤回数の上下限をペナルティにする（replan で使う）。
+    yakin_workers は夜勤メンバー（省略時は config.YAKIN_WORKERS）、
+    weekday_crew は平日の体制（7 / 8 で固定。None なら8人体制優先）。
+    encoding は変数の表し方（ENCODINGS を参照）。
+    symmetry=True のときは入れ替えても同じになる看護師の組に辞書式順序の制約を加える
+    （見つかった組は self.symmetry_classes）。
+    boundary（boundary.BoundaryState）を渡すと前期間の末尾の夜勤・連続日数・累計回数を引き継ぐ。
+    splits は複数の期間をまとめた period を期間ごとに区切る日のインデックスで、
+    休みスコアの目標と夜勤回数の上下限を区切った期間ごとに課す（rolling の2期間のモデルで使う）。
+    """
+
+    def __init__(self, requests=None, nurses=None, period=None,
+                 target_rest_score=TARGET_REST_SCORE, strict_rest=True, yakin_workers=None, weekday_crew=None,
+                 encoding='bool', symmetry=True, boundary=None, strict_nights=True, splits=()):
+        if weekday_crew not in WEEKDAY_CREW_SIZES:
+            raise ValueError(f'weekday_crew must be one of {WEEKDAY_CREW_SIZES}: {weekday_crew!r}')
+        if encoding not in ENCODINGS:
+            raise ValueError(f'encoding must be one of {ENCODINGS}: {encoding!r}')
+        if period is None:
+            period = default_config().period
+        if requests is None:
+            requests = default_config().requests
+        self.requests = as_request_index(requests, period)
+        self.nurses = list(nurses) if nurses is not None else self.requests.nurses
+        self.period = period
+        self.days = period.days
+        bounds = [0, *splits, self.days]
+        if bounds != sorted(set(bounds)):
+            raise ValueError(f'splits must be increasing day indices within the period: {list(splits)!r}')
+        self.segments = list(zip(bounds, bounds[1:]))
+        self.target = round(target_rest_score * 2)  # 休=2, 半休=1 の2倍スコア
+        self.strict_rest = strict_rest
+        self.strict_nights = strict_nights
+        self.yakin_workers = list(yakin_workers) if yakin_workers is not None else YAKIN_WORKERS
+        if not any(n in self.nurses for n in self.yakin_workers):
+            raise ValueError(f'yakin_workers has no nurse on the roster: {list(self.yakin_workers)!r}')
+        self.weekday_crew = weekday_crew
+        self.encoding = encoding
+        self.symmetry = symmetry
+        self.boundary = boundary
+        self.symmetry_classes = []
+        self.hint = None
+        with instrument.stage('build_model'):
+            self._build()
+
+    def _build(self):
+        with instrument.stage('domains'):
+            self.domains = build_domains(self.requests, self.nurses, self.period, self.candidates,
+                                         self.yakin_workers, self.boundary.after_night if self.boundary else ())
+        self.model = cp_model.CpModel()
+        self.penalties = []
+        # あり得ない (n, d, s) の組には変数を作らない（x に無い組は常に0）
+        if self.encoding == 'table':
+            self._add_table_variables()
+        else:
+            self.x = {key: self.model.NewBoolVar('x_{}_{}_{}'.format(*key)) for key in self.domains.keys()}
+            self._add_cell_rules()
+
+        self._add_strict_rules()
+        self._add_night_rules()
+        self._add_coverage_rules()
+        self._add_streak_rules()
+        self._add_rest_objective()
+        self._add_fairness_objective()
+        if self.symmetry:
+            self._add_symmetry_breaking()
+        self.model.Minimize(sum(w * v for w, v in self.penalties))
+
+    def allowed_shifts(self, d):
+        if self.period.is_full(d):
+            return FULL_DAY_SHIFTS
+        return DAY_TYPE_SHIFTS[self.period.day_types[d]]
+
+    def candidates(self, n, d):
+        """日種別と担当（CT・外来・/訪・久保の担当）から n が d 日目に入りうるシフト。
+
+        夜勤・×・Strict1・Strict2 による絞り込みは domains.build_domains が行う。
+        """
+        day_type = self.period.day_types[d]
+        for s in self.allowed_shifts(d):
+            if s in CT_SHIFTS and n not in CT_WORKERS:
+                continue
+            if s in OUTPATIENT_SHIFTS and n in NO_OUTPATIENT_WORKERS:
+                continue
+            if s == '/訪' and (n != '久保' or d != self.period.second_thursday):
+                continue
+            # 久保は平日はCT（2・CT）、土曜は2/のみ担当する
+            if n == '久保' and s not in OFF_SHIFTS and s not in ('夜', '×'):
+                if day_type == WEEKDAY and s not in CT_SHIFTS:
+                    continue
+                if day_type == HALF and s != '2/':
+                    continue
+            yield s
+
+    def _carried(self, name, n):
+        """boundary から引き継ぐ n の値（boundary が無ければ0）。"""
+        if self.boundary is None:
+            return 0
+        if name == 'after_night':
+            return n in self.boundary.after_night
+        return getattr(self.boundary, name).get(n, 0)
+
+    def v(self, n, d, s):
+        """x[n, d, s]（変数が無い組は0）。"""
+        return self.x.get((n, d, s), 0)
+
+    def off_vars(self, n, d):
+        """d 日目の n の休み（全休・半休）の変数（ドメインにあるものだけ）。"""
+        return [self.x[n, d, s] for s in self.domains.shifts(n, d) if s in OFF_SET]
+
+    def off(self, n, d):
+        """休み（全休・半休）なら1となる線形式。"""
+        return sum(self.off_vars(n, d))
+
+    def rest_score(self, n, d):
+        """休=2, 半休=1 の休みスコア。"""
+        return (sum(2 * self.v(n, d, s) for s in FULL_OFF_SHIFTS)
+                + sum(self.v(n, d, s) for s in HALF_OFF_SHIFTS))
+
+    # ==========セルごとの制約==========
+    def _add_cell_rules(self):
+        # ドメインが空のセル（必須のシフトが食い違う）は AddExactlyOne([]) で解なしになる
+        m, x = self.model, self.x
+        for n in self.nurses:
+            for d in range(self.days):
+                m.AddExactlyOne(x[n, d, s] for s in self.domains.shifts(n, d))
+
+    def _add_table_variables(self):
+        """y[n, d] と、×以外のシフトの x[n, d, s] を作り、看護師ごとに automaton をかける。
+
+        ×がドメインにあるセルは「x がすべて0なら×」とし、y = コード(×) + Σ (コード - コード(×)) × x とする。
+        """
+        m = self.model
+        self.x, self.y = {}, {}
+        for n in self.nurses:
+            for d in range(self.days):
+                shifts = self.domains.shifts(n, d)
+                y = m.NewIntVarFromDomain(cp_model.Domain.FromValues([SHIFT_CODE[s] for s in shifts]), f'y_{n}_{d}')
+                self.y[n, d] = y
+                implied = next((s for s in shifts if s in TABLE_IMPLIED_SHIFTS), None)
+                bools = {s: m.NewBoolVar(f'x_{n}_{d}_{s}') for s in shifts if s != implied}
+                self.x.update(((n, d, s), b) for s, b in bools.items())
+                if implied is None:
+                    m.AddExactlyOne(bools.values())  # ドメインが空なら解なし
+                    m.Add(y == sum(SHIFT_CODE[s] * b for s, b in bools.items()))
+                else:
+                    m.AddAtMostOne(bools.values())
+                    base = SHIFT_CODE[implied]
+                    m.Add(y == base + sum((SHIFT_CODE[s] - base) * b for s, b in bools.items()))
+        for n in self.nurses:
+            self._add_transition_automaton(n)
+
+    def _add_transition_automaton(self, n):
+        """夜の翌日は×・×は夜の翌日のみ（Strict4）と、7日連続勤務の禁止を1つの automaton で表す。
+
+        状態は (連続勤務日数 k, 前日が夜勤か p) を k * 2 + p で表す。
+        """
+        codes = sorted({SHIFT_CODE[s] for d in range(self.days) for s in self.domains.shifts(n, d)})
+        off_codes = {SHIFT_CODE[s] for s in OFF_SHIFTS}
+        night, cross = SHIFT_CODE['夜'], SHIFT_CODE['×']
+        states = [(k, p) for k in range(MAX_WORK_STREAK + 1) for p in (0, 1)]
+        transitions = []
+        for k, p in states:
+            for c in codes:
+                if (c == cross) != bool(p):
+                    continue
+                k2 = 0 if c in off_codes else k + 1
+                if k2 > MAX_WORK_STREAK:
+                    continue
+                transitions.append((k * 2 + p, c, k2 * 2 + int(c == night)))
+        start = min(self._carried('work_streak', n), MAX_WORK_STREAK) * 2 + int(self._carried('after_night', n))
+        self.model.AddAutomaton([self.y[n, d] for d in range(self.days)], start,
+                                [k * 2 + p for k, p in states], transitions)
+
+    # ==========Strict制約==========
+    def _add_strict_rules(self):
+        # Strict1: 木日祝は特定看護師は休み(久保は第2木曜日は/訪(訪看日))
+        # Strict2: 希望休をStrictに反映する
+        # どちらもドメインで該当セルのシフトを1つに絞っている
+        requested = {(n, req.day) for n in self.nurses for req in self.requests.by_nurse.get(n, [])}
+
+        # 希望以外の半休（休/・/休）は最小限に
+        for n in self.nurses:
+            for d in range(self.days):
+                if (n, d) not in requested:
+                    for s in ['休/', '/休']:
+                        if (n, d, s) in self.x:
+                            self.penalties.append((W_HALF_REST, self.x[n, d, s]))
+
+    def _add_night_rules(self):
+        m, x = self.model, self.x
+        yakin = [n for n in self.yakin_workers if n in self.nurses]
+        # Strict3: 夜勤を各日に必ず1人、かつ均等に入れる
+        for d in range(self.days):
+            m.AddExactlyOne(x[n, d, '夜'] for n in yakin if (n, d, '夜') in x)
+        for k, (first, last) in enumerate(self.segments):
+            base, rem = divmod(last - first, len(yakin))
+            upper = base + (1 if rem else 0)
+            suffix = f'_{k}' if len(self.segments) > 1 else ''
+            for n in yakin:
+                count = sum(self.v(n, d, '夜') for d in range(first, last))
+                if self.strict_nights:
+                    m.AddLinearConstraint(count, base, upper)
+                    continue
+                under = m.NewIntVar(0, base, f'nights_under_{n}{suffix}')
+                over = m.NewIntVar(0, last - first, f'nights_over_{n}{suffix}')
+                m.Add(count + under >= base)
+                m.Add(count - over <= upper)
+                self.penalties += [(W_NIGHT_QUOTA, under), (W_NIGHT_QUOTA, over)]
+        nights = {n: sum(self.v(n, d, '夜') for d in range(self.days)) for n in yakin}
+        # 前期間までの累計が多い看護師ほど今期は少なく
+        if self.boundary is not None:
+            carried = [self._carried('nights', n) for n in yakin]
+            self.penalties.append((W_NIGHT_SPREAD, self._spread(
+                'nights', [c + nights[n] for c, n in zip(carried, yakin)], max(carried) + self.days)))
+
+        # Strict4: 夜勤の翌日は必ず「×」、×は夜勤明けのみ（夜勤メンバー以外と初日の×はドメインで除外済み）
+        if self.encoding == 'table':
+            return  # automaton で表す
+        for n in yakin:
+            for d in range(self.days - 1):
+                if (n, d, '夜') in x or (n, d + 1, '×') in x:
+                    m.Add(self.v(n, d + 1, '×') == self.v(n, d, '夜'))
+
+    # ==========日程ごとの配置==========
+    def _add_coverage_rules(self):
+        m = self.model
+        self.short_crew = {}
+        for d in range(self.days):
+            def count(s):
+                return sum(self.v(n, d, s) for n in self.nurses)
+
+            day_type = self.period.day_types[d]
+            if self.period.is_full(d):
+                for s in FULL_DAY_CREW:
+                    m.Add(count(s) == 1)
+            elif day_type == HALF:
+                for s in SATURDAY_CREW:
+                    m.Add(count(s) == 1)
+            elif day_type == WEEKDAY:
+                # 8人揃わない日のみ 2・CT を使う7人体制
+                short = m.NewBoolVar(f'short_crew_{d}')
+                self.short_crew[d] = short
+                if self.weekday_crew is not None:
+                    m.Add(short == int(self.weekday_crew == 7))
+                for s in set(WEEKDAY_FULL_CREW) | set(WEEKDAY_SHORT_CREW):
+                    in_full = s in WEEKDAY_FULL_CREW
+                    in_short = s in WEEKDAY_SHORT_CREW
+                    if in_full and in_short:
+                        m.Add(count(s) == 1)
+                    elif in_full:
+                        m.Add(count(s) == 1 - short)
+                    else:
+                        m.Add(count(s) == short)
+                self.penalties.append((W_SHORT_CREW, short))
+
+    def _add_streak_rules(self):
+        m = self.model
+        offs = {n: [self.off_vars(n, d) for d in range(self.days)] for n in self.nurses}
+        # 休みが確定しているセル（ドメインが休みだけ）
+        always_off = {n: [len(v) == len(self.domains.shifts(n, d)) > 0 for d, v in enumerate(offs[n])]
+                      for n in self.nurses}
+
+        # 7日連続勤務は禁止（×は勤務扱い）。1日の休みは高々1つなので BoolOr で表す（table は automaton）
+        # 前期間から続く連続勤務は、期間の前にはみ出した区間（start < 0）として扱う
+        window = MAX_WORK_STREAK + 1
+        for n in self.nurses if self.encoding == 'bool' else []:
+            carried = min(self._carried('work_streak', n), MAX_WORK_STREAK)
+            for start in range(-carried, self.days - window + 1):
+                days = range(max(start, 0), start + window)
+                if any(always_off[n][d] for d in days):
+                    continue
+                m.AddBoolOr([v for d in days for v in offs[n][d]])
+
+        # 4日連続休みはペナルティ（休みになりうる日が window 日無い区間は不要）
+        window = MAX_REST_STREAK + 1
+        for n in self.nurses:
+            carried = min(self._carried('rest_streak', n), MAX_REST_STREAK)
+            for start in range(-carried, self.days - window + 1):
+                days = range(max(start, 0), start + window)
+                if not all(offs[n][d] for d in days):
+                    continue
+                excess = m.NewBoolVar(f'rest_streak_{n}_{start}')
+                before = window - len(days)  # 前期間の休み
+                m.Add(before + sum(v for d in days for v in offs[n][d]) <= MAX_REST_STREAK + excess)
+                self.penalties.append((W_REST_STREAK, excess))
+
+    # ==========目的関数==========
+    def _add_rest_objective(self):
+        m = self.model
+        upper = 2 * self.days
+        self.rest_scores = {}
+        for n in self.nurses:
+            score = m.NewIntVar(0, upper, f'rest_score_{n}')
+            m.Add(score == sum(self.rest_score(n, d) for d in range(self.days)))
+            for k, (first, last) in enumerate(self.segments):
+                suffix = f'_{k}' if len(self.segments) > 1 else ''
+                segment = score if len(self.segments) == 1 else sum(self.rest_score(n, d) for d in range(first, last))
+                shortfall = m.NewIntVar(0, upper, f'rest_shortfall_{n}{suffix}')
+                m.Add(shortfall >= self.target - segment)
+                if self.strict_rest:
+                    m.Add(shortfall == 0)
+                self.penalties.append((W_REST_SHORTFALL, shortfall))
+            self.rest_scores[n] = score
+        self.penalties.append((W_REST_SPREAD, self._spread('rest', self.rest_scores.values(), upper)))
+
+    def _add_fairness_objective(self):
+        # 早日・残日の回数を均等に（boundary があれば前期間までの累計を含めて）
+        duty_nurses = [n for n in self.nurses if n not in HOLIDAY_NO_WORKERS and n not in NO_OUTPATIENT_WORKERS]
+        carried = [self._carried('duties', n) for n in duty_nurses]
+        duty = [c + sum(self.v(n, d, s) for d in range(self.days) for s in FULL_DAY_CREW)
+                for c, n in zip(carried, duty_nurses)]
+        if duty:
+            self.penalties.append((W_DUTY_SPREAD, self._spread('duty', duty, max(carried) + self.days)))
+
+        # 土曜担当の外来（1〜4）のローテーションを均等に
+        members = [n for n in SATURDAY_WORKERS if n in self.nurses]
+        for s in ['1', '2', '3', '4']:
+            counts = [sum(self.v(n, d, s) for d in range(self.days)) for n in members]
+            if counts:
+                self.penalties.append((W_OUTPATIENT_SPREAD, self._spread(f'out_{s}', counts, self.days)))
+
+    # ==========対称性の除去==========
+    def _signature(self, n):
+        """入れ替えてもモデルが変わらない看護師は同じ値になる。
+
+        各日のドメイン（担当・夜勤・Strict1・Strict2 による確定セル）、希望を出した日、
+        目的関数で均等化の対象になる組（早日・残日、土曜外来）への所属、前期間から引き継ぐ値を並べたもの。
+        """
+        return (
+            tuple(self.domains.shifts(n, d) for d in range(self.days)),
+            frozenset(req.day for req in self.requests.by_nurse.get(n, [])),
+            n in self.yakin_workers,
+            n in HOLIDAY_NO_WORKERS or n in NO_OUTPATIENT_WORKERS,
+            n in SATURDAY_WORKERS,
+            self.boundary.signature(n) if self.boundary is not None else None,
+        )
+
+    def _add_symmetry_breaking(self):
+        """同値な看護師の組ごとに、x の行が辞書式に降順になるようにする。"""
+        classes = {}
+        for n in self.nurses:
+            classes.setdefault(self._signature(n), []).append(n)
+        self.symmetry_classes = [tuple(c) for c in classes.values() if len(c) > 1]
+        for members in self.symmetry_classes:
+            keys = [(d, s) for d in range(self.days) for s in self.domains.shifts(members[0], d)
+                    if (members[0], d, s) in self.x]
+            for a, b in zip(members, members[1:]):
+                self._add_lex_geq([self.x[a, d, s] for d, s in keys], [self.x[b, d, s] for d, s in keys],
+                                  f'lex_{a}_{b}')
+        instrument.count('symmetry.classes', len(self.symmetry_classes))
+        instrument.count('symmetry.nurses', sum(len(c) for c in self.symmetry_classes))
+
+    def _add_lex_geq(self, a, b, name):
+        """BoolVar の列 a >= b（辞書式）。eq[i] は i より前がすべて等しいとき1になる。"""
+        m = self.model
+        eq = m.NewConstant(1)
+        for i, (ai, bi) in enumerate(zip(a, b)):
+            m.AddBoolOr([eq.Not(), ai, bi.Not()])  # 等しい間は a[i] >= b[i]
+            if i == len(a) - 1:
+                break
+            nxt = m.NewBoolVar(f'{name}_{i}')
+            m.AddBoolOr([eq.Not(), ai.Not(), bi.Not(), nxt])
+            m.AddBoolOr([eq.Not(), ai, bi, nxt])
+            eq = nxt
+
+    def _spread(self, name, exprs, upper):
+        """exprs の最大値と最小値の差を表す変数を返す。"""
+        m = self.model
+        values = []
+        for i, e in enumerate(exprs):
+            v = m.NewIntVar(0, upper, f'{name}_{i}')
+            m.Add(v == e)
+            values.append(v)
+        hi = m.NewIntVar(0, upper, f'{name}_max')
+        lo = m.NewIntVar(0, upper, f'{name}_min')
+        m.AddMaxEquality(hi, values)
+        m.AddMinEquality(lo, values)
+        spread = m.NewIntVar(0, upper, f'{name}_spread')
+        m.Add(spread == hi - lo)
+        return spread
+
+    # ==========求解==========
+    def add_hint(self, hint):
+        """過去のシフト表を初期解ヒントとして与える。ヒントを与えたセル数を返す。"""
+        self.hint = hint
+        return add_hints(self.model, self.x, hint, SHIFT_TYPES, self.days)
+
+    def solve(self, params=None):
+        """求解してシフト表（index=看護師, 列=day_i）を返す。解が無ければ None。
+
+        求解情報（パラメータ・ステータス・実行時間）は self.solve_info に残る。
+        """
+        name = 'schedule' if self.strict_rest else 'schedule_soft_rest'
+        solver, status, self.solve_info = run_solver(self.model, params or SolverParams.from_config(), name)
+        if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            return None
+        df = self.to_frame(solver)
+        if self.symmetry:
+            self.solve_info['symmetry_classes'] = [list(c) for c in self.symmetry_classes]
+        if self.hint is not None:
+            self.solve_info['hints'] = hint_report(self.hint, df)
+        return df
+
+    def to_frame(self, solver):
+        result = []
+        for n in self.nurses:
+            row = []
+            for d in range(self.days):
+                if self.encoding == 'table':
+                    row.append(SHIFT_TYPES[solver.Value(self.y[n, d]) - 1])
+                else:
+                    row.append(next(s for s in self.domains.shifts(n, d) if solver.Value(self.x[n, d, s])))
+            result.append(row)
+        columns = [f'day_{i}' for i in range(self.days)]
+        return pd.DataFrame(result, index=pd.Index(self.nurses, name='nurse'), columns=columns)
+
+
+def solve_schedule(requests=None, nurses=None, period=None, params=None, solve_log=None, hint=None, **options):
+    """シフト表全体を CP-SAT で作成する。解が無ければ None を返す。
+
+    まず休み目標を必須にして解き、解が見つからなければ目標不足をペナルティとして解き直す。
+    solve_log（list）を渡すと各求解の情報を追記する。hint は初期解ヒントにするシフト表。
+    requests・period の省略時は config.default_config() の値を使う。
+    options（target_rest_score, yakin_workers, weekday_crew, encoding, symmetry, boundary, splits）は ScheduleModel にそのまま渡す。
+    """
+    df = None
+    for strict_rest in (True, False):
+        model = ScheduleModel(requests, nurses, period, strict_rest=strict_rest, **options)
+        if hint is not None:
+            model.add_hint(hint)
+        df = model.solve(params)
+        if solve_log is not None:
+            solve_log.append(model.solve_info)
+        if df is not None:
+            break
+    return df
+
@@ -3,8 +3,11 @@ import pandas as pd
 import calendar
 from datetime import datetime, timedelta
 import os
+import json
 from openpyxl import load_workbook
 
+from solver_params import SolverParams, run_solver
+
 # === 設定 ===
 YEAR = 2025
 MONTH = 8
@@ -82,8 +85,13 @@ for i, nurse in enumerate(名前リスト):
 model.Minimize(sum(penalties))
 
 # === 求解 ===
-solver = cp_model.CpSolver()
-status = solver.Solve(model)
+solver, status, solve_info = run_solver(model, SolverParams.from_config(), 'optimize_shift')
+print(f"求解ステータス: {solve_info['status']}（{solve_info['wall_time']:.2f}秒）")
+
+# 求解ログ（パラメータ・ステータス・実行時間）を出力先と同じフォルダに保存（pipeline.py と同じ形式）
+SOLVE_LOG_PATH = os.path.join(os.path.dirname(OUTPUT_PATH), 'solve_log.json')
+with open(SOLVE_LOG_PATH, 'w', encoding='utf-8') as f:
+    json.dump([solve_info], f, ensure_ascii=False, indent=2)
 
 if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
     print("✅ 最適化成功：テンプレートに書き込みます...")
@@ -0,0 +1,152 @@
+"""勤務期間（前月21日〜当月20日）のカレンダーと日本の祝日判定。"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import calendar
+
+# 日種別
+WEEKDAY = 'weekday'  # 月・火・水・金（A日程）
+FULL = 'full'        # 木・日（B日程）
+HALF = 'half'        # 土（C日程）
+HOLIDAY = 'holiday'  # 祝日（B日程扱い）
+
+PERIOD_START_DAY = 21
+
+
+def japanese_holidays(year: int) -> list[date]:
+    """指定した年の日本の祝日を返します（1980–2099年対応）。"""
+    return sorted(_holiday_set(year))
+
+
+@lru_cache(maxsize=None)
+def _holiday_set(year: int) -> frozenset[date]:
+    holidays = []
+
+    # 固定祝日
+    fixed = [
+        (1, 1), (2, 11), (2, 23),
+        (4, 29), (5, 3), (5, 4), (5, 5),
+        (8, 11), (11, 3), (11, 23),
+    ]
+    for m, d in fixed:
+        holidays.append(date(year, m, d))
+
+    # Happy Monday 制度
+    def nth_monday(month: int, nth: int) -> date:
+        d0 = date(year, month, 1)
+        offset = (0 - d0.weekday()) % 7  # 0=Mon
+        return d0 + timedelta(days=offset + 7 * (nth - 1))
+    holidays.append(nth_monday(1, 2))   # 成人の日
+    holidays.append(nth_monday(7, 3))   # 海の日
+    holidays.append(nth_monday(9, 3))   # 敬老の日
+    holidays.append(nth_monday(10, 2))  # スポーツの日
+
+    # 春分の日・秋分の日（近似式）
+    vernal = int(20.8431 + 0.242194 * (year - 1980) - ((year - 1980) // 4))
+    autumn = int(23.2488 + 0.242194 * (year - 1980) - ((year - 1980) // 4))
+    holidays.append(date(year, 3, vernal))
+    holidays.append(date(year, 9, autumn))
+
+    # 国民の休日（祝日に挟まれた平日）
+    holiday_set = set(holidays)
+    added = True
+    while added:
+        added = False
+        sorted_h = sorted(holiday_set)
+        for i in range(len(sorted_h) - 1):
+            if (sorted_h[i + 1] - sorted_h[i]).days == 2:
+                mid = sorted_h[i] + timedelta(days=1)
+                if mid.weekday() != 6 and mid not in holiday_set:
+                    holiday_set.add(mid)
+                    added = True
+                    break
+
+    # 振替休日（日曜の祝日の翌平日）
+    sorted_h = sorted(holiday_set)
+    for h in sorted_h:
+        if h.weekday() == 6:  # 日曜
+            next_day = h + timedelta(days=1)
+            while next_day in holiday_set:
+                next_day += timedelta(days=1)
+            holiday_set.add(next_day)
+
+    return frozenset(holiday_set)
+
+
+def is_japanese_holiday(dt) -> bool:
+    """date / datetime から祝日かどうかを返す。"""
+    if isinstance(dt, datetime):
+        dt = dt.date()
+    return dt in _holiday_set(dt.year)
+
+
+def day_type_of(dt: date) -> str:
+    """日付の日種別（WEEKDAY / FULL / HALF / HOLIDAY）を返す。"""
+    if is_japanese_holiday(dt):
+        return HOLIDAY
+    if dt.weekday() in (3, 6):  # 木曜・日曜
+        return FULL
+    if dt.weekday() == 5:  # 土曜
+        return HALF
+    return WEEKDAY
+
+
+class PeriodCalendar:
+    """1勤務期間分の日付・日種別・インデックス対応表。
+
+    YEAR/MONTH の期間は前月21日から当月20日まで。期間ごとに1度だけ作成し、
+    各最適化ステージで使い回す。days を指定すると前月21日から days 日間（ベンチマーク用の長期間など）。
+    """
+
+    def __init__(self, year: int, month: int, start_day: int = PERIOD_START_DAY, days: int | None = None):
+        self.year = year
+        self.month = month
+        prev_year, prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
+        self.start = date(prev_year, prev_month, start_day)
+        if days is None:
+            self.end = date(year, month, start_day - 1)
+        else:
+            self.end = self.start + timedelta(days=days - 1)
+        self.days = (self.end - self.start).days + 1
+
+        self.dates = [self.start + timedelta(days=i) for i in range(self.days)]
+        self.weekday_names = [calendar.day_name[d.weekday()] for d in self.dates]
+        self.day_types = [day_type_of(d) for d in self.dates]
+        self._index = {d: i for i, d in enumerate(self.dates)}
+        self._day_of_month = {d.day: i for i, d in enumerate(self.dates)}
+        self._month_day = {(d.month, d.day): i for i, d in enumerate(self.dates)}
+
+        thursdays = [i for i, d in enumerate(self.dates) if d.weekday() == 3]
+        self.second_thursday = thursdays[1] if len(thursdays) >= 2 else None
+
+    def __len__(self):
+        return self.days
+
+    def __repr__(self):
+        if self.end == date(self.year, self.month, self.start.day - 1):
+            return f'PeriodCalendar({self.year}, {self.month})'
+        return f'PeriodCalendar({self.year}, {self.month}, days={self.days})'
+
+    def index_of(self, dt) -> int:
+        """日付から期間内のインデックス（0始まり）を返す。"""
+        if isinstance(dt, datetime):
+            dt = dt.date()
+        return self._index[dt]
+
+    def date_of(self, index: int) -> date:
+        return self.dates[index]
+
+    def day_to_index(self, day: int) -> int:
+        """希望休CSVの列（日にち）を期間内のインデックスに変換する。"""
+        return self._day_of_month[day]
+
+    def label_to_index(self, label) -> int:
+        """希望休CSVの列名（「21」または1か月を超える期間用の「8/21」）をインデックスに変換する。"""
+        label = str(label).strip()
+        if '/' in label:
+            month, day = label.split('/')
+            return self._month_day[int(month), int(day)]
+        return self.day_to_index(int(label))
+
+    def is_full(self, index: int) -> bool:
+        """木・日・祝日（B日程）かどうか。"""
+        return self.day_types[index] in (FULL, HOLIDAY)
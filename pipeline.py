@@ -0,0 +1,163 @@
+"""シフト作成 → Excel 出力を1プロセス内で実行するパイプライン。
+
+engine='cpsat' は optimize_cp の単一モデルで全体を解く。engine='greedy' は
+Strict 最適化（optimize_1）→ 追加割り振り（optimize_2）の2段階で作成する。
+各ステージ間のデータは CSV を経由せずメモリ上の DataFrame で受け渡す。
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+
+import pandas as pd
+
+import artifact
+from config import Config, default_config
+from excel_export import write_schedule
+from hints import load_hint, save_history
+import instrument
+from optimize_1 import solve_strict
+from optimize_2 import fill_shifts, summarize, to_output_frame
+from optimize_cp import solve_schedule
+from request_index import RequestIndex, as_request_index
+from solver_params import SolverParams
+
+ENGINES = ('cpsat', 'greedy')
+
+
+class ScheduleError(RuntimeError):
+    """シフトが作成できなかったときに送出される。"""
+
+
+@dataclass
+class Schedule:
+    """パイプラインの結果。
+
+    shifts は最終的なシフト表、strict は greedy エンジンでの optimize_1（Strict1~4）の割当。
+    どちらも index=看護師, 列=day_0..day_N の DataFrame。
+    solve_log は CP-SAT の各求解のパラメータ・ステータス・実行時間、
+    issues は希望休CSVの読み込み時の注意点（未知の記号など）。
+    """
+    shifts: pd.DataFrame
+    strict: pd.DataFrame | None = None
+    solve_log: list[dict] = field(default_factory=list)
+    issues: list[str] = field(default_factory=list)
+
+    @property
+    def summary(self) -> pd.DataFrame:
+        """休み合計列付きのシフト表。"""
+        return summarize(self.shifts)
+
+    def to_csv(self, final_path, summary_path=None):
+        out = to_output_frame(self.shifts)
+        out.to_csv(final_path, encoding='utf-8-sig')
+        if summary_path is not None:
+            summarize(out).to_csv(summary_path, encoding='utf-8-sig')
+
+    def save(self, path):
+        """シフト表を artifact 形式（.npz）で保存する。fixed には Strict の割当（greedy エンジン）を入れる。"""
+        fixed = None if self.strict is None else self.strict.reindex_like(self.shifts).notna().to_numpy()
+        return artifact.save(path, self.shifts, fixed)
+
+    def to_excel(self, template_path, output_path, period=None):
+        """テンプレートに書き込む。period を渡すと見出しの年月と期間の初日も書き換える。"""
+        write_schedule(to_output_frame(self.shifts), template_path, output_path, period=period)
+
+    def write_solve_log(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.solve_log, f, ensure_ascii=False, indent=2)
+
+
+def build_schedule(requests: RequestIndex | pd.DataFrame | None = None, config: Config | None = None,
+                   engine='cpsat', params: SolverParams | None = None,
+                   hint: pd.DataFrame | None = None, boundary=None) -> Schedule:
+    """希望休からシフト表を作成する。
+
+    config は期間や入力ファイルの設定（省略時は config.default_config()）。
+    requests は希望休の RequestIndex か希望休CSVの DataFrame（省略時は config.requests）。
+    params は CP-SAT の探索パラメータ（省略時は config.solver_params）。
+    hint は初期解ヒントにする過去のシフト表（hints.load_hint を参照）。
+    boundary は前期間から引き継ぐ状態（boundary.BoundaryState。cpsat エンジンのみ）。
+    解が見つからない場合は ScheduleError を送出する。
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'unknown engine: {engine!r}')
+    if boundary is not None and engine != 'cpsat':
+        raise ValueError('boundary is only supported by the cpsat engine')
+    config = config or default_config()
+    period = config.period
+    with instrument.stage('load_requests'):
+        if requests is None:
+            requests = config.requests
+        requests = as_request_index(requests, period)
+    nurses = requests.nurses
+    if params is None:
+        params = SolverParams.from_config(config)
+    solve_log = []
+
+    if engine == 'cpsat':
+        with instrument.stage('cpsat'):
+            shifts = solve_schedule(requests, nurses, period, params, solve_log, hint,
+                                    target_rest_score=config.target_rest_score,
+                                    yakin_workers=config.yakin_workers, weekday_crew=config.weekday_crew,
+                                    encoding=config.encoding, boundary=boundary)
+        if shifts is None:
+            raise ScheduleError(f'制約を満たす解が見つかりませんでした。（{solve_log[-1]["status"]}）')
+        return Schedule(shifts=shifts, solve_log=solve_log, issues=requests.issues)
+
+    with instrument.stage('strict'):
+        strict = solve_strict(requests, nurses, period, params, solve_log, hint, config.yakin_workers)
+    if strict is None:
+        raise ScheduleError(f'Strict制約を満たす解が見つかりませんでした。（{solve_log[-1]["status"]}）')
+
+    with instrument.stage('greedy'):
+        shifts = fill_shifts(strict, period, seed=params.random_seed or 0,
+                             target_rest_score=config.target_rest_score, rest_spread=config.rest_spread)
+    return Schedule(shifts=shifts, strict=strict, solve_log=solve_log, issues=requests.issues)
+
+
+def run(requests_path=None, template_path=None, output_dir='output', excel=True, engine='cpsat',
+        params: SolverParams | None = None, use_hint=True, config: Config | None = None,
+        profile=False, csv=True) -> Schedule:
+    """CSV を読み込んでシフトを作成し、output_dir に schedule.npz（artifact 形式）・CSV・Excel・求解ログを書き出す。
+
+    requests_path・template_path は config の値より優先する。csv=False のとき CSV は出力しない。
+    use_hint=True のとき config.history_dir の過去の結果を初期解ヒントに使い、
+    作成したシフト表を履歴に保存する。
+    profile=True のときステージごとの実行時間・モデル統計などを output_dir/profile.json に書き出す。
+    """
+    config = (config or default_config()).with_overrides(req_shift_path=requests_path, template_path=template_path)
+    out = Path(output_dir)
+    if not profile:
+        return _run(config, out, excel, engine, params, use_hint, csv)
+    profiler = instrument.Profiler()
+    try:
+        with profiler.activate():
+            return _run(config, out, excel, engine, params, use_hint, csv)
+    finally:
+        out.mkdir(parents=True, exist_ok=True)
+        profiler.write(out / 'profile.json')
+
+
+def _run(config, out, excel, engine, params, use_hint, csv):
+    with instrument.stage('load_hint'):
+        hint, source = load_hint(config.history_dir, config.period) if use_hint else (None, None)
+    schedule = build_schedule(config=config, engine=engine, params=params, hint=hint)
+    if source:
+        for info in schedule.solve_log:
+            if 'hints' in info:
+                info['hints']['source'] = source
+
+    out.mkdir(parents=True, exist_ok=True)
+    with instrument.stage('write_artifact'):
+        schedule.save(out / 'schedule.npz')
+        schedule.write_solve_log(out / 'solve_log.json')
+    if csv:
+        with instrument.stage('write_csv'):
+            schedule.to_csv(out / 'shift_final.csv', out / 'shift_summary.csv')
+    if use_hint:
+        with instrument.stage('save_history'):
+            save_history(schedule.shifts, config.history_dir, config.period)
+    if excel:
+        with instrument.stage('write_excel'):
+            schedule.to_excel(config.template_path, out / 'shift_output.xlsx', config.period)
+    return schedule
@@ -0,0 +1,228 @@
+"""公開済みのシフト表を、期間の途中の変更（欠勤・交代・新しい希望）に合わせて最小限だけ組み直す。
+
+    python replan.py output/schedule.npz --from 12 --absent 樋渡:12 --absent 樋渡:13 \\
+        --swap 三好:川原田:15 --request 中山:18:③
+
+--from より前の日（経過した日）は公開済みのシフトに固定し、それ以降の日だけを CP-SAT で解き直す。
+目的関数は optimize_cp.ScheduleModel の目的関数に「変わったセルの数 × change_weight」を加えたもの。
+change_weight は公平性の項より大きく、休み不足・体制不足より小さいので、変更が必要な分だけ組み直す。
+看護師ごとの夜勤回数の上下限はペナルティにする（欠勤した夜勤を後の日で取り戻すための連鎖的な変更を避ける）。
+公開済みのシフトを初期解ヒントに与えるので、大きな名簿でも数秒で答えが出る。
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+import argparse
+import sys
+
+from ortools.sat.python import cp_model
+import pandas as pd
+
+import artifact
+from config import default_config
+from optimize_cp import SHIFT_CODE, TABLE_IMPLIED_SHIFTS, ScheduleModel
+from pipeline import ScheduleError
+from request_index import REQUEST_SHIFT, DayRequest, RequestIndex, as_request_index
+from solver_params import SolverParams, run_solver
+
+EVENT_KINDS = ('absence', 'request', 'swap')
+ABSENCE_KIND = '①'  # 欠勤は「休」の希望として扱う
+W_CHANGE = 100  # 変更1セルの重み（optimize_cp の W_REST_SPREAD より大きく W_REST_SHORTFALL より小さい）
+DEFAULT_TIME_LIMIT = 10.0
+DIFF_COLUMNS = ['nurse', 'day', 'date', 'before', 'after']
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """期間の途中の変更。day は期間内のインデックス。
+
+    absence: nurse が day に欠勤する（休にする）
+    request: nurse の day に希望（①〜⑤）を加える
+    swap   : nurse と other の day のシフトを入れ替える
+    """
+    kind: str
+    nurse: str
+    day: int
+    other: str | None = None
+    request: str | None = None
+
+    def __post_init__(self):
+        if self.kind not in EVENT_KINDS:
+            raise ValueError(f'unknown event: {self.kind!r}')
+        if self.kind == 'swap' and self.other is None:
+            raise ValueError('swap needs other')
+        if self.kind == 'request' and self.request not in REQUEST_SHIFT:
+            raise ValueError(f'unknown request: {self.request!r}')
+
+    @classmethod
+    def parse(cls, kind, text, period) -> 'ChangeEvent':
+        """CLI の指定（absence: 名前:日, request: 名前:日:希望, swap: 名前:名前:日）を読む。日は希望休CSVの列名。"""
+        parts = text.split(':')
+        if kind == 'absence' and len(parts) == 2:
+            return cls(kind, parts[0], period.label_to_index(parts[1]))
+        if kind == 'request' and len(parts) == 3:
+            return cls(kind, parts[0], period.label_to_index(parts[1]), request=parts[2])
+        if kind == 'swap' and len(parts) == 3:
+            return cls(kind, parts[0], period.label_to_index(parts[2]), other=parts[1])
+        raise ValueError(f'invalid {kind} event: {text!r}')
+
+
+@dataclass
+class ReplanResult:
+    shifts: pd.DataFrame
+    diff: pd.DataFrame  # DIFF_COLUMNS。変わったセルだけ
+    objective: float
+    start: int
+    solve_info: dict = field(default_factory=dict)
+
+    @property
+    def changes(self) -> int:
+        return len(self.diff)
+
+
+def apply_events(requests: RequestIndex, shifts: pd.DataFrame, events) -> tuple[RequestIndex, dict]:
+    """events を反映した希望の索引と、交代で決まるセル {(看護師, 日): シフト} を返す。"""
+    by_nurse = {n: list(reqs) for n, reqs in requests.by_nurse.items()}
+    fixed = {}
+    for e in events:
+        for n in (e.nurse, e.other):
+            if n is not None and n not in shifts.index:
+                raise ValueError(f'unknown nurse: {n}')
+        if e.kind == 'swap':
+            a, b = shifts.at[e.nurse, f'day_{e.day}'], shifts.at[e.other, f'day_{e.day}']
+            fixed[e.nurse, e.day], fixed[e.other, e.day] = b, a
+            continue
+        kind = ABSENCE_KIND if e.kind == 'absence' else e.request
+        reqs = [r for r in by_nurse.get(e.nurse, []) if r.day != e.day]
+        by_nurse[e.nurse] = reqs + [DayRequest(e.day, kind)]
+        fixed.pop((e.nurse, e.day), None)
+    nurses = requests.nurses + [n for n in by_nurse if n not in requests.nurses]
+    return RequestIndex(nurses, by_nurse, requests.notes, requests.unknown, requests.issues), fixed
+
+
+def _same(model, n, d, s):
+    """(n, d) が s なら1となる線形式。"""
+    if model.encoding == 'table' and s in TABLE_IMPLIED_SHIFTS:
+        return 1 - sum(model.v(n, d, t) for t in model.domains.shifts(n, d) if t != s)
+    return model.x[n, d, s]
+
+
+def replan(shifts: pd.DataFrame, events, requests=None, period=None, start=None, params: SolverParams | None = None,
+           change_weight=W_CHANGE, **options) -> ReplanResult:
+    """shifts（公開済みのシフト表）を events に合わせて start 日目以降だけ組み直す。
+
+    start の省略時は最も早い変更の日。start より前の日の変更は ValueError。
+    params の省略時は config.solver_params に DEFAULT_TIME_LIMIT 秒と random_seed=0 を補ったもの。
+    options は ScheduleModel に渡す（target_rest_score, yakin_workers, weekday_crew, encoding）。
+    解が無ければ pipeline.ScheduleError を送出する。
+    """
+    events = list(events)
+    if start is None:
+        start = min((e.day for e in events), default=0)
+    elapsed = [e for e in events if e.day < start]
+    if elapsed:
+        raise ValueError(f'events before day {start} cannot be re-planned: {elapsed}')
+    if period is None:
+        period = default_config().period
+    if requests is None:
+        requests = default_config().requests
+    requests, swapped = apply_events(as_request_index(requests, period), shifts, events)
+    # 固定したセルが辞書式順序の制約と食い違わないよう、対称性の除去は行わない
+    model = ScheduleModel(requests, list(shifts.index), period, strict_rest=False, symmetry=False,
+                          strict_nights=False, **options)
+    m = model.model
+
+    changes, outside = [], []
+    for n in model.nurses:
+        for d in range(model.days):
+            value = swapped.get((n, d), shifts.at[n, f'day_{d}'])
+            in_domain = value in model.domains.shifts(n, d)
+            if d < start or (n, d) in swapped:
+                if not in_domain:
+                    outside.append((n, d, value))
+                    continue
+                m.Add(_same(model, n, d, value) == 1)
+            elif in_domain:  # ドメイン外のセル（欠勤・新しい希望と食い違う）は必ず変わるので数えない
+                changes.append(1 - _same(model, n, d, value))
+                if model.encoding == 'table':
+                    m.AddHint(model.y[n, d], SHIFT_CODE[value])
+                else:
+                    m.AddHint(model.x[n, d, value], 1)
+    if outside:
+        listed = '、'.join(f'{n} day_{d}「{s}」' for n, d, s in outside)
+        raise ScheduleError(f'固定する日のシフトがモデルの制約を満たしません: {listed}')
+    m.Minimize(sum(w * v for w, v in model.penalties) + change_weight * sum(changes))
+
+    if params is None:
+        params = SolverParams.from_config().with_overrides(max_time_in_seconds=DEFAULT_TIME_LIMIT)
+    if params.random_seed is None:
+        params = params.with_overrides(random_seed=0)
+    solver, status, info = run_solver(m, params, 'replan')
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        raise ScheduleError(f'変更を反映した解が見つかりませんでした。（{info["status"]}）')
+    after = model.to_frame(solver)
+    return ReplanResult(after, schedule_diff(shifts, after, period), solver.ObjectiveValue(), start, info)
+
+
+def schedule_diff(before: pd.DataFrame, after: pd.DataFrame, period) -> pd.DataFrame:
+    """before と after で違うセルの一覧（DIFF_COLUMNS。日付順・看護師順）。"""
+    b = before.reindex(index=after.index, columns=after.columns).to_numpy(dtype=object)
+    a = after.to_numpy(dtype=object)
+    rows = [(after.index[i], d, period.date_of(d), b[i, d], a[i, d])
+            for d in range(a.shape[1]) for i in range(a.shape[0]) if b[i, d] != a[i, d]]
+    return pd.DataFrame(rows, columns=DIFF_COLUMNS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='公開済みのシフト表を期間途中の変更に合わせて組み直します。')
+    parser.add_argument('schedule', nargs='?', default='output/schedule.npz',
+                        help='公開済みのシフト表（schedule.npz・履歴の .npz か shift_final.csv）')
+    parser.add_argument('--config', help='設定ファイル（main.py の --config と同じ）')
+    parser.add_argument('--from', dest='start', metavar='日', help='組み直す最初の日（希望休CSVの列名。省略時は最も早い変更の日）')
+    parser.add_argument('--absent', action='append', default=[], metavar='名前:日', help='欠勤（複数指定可）')
+    parser.add_argument('--request', action='append', default=[], metavar='名前:日:希望', help='新しい希望（①〜⑤）')
+    parser.add_argument('--swap', action='append', default=[], metavar='名前:名前:日', help='2人のシフトの交代')
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT, help='求解時間の上限（秒）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='output/schedule_replan.npz',
+                        help='組み直したシフト表の出力先（.npz なら artifact 形式、それ以外は CSV）。差分は *_diff.csv')
+    args = parser.parse_args(argv)
+
+    from config import Config
+    from optimize_2 import summarize, to_output_frame
+
+    config = Config.from_file(args.config) if args.config else default_config()
+    period = config.period
+    events = ([ChangeEvent.parse('absence', t, period) for t in args.absent]
+              + [ChangeEvent.parse('request', t, period) for t in args.request]
+              + [ChangeEvent.parse('swap', t, period) for t in args.swap])
+    if not events:
+        parser.error('変更（--absent / --request / --swap）を指定してください')
+    shifts = artifact.read_schedule(args.schedule)
+    params = SolverParams.from_config(config).with_overrides(max_time_in_seconds=args.time_limit,
+                                                             random_seed=args.seed)
+    start = None if args.start is None else period.label_to_index(args.start)
+    try:
+        result = replan(shifts, events, config.requests, period, start, params,
+                        target_rest_score=config.target_rest_score, yakin_workers=config.yakin_workers,
+                        weekday_crew=config.weekday_crew, encoding=config.encoding)
+    except ScheduleError as e:
+        print(f"❌ {e}")
+        return 1
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if out.suffix == artifact.SUFFIX:
+        artifact.save(out, result.shifts)
+    else:
+        summarize(to_output_frame(result.shifts)).to_csv(out, encoding='utf-8-sig')
+    diff_path = out.with_name(f'{out.stem}_diff.csv')
+    result.diff.to_csv(diff_path, index=False, encoding='utf-8-sig')
+    if result.changes:
+        print(result.diff.to_string(index=False))
+    print(f"✅ {period.date_of(result.start)} 以降の {result.changes} セルを変更しました"
+          f"（{result.solve_info['status']}, {result.solve_info['wall_time']:.1f}秒）。{out}・{diff_path} に保存しました。")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""希望休CSV（req_shift_*.csv）を1回の走査で索引化する。
+
+CSV は「日付」列に看護師名、数字の列に日にち（21〜20。1か月を超える期間は「月/日」）、
+「曜日」行に曜日、「特記事項」列に自由記述を持つ。各最適化ステージはこの索引を参照する。
+"""
+from typing import NamedTuple
+import re
+
+import pandas as pd
+
+from config import HOLIDAY_MAP
+
+# 希望種別 → Strict に反映するシフト
+REQUEST_SHIFT = {
+    '①': '休',
+    '②': '休',
+    '③': '休/',
+    '④': '/休',
+    '⑤': '/休',
+}
+
+NAME_COLUMN = '日付'
+WEEKDAY_ROW = '曜日'
+NOTES_COLUMN = '特記事項'
+WEEKDAY_LABELS = '月火水木金土日'
+DAY_COLUMN = re.compile(r'\d{1,2}(/\d{1,2})?')
+
+
+class DayRequest(NamedTuple):
+    day: int   # 期間内のインデックス
+    kind: str  # 希望種別（①〜⑤）
+
+    @property
+    def shift(self) -> str:
+        return REQUEST_SHIFT[self.kind]
+
+
+class RequestIndex:
+    """看護師 → 希望（日付順）、日 → 希望者の索引。
+
+    unknown には HOLIDAY_MAP に無い記号の (看護師, 日にち, 記号) が、
+    issues には曜日の不一致など読み込み時の注意点が入る。
+    """
+
+    def __init__(self, nurses, by_nurse, notes=None, unknown=None, issues=None):
+        self.nurses = list(nurses)
+        self.by_nurse = {n: sorted(by_nurse.get(n, [])) for n in self.nurses}
+        self.notes = notes or {}
+        self.unknown = unknown or []
+        self.issues = issues or []
+        self.by_day = {}
+        self._cells = {}
+        for n, reqs in self.by_nurse.items():
+            for r in reqs:
+                self.by_day.setdefault(r.day, []).append((n, r.kind))
+                self._cells[n, r.day] = r
+
+    @classmethod
+    def from_csv(cls, path, period, strict=False) -> 'RequestIndex':
+        return cls.from_frame(pd.read_csv(path, dtype=str), period, strict)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, period, strict=False) -> 'RequestIndex':
+        """希望休CSVの DataFrame から索引を作成する。
+
+        strict=True のとき未知の記号があれば ValueError を送出する。
+        """
+        columns = list(df.columns)
+        name_pos = columns.index(NAME_COLUMN)
+        notes_pos = columns.index(NOTES_COLUMN) if NOTES_COLUMN in columns else None
+        day_cols = [(pos, int(col) if str(col).strip().isdigit() else str(col).strip())
+                    for pos, col in enumerate(columns) if DAY_COLUMN.fullmatch(str(col).strip())]
+
+        nurses, by_nurse, notes, unknown, issues = [], {}, {}, [], []
+        for row in df.itertuples(index=False, name=None):
+            name = row[name_pos]
+            if _blank(name):
+                continue
+            name = str(name).strip()
+            if name == WEEKDAY_ROW:
+                issues.extend(_check_weekdays(row, day_cols, period))
+                continue
+            nurses.append(name)
+            reqs = by_nurse.setdefault(name, [])
+            for pos, day in day_cols:
+                value = row[pos]
+                if _blank(value):
+                    continue
+                symbol = str(value).strip()
+                if symbol not in HOLIDAY_MAP:
+                    unknown.append((name, day, symbol))
+                    continue
+                try:
+                    idx = period.label_to_index(day)
+                except KeyError:
+                    issues.append(f'{name}: {day}日は期間外です（{symbol}）')
+                    continue
+                reqs.append(DayRequest(idx, symbol))
+            if notes_pos is not None and not _blank(row[notes_pos]):
+                notes[name] = str(row[notes_pos]).strip()
+
+        if unknown:
+            listed = '、'.join(f'{n} {d}日「{s}」' for n, d, s in unknown)
+            if strict:
+                raise ValueError(f'未知の希望記号があります: {listed}')
+            issues.append(f'未知の希望記号を無視しました: {listed}')
+        return cls(nurses, by_nurse, notes, unknown, issues)
+
+    def __len__(self):
+        return len(self.nurses)
+
+    def get(self, nurse, day) -> DayRequest | None:
+        """nurse の day（期間内インデックス）の希望。無ければ None。"""
+        return self._cells.get((nurse, day))
+
+    def subset(self, nurses) -> 'RequestIndex':
+        """指定した看護師だけの索引を返す。"""
+        keep = set(nurses)
+        return RequestIndex([n for n in self.nurses if n in keep], self.by_nurse,
+                            self.notes, self.unknown, self.issues)
+
+
+def as_request_index(requests, period) -> RequestIndex:
+    """DataFrame（希望休CSV）なら索引化し、RequestIndex ならそのまま返す。"""
+    if isinstance(requests, RequestIndex):
+        return requests
+    return RequestIndex.from_frame(requests, period)
+
+
+def _blank(value) -> bool:
+    return value is None or (not isinstance(value, str) and pd.isna(value)) or str(value).strip() == ''
+
+
+def _check_weekdays(row, day_cols, period):
+    issues = []
+    for pos, day in day_cols:
+        label = row[pos]
+        if _blank(label):
+            continue
+        try:
+            dt = period.date_of(period.label_to_index(day))
+        except KeyError:
+            continue
+        if str(label).strip() != WEEKDAY_LABELS[dt.weekday()]:
+            issues.append(f'{day}日の曜日が {label} になっています（{WEEKDAY_LABELS[dt.weekday()]}）')
+    return issues
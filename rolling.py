@@ -0,0 +1,173 @@
+"""連続する複数の期間を、前期間の境界の状態を引き継ぎながら順に作成する（ローリングホライズン）。
+
+    python rolling.py --start 2025-08 --periods 12 --requests 'data/req_shift_{month}.csv'
+
+期間 N と次の期間 N+1 をまとめた2期間のモデルで解き、N だけを確定する（モデルの大きさは期間数によらない）。
+確定した期間は変更せず、その末尾（最終日の夜勤・連続勤務/休みの日数）と累計の夜勤・早日残日の回数を
+BoundaryState として固定したうえで、1期間ずらして N+1・N+2 を解き直す（前回の N+1 の仮の割当は初期解ヒント）。
+最後の期間は1期間分のモデルで解く。--no-lookahead のときはすべての期間を1期間ずつ解く。
+希望休CSVが無い期間は希望なしとして作成する。各期間の結果と引き継いだ状態は
+output_dir/<年>-<月>/ に書き出し、--state でその boundary.json から続きを作成できる。
+"""
+from dataclasses import dataclass
+from pathlib import Path
+import argparse
+import sys
+import time
+
+from boundary import BoundaryState
+from config import Config, default_config
+from period import PeriodCalendar
+
+DEFAULT_REQUESTS = 'data/req_shift_{month}.csv'
+
+
+@dataclass
+class PeriodPlan:
+    config: Config
+    schedule: object  # pipeline.Schedule
+    boundary: BoundaryState  # この期間までを確定したあとの状態（次の期間に渡す）
+    elapsed: float
+
+
+def horizon_configs(base: Config, year, month, periods, requests=DEFAULT_REQUESTS) -> list[Config]:
+    """year/month から periods 期間分の Config（requests は {year}・{month} を含むパス）。"""
+    configs = []
+    for i in range(periods):
+        y, m = divmod(month - 1 + i, 12)
+        y, m = year + y, m + 1
+        configs.append(base.variant(year=y, month=m, req_shift_path=requests.format(year=y, month=m)))
+    return configs
+
+
+def period_requests(config: Config, nurses=None):
+    """config の希望休。CSV が無ければ nurses の希望なしの索引。"""
+    from request_index import RequestIndex
+
+    if Path(config.req_shift_path).exists() or nurses is None:
+        return config.requests
+    return RequestIndex(nurses, {}, issues=[f'{config.req_shift_path} が無いため希望なしで作成しました'])
+
+
+def window_requests(requests, following, offset):
+    """requests と次の期間の希望 following を、following の日を offset ずらして1つの索引にする。
+
+    看護師は requests の看護師に揃える。
+    """
+    from request_index import DayRequest, RequestIndex
+
+    by_nurse = {n: list(requests.by_nurse.get(n, []))
+                + [DayRequest(r.day + offset, r.kind) for r in following.by_nurse.get(n, [])]
+                for n in requests.nurses}
+    return RequestIndex(requests.nurses, by_nurse, requests.notes, requests.unknown, requests.issues)
+
+
+def solve_window(config, requests, following: Config, following_requests, params=None, state=None, hint=None):
+    """config の期間と次の期間 following をまとめた2期間のモデルを解く。
+
+    (config の期間の pipeline.Schedule, following の期間の仮のシフト表) を返す。
+    休みスコアの目標と夜勤回数の上下限は期間ごとに課す。
+    第2木曜日（久保の/訪）は config の期間の分だけ反映する（following の分は次の窓で解き直す）。
+    """
+    from optimize_cp import solve_schedule
+    from pipeline import Schedule, ScheduleError
+    from solver_params import SolverParams
+
+    days = config.period.days
+    window = PeriodCalendar(config.year, config.month, days=days + following.period.days)
+    solve_log = []
+    shifts = solve_schedule(window_requests(requests, following_requests, days), requests.nurses, window,
+                            params or SolverParams.from_config(config), solve_log, hint,
+                            target_rest_score=config.target_rest_score, yakin_workers=config.yakin_workers,
+                            weekday_crew=config.weekday_crew, encoding=config.encoding, boundary=state,
+                            splits=(days,))
+    if shifts is None:
+        raise ScheduleError(f'制約を満たす解が見つかりませんでした。（{solve_log[-1]["status"]}）')
+    ahead = shifts.iloc[:, days:]
+    ahead.columns = [f'day_{d}' for d in range(ahead.shape[1])]
+    return Schedule(shifts=shifts.iloc[:, :days], solve_log=solve_log, issues=requests.issues), ahead
+
+
+def _consecutive(config, following) -> bool:
+    return (following.period.start - config.period.end).days == 1
+
+
+def plan_horizon(configs, params=None, state: BoundaryState | None = None, output_dir=None,
+                 excel=False, lookahead=True) -> list[PeriodPlan]:
+    """configs の期間を順に作成する。解が無い期間があれば pipeline.ScheduleError を送出する。
+
+    lookahead=True のときは次の期間とまとめた2期間のモデルで解き、各期間を確定する（モジュールの説明を参照）。
+    """
+    from pipeline import ScheduleError, build_schedule
+
+    plans, hint = [], None
+    requests = period_requests(configs[0]) if configs else None
+    for i, config in enumerate(configs):
+        started = time.perf_counter()
+        following = configs[i + 1] if i + 1 < len(configs) else None
+        following_requests = None if following is None else period_requests(following, requests.nurses)
+        try:
+            if lookahead and following is not None and _consecutive(config, following):
+                schedule, hint = solve_window(config, requests, following, following_requests, params, state, hint)
+            else:
+                schedule = build_schedule(requests, config, params=params, hint=hint, boundary=state)
+                hint = None
+        except ScheduleError as e:
+            raise ScheduleError(f'{config.year}年{config.month}月: {e}') from e
+        state = BoundaryState.from_schedule(schedule.shifts, state, config.period)
+        requests = following_requests
+        plans.append(PeriodPlan(config, schedule, state, time.perf_counter() - started))
+        if output_dir is not None:
+            out = Path(output_dir) / f'{config.year}-{config.month:02d}'
+            out.mkdir(parents=True, exist_ok=True)
+            schedule.save(out / 'schedule.npz')
+            schedule.to_csv(out / 'shift_final.csv', out / 'shift_summary.csv')
+            schedule.write_solve_log(out / 'solve_log.json')
+            state.write(out / 'boundary.json')
+            if excel:
+                schedule.to_excel(config.template_path, out / 'shift_output.xlsx', config.period)
+    return plans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='連続する期間のシフト表を境界の状態を引き継ぎながら作成します。')
+    parser.add_argument('--config', help='基準の設定ファイル（main.py の --config と同じ）')
+    parser.add_argument('--start', help='最初の期間（YYYY-MM。省略時は設定の year/month）')
+    parser.add_argument('--periods', type=int, default=12, help='作成する期間の数')
+    parser.add_argument('--requests', default=DEFAULT_REQUESTS,
+                        help='希望休CSVのパス（{year}・{month} を期間の値に置き換える）')
+    parser.add_argument('--state', help='前期間の boundary.json（続きから作成する）')
+    parser.add_argument('--output-dir', default='output/rolling', help='出力先ディレクトリ')
+    parser.add_argument('--excel', action='store_true', help='期間ごとに Excel も出力する')
+    parser.add_argument('--no-lookahead', dest='lookahead', action='store_false',
+                        help='次の期間を見越さず1期間ずつ解く')
+    parser.add_argument('--workers', type=int, help='CP-SAT の探索ワーカー数')
+    parser.add_argument('--time-limit', type=float, help='期間ごとの求解時間の上限（秒）')
+    args = parser.parse_args(argv)
+
+    base = Config.from_file(args.config) if args.config else default_config()
+    year, month = map(int, args.start.split('-')) if args.start else (base.year, base.month)
+    configs = horizon_configs(base, year, month, args.periods, args.requests)
+    state = BoundaryState.read(args.state) if args.state else None
+
+    from pipeline import ScheduleError
+    from solver_params import SolverParams
+
+    params = SolverParams.from_config(base, num_workers=args.workers, max_time_in_seconds=args.time_limit)
+    try:
+        plans = plan_horizon(configs, params, state, args.output_dir, args.excel, args.lookahead)
+    except ScheduleError as e:
+        print(f"❌ {e}")
+        return 1
+    for plan in plans:
+        info = plan.schedule.solve_log[-1]
+        print(f"{plan.config.year}-{plan.config.month:02d} {info['status']:<8} "
+              f"objective={info.get('objective', 0):g} {plan.elapsed:.1f}s")
+        for issue in plan.schedule.issues:
+            print(f"⚠️ {issue}")
+    print(f"✅ {len(plans)}期間のシフト表を {args.output_dir} に保存しました。")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""設定の一部を変えた複数のシナリオを並列に解き、結果を比較する（what-if 分析）。
+
+    python scenarios.py --grid target_rest_score=12.5,13 --grid yakin_workers=-前野 --grid weekday_crew=7,8
+
+--grid の値はカンマ区切り。yakin_workers は基準の夜勤メンバーに対する差分（-前野, +御書, -前野+御書）、
+weekday_crew の auto は8人体制優先（既定）を表す。希望休の読み込みと期間のカレンダーは
+基準の設定で1回だけ作成し、全シナリオで共有する。求解設定をシナリオごとに変えるときは
+--grid-file に {"solver_params": [{"random_seed": 1}, {"random_seed": 2}]} のように書く。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+import argparse
+import json
+import re
+import sys
+import time
+
+from config import Config, default_config
+
+BASE_SCENARIO = 'base'
+
+
+def expand_grid(grid: dict, base: Config | None = None) -> list[tuple[str, dict]]:
+    """{項目: [値, ...]} の全組み合わせを (シナリオ名, 上書きする値) のリストにする。"""
+    keys = list(grid)
+    scenarios = []
+    for values in product(*(grid[k] for k in keys)):
+        overrides = dict(zip(keys, values))
+        scenarios.append((', '.join(f'{k}={_label(k, v, base)}' for k, v in overrides.items()), overrides))
+    return scenarios
+
+
+def _label(key, value, base) -> str:
+    if key == 'yakin_workers' and base is not None:
+        removed = [n for n in base.yakin_workers if n not in value]
+        added = [n for n in value if n not in base.yakin_workers]
+        return ''.join([f'-{n}' for n in removed] + [f'+{n}' for n in added]) or '基準'
+    if isinstance(value, (list, tuple)):
+        return '/'.join(map(str, value))
+    return 'auto' if value is None else str(value)
+
+
+def parse_grid_value(key, text, base: Config):
+    """--grid の値1つを Config の値に変換する。"""
+    text = text.strip()
+    if key == 'yakin_workers':
+        workers = list(base.yakin_workers)
+        for sign, name in re.findall(r'([+-])([^+-]+)', text):
+            name = name.strip()
+            if sign == '-' and name in workers:
+                workers.remove(name)
+            elif sign == '+' and name not in workers:
+                workers.append(name)
+        return tuple(workers)
+    if text.lower() in ('auto', 'none'):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def schedule_metrics(shifts, config: Config) -> dict:
+    """シフト表の比較用の指標（休みスコアの偏り・夜勤回数・配置の不足・7人体制の日数）。"""
+    from optimize_2 import rest_totals
+    from period import WEEKDAY
+    from validator import validate
+
+    rest = rest_totals(shifts)
+    target = config.target_rest_score
+    weekdays = [f'day_{d}' for d, t in enumerate(config.period.day_types)
+                if t == WEEKDAY and not config.period.is_full(d)]
+    row = {
+        'rest_min': min(rest.values()),
+        'rest_max': max(rest.values()),
+        'rest_spread': max(rest.values()) - min(rest.values()),
+        'rest_shortfall': sum(max(0.0, target - r) for r in rest.values()),
+        'uncovered_days': len(validate(shifts, config.period, yakin_workers=config.yakin_workers,
+                                       target_rest_score=target, rules=('coverage', 'night_coverage'))),
+        'short_crew_days': int((shifts[weekdays] == '2・CT').any(axis=0).sum()),
+    }
+    nights = (shifts == '夜').sum(axis=1)
+    for n in shifts.index:
+        if nights[n] or n in config.yakin_workers:
+            row[f'夜:{n}'] = int(nights[n])
+    return row
+
+
+def run_scenario(name, config: Config, solver_overrides=None) -> dict:
+    """1シナリオを解いて比較表の1行（dict）を返す（例外は送出しない）。
+
+    求解設定はシナリオの config の solver_params から作り、solver_overrides（コマンドラインの
+    --threads など、None の項目は無視）で上書きする。
+    """
+    from pipeline import ScheduleError, build_schedule
+    from solver_params import SolverParams
+
+    row = {'scenario': name}
+    started = time.perf_counter()
+    solve_log = []
+    try:
+        params = SolverParams.from_config(config, **(solver_overrides or {}))
+        schedule = build_schedule(config=config, params=params)
+        solve_log = schedule.solve_log
+    except ScheduleError as e:
+        row.update(feasible=False, status=str(e))
+    except Exception as e:
+        row.update(feasible=False, status=f'{type(e).__name__}: {e}')
+    else:
+        row.update(feasible=True, status=solve_log[-1]['status'], soft_rest=len(solve_log) > 1)
+        row.update(schedule_metrics(schedule.shifts, config))
+    row['solve_time'] = sum(info['wall_time'] for info in solve_log)
+    row['elapsed'] = time.perf_counter() - started
+    return row
+
+
+def run_scenarios(grid: dict, base: Config | None = None, solver_overrides=None, workers=None,
+                  include_base=True):
+    """grid の各シナリオを workers プロセスで並列に解き、比較表（DataFrame）を返す。
+
+    grid に solver_params を含めると、シナリオごとに求解設定を変えられる。
+    """
+    import pandas as pd
+
+    base = base or default_config()
+    base.requests  # 希望休と期間はここで1回だけ読み込み、各シナリオに引き継ぐ
+    scenarios = ([(BASE_SCENARIO, {})] if include_base else []) + expand_grid(grid, base)
+    configs = [(name, base.variant(**overrides)) for name, overrides in scenarios]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_scenario, name, config, solver_overrides) for name, config in configs]
+        rows = [f.result() for f in futures]
+    return pd.DataFrame(rows).set_index('scenario')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='設定を変えたシナリオを並列に解いて比較します。')
+    parser.add_argument('--config', help='基準の設定ファイル（main.py の --config と同じ）')
+    parser.add_argument('--grid', action='append', default=[], metavar='KEY=V1,V2',
+                        help='変える項目と値（複数指定で全組み合わせ）')
+    parser.add_argument('--grid-file', help='{項目: [値, ...]} の JSON / TOML')
+    parser.add_argument('--workers', type=int, help='同時に解くシナリオ数（省略時は CPU 数）')
+    parser.add_argument('--threads', type=int, help='シナリオごとの CP-SAT 探索ワーカー数')
+    parser.add_argument('--time-limit', type=float, help='シナリオごとの求解時間の上限（秒）')
+    parser.add_argument('--output', default='output/scenarios.csv', help='比較表の出力先')
+    args = parser.parse_args(argv)
+
+    base = Config.from_file(args.config) if args.config else default_config()
+    grid = {}
+    if args.grid_file:
+        path = Path(args.grid_file)
+        if path.suffix == '.toml':
+            import tomllib
+            with open(path, 'rb') as f:
+                grid.update(tomllib.load(f))
+        else:
+            with open(path, encoding='utf-8') as f:
+                grid.update(json.load(f))
+    for item in args.grid:
+        key, _, values = item.partition('=')
+        grid[key.strip()] = [parse_grid_value(key.strip(), v, base) for v in values.split(',')]
+
+    overrides = {'num_workers': args.threads, 'max_time_in_seconds': args.time_limit}
+    table = run_scenarios(grid, base, overrides, args.workers)
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(out, encoding='utf-8-sig')
+    print(table.to_string())
+    print(f"✅ 比較表を {out} に保存しました。")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
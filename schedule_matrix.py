@@ -0,0 +1,123 @@
+"""シフト表の整数行列表現（看護師 × 日の int8 配列）。
+
+貪欲割り振りと後処理はこの行列上で行い、DataFrame や文字列への変換は入出力時のみ行う。
+"""
+import numpy as np
+import pandas as pd
+
+from config import SHIFT_TYPES, FULL_OFF_SHIFTS, HALF_OFF_SHIFTS
+
+EMPTY = 0  # 未割当
+SHIFT_CODES = ('',) + tuple(SHIFT_TYPES)
+CODE = {s: i for i, s in enumerate(SHIFT_CODES)}
+
+
+def code_mask(shifts) -> np.ndarray:
+    """シフトコード → bool の対応表（codes 配列の添字にそのまま使える）。"""
+    mask = np.zeros(len(SHIFT_CODES), dtype=bool)
+    mask[[CODE[s] for s in shifts]] = True
+    return mask
+
+
+FULL_OFF = code_mask(FULL_OFF_SHIFTS)
+HALF_OFF = code_mask(HALF_OFF_SHIFTS)
+OFF = FULL_OFF | HALF_OFF
+# 休=2, 半休=1 の休みスコア
+REST_POINTS = (FULL_OFF * 2 + HALF_OFF).astype(np.int8)
+# 出勤（割当済みで休みでない）
+WORK = ~OFF
+WORK[EMPTY] = False
+
+
+def encode(value) -> int:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return EMPTY
+    if not isinstance(value, str):
+        value = str(int(value))  # 出力用に整数化された 1〜4
+    try:
+        return CODE[value]
+    except KeyError:
+        raise ValueError(f'unknown shift: {value!r}') from None
+
+
+class ShiftCounters:
+    """看護師 × シフトコードの割当数・休みスコア・日ごとの出勤者数。
+
+    ScheduleMatrix.set / swap を通した更新ごとに O(1) で追従する。
+    """
+
+    def __init__(self, codes: np.ndarray):
+        self.by_code = np.stack([np.bincount(row, minlength=len(SHIFT_CODES)) for row in codes]) \
+            if len(codes) else np.zeros((0, len(SHIFT_CODES)), dtype=np.int64)
+        self.rest = REST_POINTS[codes].sum(axis=1, dtype=np.int64)
+        self.work_per_day = WORK[codes].sum(axis=0, dtype=np.int64)
+
+    def move(self, i, d, old, new):
+        self.by_code[i, old] -= 1
+        self.by_code[i, new] += 1
+        self.rest[i] += int(REST_POINTS[new]) - int(REST_POINTS[old])
+        self.work_per_day[d] += int(WORK[new]) - int(WORK[old])
+
+
+class ScheduleMatrix:
+    """codes[i, d] は看護師 nurses[i] の d 日目のシフトコード。
+
+    fixed[i, d] は前段（optimize_1 など）で割当済みで変更してはいけないセル。
+    codes への書き込みは set / swap / fill_empty を通し、counters を最新に保つ。
+    """
+
+    def __init__(self, nurses, codes: np.ndarray, fixed: np.ndarray | None = None, columns=None):
+        self.nurses = list(nurses)
+        self.codes = codes
+        self.fixed = fixed if fixed is not None else codes != EMPTY
+        self.columns = list(columns) if columns is not None else [f'day_{i}' for i in range(codes.shape[1])]
+        self.index = {n: i for i, n in enumerate(self.nurses)}
+        self.counters = ShiftCounters(codes)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'ScheduleMatrix':
+        """index=看護師, 列=day_i の DataFrame から作成する。空欄は未割当（fixed=False）。"""
+        codes = np.array([[encode(v) for v in row] for row in df.itertuples(index=False)], dtype=np.int8)
+        codes = codes.reshape(len(df.index), len(df.columns))
+        return cls(df.index.tolist(), codes, columns=df.columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        labels = np.array(SHIFT_CODES, dtype=object)[self.codes]
+        labels[self.codes == EMPTY] = None
+        return pd.DataFrame(labels, index=pd.Index(self.nurses, name='nurse'), columns=self.columns)
+
+    def copy(self) -> 'ScheduleMatrix':
+        return ScheduleMatrix(self.nurses, self.codes.copy(), self.fixed.copy(), self.columns)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    def set(self, i, d, code):
+        old = self.codes[i, d]
+        if old != code:
+            self.codes[i, d] = code
+            self.counters.move(i, d, old, code)
+
+    def swap(self, i, d, j, e):
+        """(i, d) と (j, e) のシフトを入れ替える。"""
+        a, b = self.codes[i, d], self.codes[j, e]
+        self.set(i, d, b)
+        self.set(j, e, a)
+
+    def fill_empty(self, code):
+        """未割当のセルをすべて code にする。"""
+        self.codes[self.codes == EMPTY] = code
+        self.counters = ShiftCounters(self.codes)
+
+    def count(self, i, code) -> int:
+        """看護師 i の code の割当数。"""
+        return int(self.counters.by_code[i, code])
+
+    def rest_points(self) -> np.ndarray:
+        """看護師ごとの休みスコア（休=2, 半休=1）。"""
+        return self.counters.rest.copy()
+
+    def after_night(self, i, d) -> bool:
+        """夜勤明けの×（動かしてはいけない）かどうか。"""
+        return self.codes[i, d] == CODE['×'] and d > 0 and self.codes[i, d - 1] == CODE['夜']
@@ -0,0 +1,500 @@
+"""ローカルで常駐してシフト作成のジョブを受け付ける HTTP サービス（asyncio、標準ライブラリのみ）。
+
+    python service.py --port 8765 --workers 2
+
+127.0.0.1 だけで待ち受け、外部のサービスは使わない。期間の暦と登録した希望休（名簿）の索引は
+名簿・期間ごとに1回だけサービスのプロセスで作り、ジョブには編集を反映した索引と Config を渡す。
+import 済みのモジュール（ortools・pandas）と Excel テンプレートはワーカープロセスに保持したまま
+ジョブを解くので、ジョブごとの起動・読み込み・解析の待ち時間が無い。同時に解くのは
+workers 件までで、待ち行列が queue_size 件を超えたジョブは 503 で断る。
+
+    GET  /health
+    PUT  /rosters/<名前>       希望休CSVを名簿として登録する（本文は CSV）
+    POST /jobs                 ジョブを登録する。本文が CSV ならその希望休で、JSON なら
+                               {"roster": 名前, "year", "month", "engine", "time_limit", "threads", "excel",
+                                "edits": [{"nurse": 名前, "day": "21", "request": "①"}, ...]}
+                               （CSV のときは ?year=&month=&engine=&time_limit=&threads=&excel=1）
+                               threads は CP-SAT の探索ワーカー数（省略時は設定の値）
+    GET  /jobs/<id>            ジョブの状態（queued / running / done / infeasible / failed）
+    GET  /jobs/<id>/events     状態の変化を1行1つの JSON で流し、終わったら結果を送って閉じる
+    GET  /jobs/<id>/result     シフト表（JSON。?format=csv で CSV、?format=xlsx で Excel）
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+import argparse
+import asyncio
+import ipaddress
+import json
+import multiprocessing
+import signal
+import sys
+import time
+import traceback
+import uuid
+
+from config import Config, default_config
+
+MAX_BODY = 10 * 2**20
+FINISHED = ('done', 'infeasible', 'failed')
+STATUS_TEXT = {200: 'OK', 201: 'Created', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+               500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Job:
+    id: str
+    spec: dict  # year, month, engine, time_limit, threads, excel
+    requests: object  # 編集を反映した希望休の RequestIndex
+    status: str = 'queued'
+    created: float = field(default_factory=time.time)
+    result: dict | None = None
+    error: str | None = None
+    events: list = field(default_factory=list)
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def update(self, status, **info):
+        self.status = status
+        self.events.append({'job': self.id, 'status': status, 'time': time.time(), **info})
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        data = {'id': self.id, 'status': self.status, **self.spec, 'created': self.created}
+        if self.error:
+            data['error'] = self.error
+        if self.result:
+            data.update({k: self.result[k] for k in ('elapsed', 'issues', 'violations', 'solve') if k in self.result})
+        return data
+
+
+# ==========ワーカープロセス==========
+def _init_worker(base: Config):
+    """重いモジュールとテンプレートを先に読み込んでおく。"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C はサービスのプロセスが受けて pool を閉じる
+    import pipeline  # noqa: F401  ortools・pandas の import
+    from excel_export import load_template
+    if Path(base.template_path).exists():
+        load_template(base.template_path)
+
+
+def _ready():
+    return True
+
+
+def solve_job(spec: dict, config: Config, requests, output_dir=None) -> dict:
+    """ワーカープロセスで1ジョブを解き、JSON にできる結果を返す。解が無ければ status='infeasible'。
+
+    config はジョブの期間の Config、requests は希望休の RequestIndex（どちらもサービスのプロセスで作ったもの）。
+    """
+    import artifact
+    from pipeline import ScheduleError, build_schedule
+    from solver_params import SolverParams
+    from validator import summarize, validate
+
+    started = time.perf_counter()
+    params = SolverParams.from_config(config, max_time_in_seconds=spec.get('time_limit'),
+                                      num_workers=spec.get('threads'))
+    try:
+        schedule = build_schedule(requests, config, engine=spec['engine'], params=params)
+    except ScheduleError as e:
+        return {'status': 'infeasible', 'error': str(e), 'issues': requests.issues,
+                'elapsed': time.perf_counter() - started}
+    shifts = schedule.shifts
+    result = {
+        'status': 'done',
+        'columns': list(shifts.columns),
+        'shifts': {n: [None if v is None or v != v else v for v in row] for n, row in
+                   zip(shifts.index, shifts.itertuples(index=False, name=None))},
+        'issues': schedule.issues,
+        'violations': summarize(validate(shifts, config.period, requests, config.yakin_workers,
+                                         config.target_rest_score)),
+        'solve': [{k: info.get(k) for k in ('name', 'status', 'objective', 'wall_time')} for info in schedule.solve_log],
+    }
+    if output_dir is not None:
+        out = Path(output_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        artifact.save(out / 'schedule.npz', schedule.shifts)
+        if spec.get('excel'):
+            schedule.to_excel(config.template_path, out / 'shift_output.xlsx', config.period)
+            result['excel'] = str(out / 'shift_output.xlsx')
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+# ==========サービス==========
+class ScheduleService:
+    """ジョブの待ち行列と、それを解く workers 個の非同期タスク・ワーカープロセス。"""
+
+    def __init__(self, base: Config | None = None, workers=1, queue_size=16, output_dir=None, max_jobs=1000):
+        self.base = base or default_config()
+        self.workers = workers
+        self.output_dir = None if output_dir is None else Path(output_dir)
+        self.max_jobs = max_jobs
+        self.jobs: dict[str, Job] = {}
+        self.rosters = {}  # 名前 → 希望休CSVの DataFrame
+        self.indexes = {}  # (名前, 年, 月) → 名簿の RequestIndex
+        self.configs = {}  # (年, 月) → Config（期間の暦を保持する）
+        self.queue = asyncio.Queue(queue_size)
+        self.pool = None
+        self.server = None
+        self._tasks = []
+
+    async def start(self, host='127.0.0.1', port=8765):
+        if not ipaddress.ip_address(host).is_loopback:
+            raise ValueError(f'service listens on localhost only: {host}')
+        # fork するとワーカーが接続中のソケットとイベントループを引き継ぐので spawn で起動する
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker, initargs=(self.base,))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ready) for _ in range(self.workers)))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    # ----------ジョブ----------
+    def config(self, year, month) -> Config:
+        key = (year, month)
+        if key not in self.configs:
+            # variant は読み込み済みの希望休CSVも引き継ぐが、ジョブごとにワーカーへ送るので持たせない
+            self.configs[key] = replace(self.base, year=year, month=month)
+        return self.configs[key]
+
+    def add_roster(self, name, requests):
+        """名簿 name を登録する（前に作った索引は捨てる）。"""
+        self.rosters[name] = requests
+        for key in [k for k in self.indexes if k[0] == name]:
+            del self.indexes[key]
+
+    def roster_requests(self, name, year, month):
+        """名簿 name の year/month の期間の索引（名簿・期間ごとに1回だけ作る）。"""
+        if name not in self.rosters:
+            raise HTTPError(404, f'unknown roster: {name}')
+        key = (name, year, month)
+        if key not in self.indexes:
+            self.indexes[key] = _index(self.rosters[name], self.config(year, month).period)
+        return self.indexes[key]
+
+    def submit(self, spec: dict, requests) -> Job:
+        job = Job(uuid.uuid4().hex[:12], spec, requests)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPError(503, f'queue is full ({self.queue.maxsize} jobs waiting)') from None
+        self.jobs[job.id] = job
+        job.update('queued', position=self.queue.qsize())
+        self._prune()
+        return job
+
+    def _prune(self):
+        finished = [j for j in self.jobs.values() if j.status in FINISHED]
+        for job in finished[:max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[job.id]
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.update('running')
+            out = None if self.output_dir is None else self.output_dir / job.id
+            try:
+                config = self.config(job.spec['year'], job.spec['month'])
+                result = await loop.run_in_executor(self.pool, solve_job, job.spec, config, job.requests, out)
+            except Exception as e:  # ワーカープロセスの異常終了など
+                job.error = f'{type(e).__name__}: {e}'
+                job.update('failed', error=job.error)
+            else:
+                job.result = result
+                job.error = result.get('error')
+                job.update(result['status'], elapsed=result['elapsed'])
+            finally:
+                job.requests = None
+                self.queue.task_done()
+
+    def parse_job(self, request) -> tuple[dict, object]:
+        """POST /jobs の本文から (spec, 希望休の RequestIndex)。"""
+        json_body = request.content_type == 'application/json'
+        if json_body:
+            options = _json(request.body)
+            if 'roster' not in options:
+                raise HTTPError(400, 'roster is required')
+        else:
+            options = {k: v[-1] for k, v in request.query.items()}
+        try:
+            spec = {
+                'year': int(options.get('year', self.base.year)),
+                'month': int(options.get('month', self.base.month)),
+                'engine': options.get('engine', 'cpsat'),
+                'time_limit': None if options.get('time_limit') is None else float(options['time_limit']),
+                'threads': None if options.get('threads') is None else int(options['threads']),
+                'excel': str(options.get('excel', '')).lower() in ('1', 'true', 'yes'),
+            }
+        except (TypeError, ValueError) as e:
+            raise HTTPError(400, str(e)) from None
+        if not 1 <= spec['month'] <= 12:
+            raise HTTPError(400, f'invalid month: {spec["month"]}')
+        if spec['threads'] is not None and spec['threads'] < 1:
+            raise HTTPError(400, f'invalid threads: {spec["threads"]}')
+        from pipeline import ENGINES
+        if spec['engine'] not in ENGINES:
+            raise HTTPError(400, f'unknown engine: {spec["engine"]}')
+        if spec['excel'] and self.output_dir is None:
+            raise HTTPError(400, 'excel output needs --output-dir')
+        period = self.config(spec['year'], spec['month']).period
+        if json_body:
+            requests = self.roster_requests(options['roster'], spec['year'], spec['month'])
+            return spec, apply_edits(requests, options.get('edits', []), period)
+        return spec, _index(_read_csv(request.body), period)
+
+    # ----------HTTP----------
+    async def _handle(self, reader, writer):
+        try:
+            request = await _read_request(reader)
+            await self._route(request, writer)
+        except HTTPError as e:
+            await _send(writer, e.status, {'error': str(e)})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception:
+            await _send(writer, 500, {'error': traceback.format_exc(limit=3)})
+        finally:
+            writer.close()
+
+    async def _route(self, request, writer):
+        parts = [unquote(p) for p in request.path.strip('/').split('/') if p]
+        method = request.method
+        if parts == ['health']:
+            await _send(writer, 200, {'status': 'ok', 'workers': self.workers, 'queued': self.queue.qsize(),
+                                      'jobs': len(self.jobs), 'rosters': sorted(self.rosters)})
+        elif parts[:1] == ['rosters'] and len(parts) == 2:
+            if method != 'PUT':
+                raise HTTPError(405, 'use PUT')
+            self.add_roster(parts[1], _read_csv(request.body))
+            await _send(writer, 201, {'roster': parts[1], 'nurses': len(self.rosters[parts[1]])})
+        elif parts == ['jobs']:
+            if method == 'GET':
+                await _send(writer, 200, [job.to_dict() for job in self.jobs.values()])
+            elif method == 'POST':
+                job = self.submit(*self.parse_job(request))
+                await _send(writer, 202, job.to_dict())
+            else:
+                raise HTTPError(405, 'use GET or POST')
+        elif parts[:1] == ['jobs'] and len(parts) in (2, 3):
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HTTPError(404, f'unknown job: {parts[1]}')
+            action = parts[2] if len(parts) == 3 else None
+            if action is None:
+                await _send(writer, 200, job.to_dict())
+            elif action == 'events':
+                await self._stream(job, writer)
+            elif action == 'result':
+                await self._result(job, request.query.get('format', ['json'])[-1], writer)
+            else:
+                raise HTTPError(404, request.path)
+        else:
+            raise HTTPError(404, request.path)
+
+    async def _stream(self, job, writer):
+        """状態の変化を NDJSON のチャンクで送り、終わったら結果を送って閉じる。"""
+        writer.write(_head(200, 'application/x-ndjson', chunked=True))
+        sent = 0
+        while True:
+            changed = job.changed
+            for event in job.events[sent:]:
+                _write_chunk(writer, _dumps(event) + b'\n')
+            sent = len(job.events)
+            await writer.drain()
+            if job.status in FINISHED:
+                break
+            await changed.wait()
+        if job.result is not None:
+            _write_chunk(writer, _dumps({'job': job.id, 'result': job.result}) + b'\n')
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def _result(self, job, fmt, writer):
+        if job.status not in FINISHED:
+            raise HTTPError(409, f'job is {job.status}')
+        if job.status != 'done':
+            raise HTTPError(409, job.error or job.status)
+        if fmt == 'json':
+            await _send(writer, 200, job.result)
+        elif fmt == 'csv':
+            import pandas as pd
+            from optimize_2 import summarize, to_output_frame
+            df = pd.DataFrame.from_dict(job.result['shifts'], orient='index', columns=job.result['columns'])
+            body = summarize(to_output_frame(df)).to_csv(encoding='utf-8-sig').encode('utf-8-sig')
+            await _send(writer, 200, body, 'text/csv; charset=utf-8')
+        elif fmt == 'xlsx':
+            if 'excel' not in job.result:
+                raise HTTPError(404, 'job was submitted without excel=1')
+            await _send(writer, 200, Path(job.result['excel']).read_bytes(),
+                        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        else:
+            raise HTTPError(400, f'unknown format: {fmt}')
+
+
+def apply_edits(requests, edits, period):
+    """希望の索引 requests に edits（{"nurse", "day", "request"}。request が空なら希望を消す）を反映した新しい索引。
+
+    day は希望休CSVの列名（period の日）。requests は変更しない。
+    """
+    from request_index import REQUEST_SHIFT, DayRequest, RequestIndex
+
+    by_nurse = {n: list(reqs) for n, reqs in requests.by_nurse.items()}
+    for edit in edits:
+        try:
+            nurse, day = str(edit['nurse']), str(edit['day'])
+        except (KeyError, TypeError):
+            raise HTTPError(400, f'edit needs nurse and day: {edit!r}') from None
+        try:
+            index = period.label_to_index(day)
+        except (KeyError, ValueError):
+            index = None
+        if nurse not in by_nurse or index is None:
+            raise HTTPError(400, f'no cell for {nurse} {day}')
+        kind = edit.get('request') or None
+        if kind is not None and kind not in REQUEST_SHIFT:
+            raise HTTPError(400, f'unknown request: {kind!r}')
+        by_nurse[nurse] = [r for r in by_nurse[nurse] if r.day != index] + ([DayRequest(index, kind)] if kind else [])
+    return RequestIndex(requests.nurses, by_nurse, requests.notes, requests.unknown, requests.issues)
+
+
+# ==========HTTP（最小限の HTTP/1.1。1リクエストごとに接続を閉じる）==========
+@dataclass
+class _Request:
+    method: str
+    path: str
+    query: dict
+    headers: dict
+    body: bytes
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('content-type', '').split(';')[0].strip()
+
+
+async def _read_request(reader) -> _Request:
+    line = (await reader.readline()).decode('latin-1').strip()
+    if not line:
+        raise ConnectionError('empty request')
+    try:
+        method, target, _ = line.split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, f'bad request line: {line!r}') from None
+    headers = {}
+    while (header := (await reader.readline()).decode('latin-1').strip()):
+        name, _, value = header.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get('content-length', '0')
+    if not (length.isascii() and length.isdigit()):  # 負の値・数字以外
+        raise HTTPError(400, f'invalid Content-Length: {length!r}')
+    length = int(length)
+    if length > MAX_BODY:
+        raise HTTPError(413, f'body is larger than {MAX_BODY} bytes')
+    body = await reader.readexactly(length) if length else b''
+    url = urlsplit(target)
+    return _Request(method.upper(), url.path, parse_qs(url.query), headers, body)
+
+
+def _head(status, content_type, length=None, chunked=False) -> bytes:
+    lines = [f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}', f'Content-Type: {content_type}',
+             'Connection: close']
+    lines.append('Transfer-Encoding: chunked' if chunked else f'Content-Length: {length}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def _write_chunk(writer, data: bytes):
+    writer.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+async def _send(writer, status, body, content_type='application/json; charset=utf-8'):
+    if not isinstance(body, bytes):
+        body = _dumps(body)
+    writer.write(_head(status, content_type, len(body)) + body)
+    await writer.drain()
+
+
+def _json(body: bytes):
+    try:
+        return json.loads(body or b'{}')
+    except json.JSONDecodeError as e:
+        raise HTTPError(400, f'invalid JSON: {e}') from None
+
+
+def _index(requests, period):
+    """希望休CSVの DataFrame を period の索引にする（読めない CSV はワーカーに送らない）。"""
+    from request_index import RequestIndex
+    try:
+        return RequestIndex.from_frame(requests, period)
+    except (KeyError, ValueError) as e:
+        raise HTTPError(400, f'invalid requests: {e}') from None
+
+
+def _read_csv(body: bytes):
+    import pandas as pd
+    try:
+        return pd.read_csv(BytesIO(body), dtype=str, encoding='utf-8-sig')
+    except Exception as e:
+        raise HTTPError(400, f'invalid CSV: {e}') from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='シフト作成のジョブを受け付けるローカルサービスを起動します。')
+    parser.add_argument('--config', help='基準の設定ファイル（main.py の --config と同じ）')
+    parser.add_argument('--host', default='127.0.0.1', help='待ち受けるアドレス（ループバックのみ）')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=1, help='同時に解くジョブの数（ワーカープロセス数）')
+    parser.add_argument('--queue', type=int, default=16, help='待ち行列に入れられるジョブの数')
+    parser.add_argument('--roster', action='append', default=[], metavar='名前=CSV',
+                        help='起動時に登録する名簿（複数指定可）')
+    parser.add_argument('--output-dir', help='ジョブごとの schedule.npz・Excel の出力先')
+    args = parser.parse_args(argv)
+
+    base = Config.from_file(args.config) if args.config else default_config()
+
+    async def serve():
+        service = ScheduleService(base, args.workers, args.queue, args.output_dir)
+        for item in args.roster:
+            name, _, path = item.partition('=')
+            service.add_roster(name, _read_csv(Path(path).read_bytes()))
+        port = await service.start(args.host, args.port)
+        print(f"✅ http://{args.host}:{port} で待ち受けています（workers={args.workers}）。Ctrl+C で終了します。")
+        try:
+            await service.server.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""CP-SAT の探索パラメータと求解ログ。"""
+from dataclasses import asdict, dataclass, fields, replace
+import time
+
+from ortools.sat.python import cp_model
+
+import instrument
+
+# presolve_level: 0=presolve無し, 1=1回のみ, 2=既定
+PRESOLVE_LEVELS = (0, 1, 2)
+
+
+@dataclass(frozen=True)
+class SolverParams:
+    """CpSolver に渡す探索パラメータ。None の項目は CP-SAT の既定値のまま。"""
+    num_workers: int | None = None
+    max_time_in_seconds: float | None = None
+    relative_gap_limit: float | None = None
+    random_seed: int | None = None
+    presolve_level: int = 2
+    max_memory_in_mb: int | None = None
+    log_search_progress: bool = False
+
+    def __post_init__(self):
+        if self.presolve_level not in PRESOLVE_LEVELS:
+            raise ValueError(f'presolve_level must be one of {PRESOLVE_LEVELS}: {self.presolve_level!r}')
+
+    @classmethod
+    def from_config(cls, config=None, **overrides):
+        """config.Config の solver_params（と overrides の None 以外の値）から作成する。
+
+        config には SOLVER_PARAMS を持つ config モジュールも渡せる。
+        """
+        if config is None:
+            from config import default_config
+            config = default_config()
+        values = dict(getattr(config, 'solver_params', None) or getattr(config, 'SOLVER_PARAMS', {}))
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        names = {f.name for f in fields(cls)}
+        unknown = set(values) - names
+        if unknown:
+            raise ValueError(f'unknown solver parameters: {sorted(unknown)}')
+        return cls(**values)
+
+    def with_overrides(self, **overrides):
+        return replace(self, **{k: v for k, v in overrides.items() if v is not None})
+
+    def to_dict(self):
+        return asdict(self)
+
+    def apply(self, solver: cp_model.CpSolver):
+        p = solver.parameters
+        if self.num_workers is not None:
+            p.num_workers = self.num_workers
+        if self.max_time_in_seconds is not None:
+            p.max_time_in_seconds = self.max_time_in_seconds
+        if self.relative_gap_limit is not None:
+            p.relative_gap_limit = self.relative_gap_limit
+        if self.random_seed is not None:
+            p.random_seed = self.random_seed
+        if self.max_memory_in_mb is not None:
+            p.max_memory_in_mb = self.max_memory_in_mb
+        if self.presolve_level == 0:
+            p.cp_model_presolve = False
+        elif self.presolve_level == 1:
+            p.max_presolve_iterations = 1
+        p.log_search_progress = self.log_search_progress
+        return solver
+
+
+def run_solver(model: cp_model.CpModel, params: SolverParams | None = None, name='solve'):
+    """params を適用して model を解き、(solver, status, info) を返す。
+
+    info はパラメータ・ステータス・実行時間を含む dict で、出力と一緒に記録する。
+    """
+    params = params or SolverParams()
+    solver = params.apply(cp_model.CpSolver())
+    started = time.perf_counter()
+    with instrument.stage(f'cp_sat:{name}'):
+        status = solver.Solve(model)
+    elapsed = time.perf_counter() - started
+    info = {
+        'name': name,
+        'params': params.to_dict(),
+        'status': solver.StatusName(status),
+        'wall_time': solver.WallTime(),
+        'elapsed': elapsed,
+    }
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        info['objective'] = solver.ObjectiveValue()
+        info['best_bound'] = solver.BestObjectiveBound()
+    instrument.record_solve(name, model, solver, info['status'])
+    return solver, status, info
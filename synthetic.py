@@ -0,0 +1,68 @@
+"""ベンチマーク・テスト用の合成インスタンス（希望休CSV）を乱数シードから作成する。
+
+最初の14人は実際のメンバー名を使うため、config の担当表（CT・土曜担当・木日祝休みなど）が
+そのまま効く。15人目以降は「看護師015」のような名前になる。
+"""
+from dataclasses import dataclass
+import random
+
+import pandas as pd
+
+from config import HOLIDAY_NO_WORKERS
+from period import PeriodCalendar
+from request_index import NAME_COLUMN, NOTES_COLUMN, WEEKDAY_LABELS, WEEKDAY_ROW
+
+BASE_NURSES = [
+    '樋渡', '中山', '三好', '川原田', '友枝', '奥平', '前野',
+    '森園', '板川', '御書', '久保', '小嶋', '久保（千）', '田浦',
+]
+# 希望種別の出現比率（①休 が大半）
+REQUEST_WEIGHTS = {'①': 0.6, '②': 0.05, '③': 0.15, '④': 0.15, '⑤': 0.05}
+
+
+@dataclass
+class SyntheticInstance:
+    period: PeriodCalendar
+    nurses: list[str]
+    yakin_workers: list[str]
+    frame: pd.DataFrame  # 希望休CSVと同じ形式
+
+    def to_csv(self, path):
+        self.frame.to_csv(path, index=False, encoding='utf-8-sig')
+        return path
+
+
+def nurse_names(count) -> list[str]:
+    return BASE_NURSES[:count] + [f'看護師{i:03d}' for i in range(len(BASE_NURSES) + 1, count + 1)]
+
+
+def generate_instance(nurses=14, days=31, density=0.1, night_ratio=0.5, year=2025, month=8,
+                      seed=0) -> SyntheticInstance:
+    """nurses 人 × days 日の希望休を作成する。
+
+    density は各セルに希望休が入る確率、night_ratio は夜勤メンバーの割合
+    （木日祝休みのメンバーは夜勤に入らない）。
+    """
+    rng = random.Random(seed)
+    period = PeriodCalendar(year, month, days=days)
+    names = nurse_names(nurses)
+    eligible = [n for n in names if n not in HOLIDAY_NO_WORKERS]
+    yakin = sorted(rng.sample(eligible, max(1, min(len(eligible), round(night_ratio * nurses)))),
+                   key=names.index)
+
+    # 日にちが重複する（1か月を超える）期間は「月/日」の列にする
+    if len({d.day for d in period.dates}) == period.days:
+        labels = [str(d.day) for d in period.dates]
+    else:
+        labels = [f'{d.month}/{d.day}' for d in period.dates]
+
+    kinds, weights = list(REQUEST_WEIGHTS), list(REQUEST_WEIGHTS.values())
+    rows = [[WEEKDAY_ROW] + [WEEKDAY_LABELS[d.weekday()] for d in period.dates] + [None]]
+    for n in names:
+        # 木日祝休みのメンバーは木・日・祝に希望を出さない（Strict1 で休みになる）
+        fixed_off = n in HOLIDAY_NO_WORKERS
+        cells = [rng.choices(kinds, weights)[0] if rng.random() < density and not (fixed_off and period.is_full(d))
+                 else None for d in range(period.days)]
+        rows.append([n] + cells + [None])
+    frame = pd.DataFrame(rows, columns=[NAME_COLUMN] + labels + [NOTES_COLUMN])
+    return SyntheticInstance(period, names, yakin, frame)
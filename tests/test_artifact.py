@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import artifact
+from schedule_matrix import CODE, SHIFT_CODES, ScheduleMatrix
+
+
+def frame():
+    return pd.DataFrame({'day_0': ['夜', None, '1'], 'day_1': ['×', '休/', '4/']},
+                        index=pd.Index(['A', 'B', 'C'], name='nurse'))
+
+
+def test_round_trip_is_lossless(tmp_path):
+    path = artifact.save(tmp_path / 's.npz', frame())
+    df = artifact.read_schedule(path)
+    pd.testing.assert_frame_equal(df, frame())
+    assert df.at['C', 'day_0'] == '1'  # 1〜4 は文字列のまま
+    m = artifact.load(path)
+    assert m.fixed.tolist() == [[True, True], [False, True], [True, True]]
+    assert artifact.read_rest_points(path) == {'A': 0, 'B': 1, 'C': 1}
+
+
+def test_fixed_mask_is_kept(tmp_path):
+    m = ScheduleMatrix.from_frame(frame())
+    m.fixed[:] = False
+    m.fixed[0, 0] = True
+    assert artifact.load(artifact.save(tmp_path / 's.npz', m)).fixed.sum() == 1
+
+
+def test_codes_are_remapped_by_stored_table(tmp_path):
+    path = artifact.save(tmp_path / 's.npz', frame())
+    with np.load(path) as data:
+        arrays = dict(data)
+    # コード表の並びが変わっていても（シフトの種類を追加した後など）同じシフトに読める
+    order = list(reversed(SHIFT_CODES))
+    arrays['code_table'] = np.array(order)
+    arrays['codes'] = np.vectorize(lambda c: order.index(SHIFT_CODES[c]))(arrays['codes']).astype(np.int8)
+    np.savez(tmp_path / 'old.npz', **arrays)
+    pd.testing.assert_frame_equal(artifact.read_frame(tmp_path / 'old.npz'), frame())
+
+    arrays['code_table'] = np.array(order[:-1] + ['謎'])
+    np.savez(tmp_path / 'bad.npz', **arrays)
+    with pytest.raises(ValueError):
+        artifact.load(tmp_path / 'bad.npz')
+
+
+def test_read_schedule_accepts_csv_export(tmp_path):
+    df = frame().assign(休み合計=[0, 0.5, 0.5])
+    df.to_csv(tmp_path / 's.csv', encoding='utf-8-sig')
+    out = artifact.read_schedule(tmp_path / 's.csv')
+    assert list(out.columns) == ['day_0', 'day_1']
+    assert out.at['A', 'day_0'] == '夜'
+    assert CODE[out.at['C', 'day_1']] == CODE['4/']
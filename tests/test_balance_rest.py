@@ -0,0 +1,72 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from optimize_2 import balance_rest_days
+from schedule_matrix import CODE, ScheduleMatrix
+
+
+def matrix(rows, nurses=None):
+    nurses = nurses or [f'N{i}' for i in range(len(rows))]
+    df = pd.DataFrame(rows, index=nurses).rename(columns=lambda d: f'day_{d}')
+    m = ScheduleMatrix.from_frame(df)
+    m.fixed = np.zeros(m.shape, dtype=bool)
+    return m
+
+
+def test_tries_other_pairs_when_lowest_nurse_cannot_take_rest():
+    m = matrix([
+        ['休', '休', '休', '休'],
+        ['早', '早', '早', '早'],  # 休みが最も少ないが、すべて固定で受け取れない
+        ['残', '残', '残', '残'],
+        ['〇', '〇', '〇', '〇'],
+    ])
+    m.fixed[1] = True
+    columns = [Counter(m.codes[:, d].tolist()) for d in range(4)]
+    balance_rest_days(m)
+    rest = m.rest_points()
+    assert rest.max() - rest.min() <= 4
+    assert (m.codes[1] == CODE['早']).all()
+    assert [Counter(m.codes[:, d].tolist()) for d in range(4)] == columns  # 同じ日の中で入れ替える
+
+
+def test_stops_when_spread_is_unreachable():
+    m = matrix([
+        ['休', '休', '休', '休'],
+        ['早', '夜', '×', '早'],
+        ['残', '残', '残', '残'],
+    ])
+    m.fixed[1] = True
+    balance_rest_days(m)
+    assert m.rest_points().tolist() == [6, 0, 2]  # 1日だけ渡し、それ以上は差が縮まらない
+
+
+def test_moves_only_shifts_the_receiver_may_work():
+    m = matrix([
+        ['休', '休', '休', '休'],
+        ['CT', 'CT', '早日', '〇'],
+        ['1', '2', '3', '4'],
+    ], nurses=['御書', '三好', '小嶋'])
+    balance_rest_days(m, spread=2)
+    assert m.codes[0].tolist() == [CODE['休'], CODE['休'], CODE['休'], CODE['〇']]  # CT・外来・早日は渡さない
+
+
+def test_rest_spread_comes_from_config(monkeypatch):
+    import optimize_2
+    from config import Config
+    from pipeline import build_schedule
+    from solver_params import SolverParams
+
+    seen = []
+    balance = optimize_2.balance_rest_days
+    monkeypatch.setattr(optimize_2, 'balance_rest_days', lambda m, spread: seen.append(spread) or balance(m, spread))
+    params = SolverParams.from_config(relative_gap_limit=1.0, max_time_in_seconds=60)
+    build_schedule(config=Config().variant(rest_spread=1.5), engine='greedy', params=params)
+    assert seen == [3]
+
+    m = matrix([['休', '休', '早', '早'], ['早', '早', '残', '残']])
+    balance_rest_days(m, spread=4)
+    assert m.rest_points().tolist() == [4, 0]
+    balance_rest_days(m, spread=2)
+    assert m.rest_points().tolist() == [2, 2]
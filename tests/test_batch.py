@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from batch import BatchJob, load_manifest, run_batch
+from config import Config
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_load_manifest_csv(tmp_path):
+    path = tmp_path / 'jobs.csv'
+    path.write_text('ward,year,month,requests,template\n'
+                    '3A,2025,8,data/req_shift_8.csv,\n'
+                    '3B,2026,1,data/req_3b.csv,data/tpl.xlsx\n', encoding='utf-8')
+    jobs = load_manifest(path)
+    assert jobs[0] == BatchJob('3A', 2025, 8, 'data/req_shift_8.csv')
+    assert jobs[1].template == 'data/tpl.xlsx'
+    cfg = jobs[1].config(Config(history_dir='hist'))
+    assert (cfg.year, cfg.month, cfg.history_dir) == (2026, 1, str(Path('hist') / '3B'))
+
+
+def test_load_manifest_requires_columns(tmp_path):
+    path = tmp_path / 'jobs.json'
+    path.write_text(json.dumps({'jobs': [{'ward': '3A', 'year': 2025, 'month': 8}]}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_manifest(path)
+
+
+def test_failing_job_does_not_stop_batch(tmp_path):
+    jobs = [
+        BatchJob('3A', 2025, 8, str(tmp_path / 'missing.csv')),
+        BatchJob('3B', 2025, 8, str(ROOT / 'data' / 'req_shift_8.csv')),
+    ]
+    base = Config(history_dir=str(tmp_path / 'history'))
+    results = run_batch(jobs, tmp_path / 'out', workers=2, threads=1, base=base, engine='greedy',
+                        excel=False, use_hint=False)
+    assert [r['status'] for r in results] == ['failed', 'ok']
+    assert 'FileNotFoundError' in results[0]['error']
+    assert 'violations' in results[1]
+    assert (tmp_path / 'out' / '3B' / '2025-08' / 'shift_final.csv').exists()
+    assert (tmp_path / 'out' / '3B' / '2025-08' / 'schedule.npz').exists()
+    summary = json.loads((tmp_path / 'out' / 'batch_summary.json').read_text(encoding='utf-8'))
+    assert summary['counts'] == {'ok': 1, 'infeasible': 0, 'failed': 1}
@@ -0,0 +1,26 @@
+from benchmark import BenchCase, run_case
+from request_index import RequestIndex
+from synthetic import generate_instance
+
+
+def test_generator_is_seeded_and_parses():
+    a = generate_instance(20, 31, density=0.2, seed=5)
+    b = generate_instance(20, 31, density=0.2, seed=5)
+    assert a.frame.equals(b.frame) and a.yakin_workers == b.yakin_workers
+    requests = RequestIndex.from_frame(a.frame, a.period)
+    assert requests.nurses == a.nurses and not requests.issues
+    assert len(a.yakin_workers) == 10
+
+
+def test_long_period_uses_month_day_columns():
+    inst = generate_instance(14, 365, seed=1)
+    assert inst.period.days == 365 and '7/21' in inst.frame.columns
+    requests = RequestIndex.from_frame(inst.frame, inst.period)
+    assert max(r.day for reqs in requests.by_nurse.values() for r in reqs) > 300
+
+
+def test_run_case_records_stages():
+    result = run_case(BenchCase(14, 31), engine='greedy', excel=False)
+    assert result['status'] == 'ok'
+    assert list(result['stages']) == ['generate', 'parse', 'build', 'solve', 'greedy_fill', 'repair']
+    assert all(s['seconds'] >= 0 and s['rss_peak_mb'] > 0 for s in result['stages'].values())
@@ -0,0 +1,34 @@
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from config import Config
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_import_does_not_read_data():
+    code = "import sys, config; print('pandas' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == 'False'
+
+
+def test_data_is_loaded_on_first_access(tmp_path):
+    cfg = Config(req_shift_path=str(tmp_path / 'missing.csv'))
+    assert cfg.period.days == 31  # 設定だけなら読み込まない
+    with pytest.raises(FileNotFoundError):
+        cfg.requests
+
+
+def test_from_file_and_overrides(tmp_path):
+    path = tmp_path / 'settings.toml'
+    path.write_text('month = 9\ntarget_rest_score = 12\n\n[solver_params]\nnum_workers = 2\n', encoding='utf-8')
+    cfg = Config.from_file(path, year=2026)
+    assert (cfg.year, cfg.month, cfg.target_rest_score) == (2026, 9, 12)
+    assert cfg.period.start.isoformat() == '2026-08-21'
+    assert cfg.solver_params['num_workers'] == 2
+    assert cfg.solver_params['max_time_in_seconds'] == 10.0
+    with pytest.raises(ValueError):
+        cfg.with_overrides(unknown=1)
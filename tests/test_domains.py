@@ -0,0 +1,38 @@
+from config import SHIFT_TYPES
+from domains import build_domains
+from optimize_cp import ScheduleModel
+from period import PeriodCalendar
+from request_index import DayRequest, RequestIndex
+
+PERIOD = PeriodCalendar(2025, 8)  # day_3 は木曜
+NURSES = ['久保', '樋渡', '御書']
+
+
+def _requests(**by_nurse):
+    return RequestIndex(NURSES, by_nurse)
+
+
+def test_requests_and_eligibility_prune_domains():
+    requests = _requests(樋渡=[DayRequest(1, '③')])
+    domains = build_domains(requests, NURSES, PERIOD, lambda n, d: SHIFT_TYPES, yakin_workers=['樋渡'])
+    assert domains.shifts('樋渡', 1) == ('休/',)
+    assert domains.forced[('樋渡', 1)] == '休/'
+    assert domains.shifts('久保', 3) == ('休',)  # 木曜は休み（Strict1）
+    assert '夜' not in domains.shifts('御書', 0) and '×' not in domains.shifts('樋渡', 0)
+    assert '×' in domains.shifts('樋渡', 2)
+    assert not domains.conflicts
+
+
+def test_conflicting_requirements_are_reported():
+    requests = _requests(久保=[DayRequest(3, '③')])  # 木曜の休（Strict1）と休/（希望）が食い違う
+    domains = build_domains(requests, NURSES, PERIOD, lambda n, d: SHIFT_TYPES)
+    assert domains.shifts('久保', 3) == ()
+    assert domains.conflicts == [('久保', 3, '休'), ('久保', 3, '休/')]
+
+
+def test_schedule_model_only_creates_allowed_variables():
+    model = ScheduleModel(_requests(), NURSES, PERIOD, yakin_workers=['樋渡'])
+    assert len(model.x) == len(model.domains) < len(NURSES) * PERIOD.days * len(SHIFT_TYPES) // 3
+    # day_1 は平日（day_0 は海の日）
+    assert ('御書', 1, '1') not in model.x and ('久保', 1, '1') not in model.x
+    assert ('久保', 1, 'CT') in model.x
@@ -0,0 +1,37 @@
+import pytest
+
+from optimize_cp import OFF_SET, ScheduleModel
+from request_index import RequestIndex
+from solver_params import SolverParams
+from synthetic import generate_instance
+
+PARAMS = SolverParams.from_config(max_time_in_seconds=30, relative_gap_limit=1.0, random_seed=0)
+
+
+@pytest.fixture(scope='module')
+def instance():
+    inst = generate_instance(14, 14, density=0.05, seed=2)
+    return inst, RequestIndex.from_frame(inst.frame, inst.period)
+
+
+@pytest.mark.parametrize('encoding', ['bool', 'table'])
+def test_encodings_keep_transition_rules(instance, encoding):
+    inst, requests = instance
+    model = ScheduleModel(requests, period=inst.period, yakin_workers=inst.yakin_workers,
+                          target_rest_score=6, encoding=encoding)
+    shifts = model.solve(PARAMS)
+    assert shifts is not None
+    for n, row in shifts.iterrows():
+        values = list(row)
+        for d in range(1, len(values)):
+            assert (values[d] == '×') == (values[d - 1] == '夜'), (n, d)
+        streak = 0
+        for s in values:
+            streak = 0 if s in OFF_SET else streak + 1  # 外来半日（1/ など）も休み扱い
+            assert streak <= 6, n
+
+
+def test_unknown_encoding_is_rejected(instance):
+    inst, requests = instance
+    with pytest.raises(ValueError):
+        ScheduleModel(requests, period=inst.period, encoding='int')
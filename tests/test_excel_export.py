@@ -0,0 +1,83 @@
+from pathlib import Path
+import shutil
+
+from openpyxl import load_workbook
+import pandas as pd
+import pytest
+
+import excel_export
+from excel_export import SheetData, export_workbooks, load_template, write_schedule, write_workbook
+from period import PeriodCalendar
+
+TEMPLATE = Path(__file__).resolve().parents[1] / 'data' / 'shift_template.xlsx'
+
+
+@pytest.fixture
+def template(tmp_path):
+    excel_export.clear_template_cache()
+    path = tmp_path / 'template.xlsx'
+    shutil.copy(TEMPLATE, path)
+    return path
+
+
+def frame(first='夜'):
+    return pd.DataFrame({'day_0': [first, '休'], 'day_1': ['×', 1]}, index=['樋渡', '田浦'])
+
+
+def test_layout_is_read_from_template(template):
+    layout, _, _ = load_template(template)
+    assert layout.rows['樋渡'] == 6 and layout.rows['田浦'] == 19
+    assert len(layout.columns) == 31 and layout.columns[0] == 3
+    assert layout.header == {'year': (3, 2), 'month': (3, 5), 'start_month': (3, 15), 'end_month': (3, 20)}
+
+
+def test_template_is_parsed_once_and_reset_between_writes(template, tmp_path, monkeypatch):
+    calls = []
+    original = excel_export.load_workbook
+    monkeypatch.setattr(excel_export, 'load_workbook', lambda *a, **k: calls.append(a) or original(*a, **k))
+    write_schedule(frame(), template, tmp_path / 'a.xlsx')
+    write_schedule(frame('休').iloc[[1]], template, tmp_path / 'b.xlsx', period=PeriodCalendar(2026, 1))
+    assert len(calls) == 1
+
+    a = load_workbook(tmp_path / 'a.xlsx')['シフト表']
+    assert (a['C6'].value, a['D6'].value, a['D19'].value) == ('夜', '×', 1)
+    b = load_workbook(tmp_path / 'b.xlsx')['シフト表']
+    assert b['C6'].value is None  # 前の出力の値が残らない
+    assert (b['B3'].value, b['E3'].value, b['O3'].value, b['T3'].value) == (2026, 1, 12, 1)
+    assert b['C4'].value == '=DATE(B3-1,O3,21)'  # 期間の初日は見出しからの数式（1月の期間は前年）
+
+
+def test_january_period_starts_in_previous_year(template, tmp_path):
+    period = PeriodCalendar(2026, 1)
+    write_schedule(frame(), template, tmp_path / 'jan.xlsx', period=period)
+    sheet = load_workbook(tmp_path / 'jan.xlsx')['シフト表']
+    assert sheet['C4'].value == '=DATE(B3-1,O3,21)'  # 2025-12-21
+    assert (sheet['B3'].value, sheet['O3'].value) == (2026, 12)
+    write_schedule(frame(), template, tmp_path / 'feb.xlsx', period=PeriodCalendar(2026, 2))
+    assert load_workbook(tmp_path / 'feb.xlsx')['シフト表']['C4'].value == '=DATE(B3,O3,21)'  # テンプレートの数式に戻る
+
+
+def test_writes_only_the_period_days(template, tmp_path):
+    df = pd.DataFrame([['休'] * 31], index=['樋渡'], columns=[f'day_{d}' for d in range(31)])
+    write_schedule(df, template, tmp_path / 'sep.xlsx', period=PeriodCalendar(2025, 9))  # 8/21〜9/20 は31日
+    write_schedule(df, template, tmp_path / 'oct.xlsx', period=PeriodCalendar(2025, 10))  # 9/21〜10/20 は30日
+    assert load_workbook(tmp_path / 'sep.xlsx')['シフト表'].cell(6, 33).value == '休'
+    assert load_workbook(tmp_path / 'oct.xlsx')['シフト表'].cell(6, 33).value is None
+
+
+def test_many_schedules_in_one_workbook(template, tmp_path):
+    sheets = [SheetData(frame(), '3A-08', PeriodCalendar(2025, 8)),
+              SheetData(frame('休'), '3A-09', PeriodCalendar(2025, 9))]
+    write_workbook(sheets, template, tmp_path / 'all.xlsx')
+    wb = load_workbook(tmp_path / 'all.xlsx')
+    assert wb.sheetnames == ['3A-08', '3A-09']
+    assert (wb['3A-08']['C6'].value, wb['3A-09']['C6'].value, wb['3A-09']['E3'].value) == ('夜', '休', 9)
+    # キャッシュしたブックは元に戻る
+    _, cached, _ = load_template(template)
+    assert cached.sheetnames == ['シフト表'] and cached['シフト表']['C6'].value is None
+
+
+def test_export_workbooks_in_processes(template, tmp_path):
+    items = [(frame(), tmp_path / f'{k}.xlsx') for k in range(3)]
+    assert export_workbooks(items, template, workers=2) == [p for _, p in items]
+    assert all(load_workbook(p)['シフト表']['C6'].value == '夜' for _, p in items)
@@ -0,0 +1,49 @@
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from hints import add_hints, align_to_period, hint_report, load_hint, save_history
+from period import PeriodCalendar
+
+
+def _frame(period, values):
+    return pd.DataFrame([values], index=pd.Index(['A'], name='nurse'),
+                        columns=[f'day_{i}' for i in range(period.days)])
+
+
+def test_previous_month_is_aligned_by_weekday():
+    prev, cur = PeriodCalendar(2025, 7), PeriodCalendar(2025, 8)
+    prev_df = _frame(prev, [d.strftime('%a') for d in prev.dates])
+    aligned = align_to_period(prev_df, prev, cur)
+    assert aligned.loc['A'].tolist() == [d.strftime('%a') for d in cur.dates]
+
+
+def test_load_hint_prefers_same_period(tmp_path):
+    prev, cur = PeriodCalendar(2025, 7), PeriodCalendar(2025, 8)
+    save_history(_frame(prev, ['休'] * prev.days), tmp_path, prev)
+    hint, source = load_hint(tmp_path, cur)
+    assert source.endswith('2025-07.npz')
+    assert list(hint.columns) == [f'day_{i}' for i in range(cur.days)]
+
+    save_history(_frame(cur, ['夜'] * cur.days), tmp_path, cur)
+    hint, source = load_hint(tmp_path, cur)
+    assert source.endswith('2025-08.npz')
+    assert (hint.loc['A'] == '夜').all()
+
+
+def test_load_hint_reads_csv_history(tmp_path):
+    cur = PeriodCalendar(2025, 8)
+    _frame(cur, ['夜'] * cur.days).to_csv(tmp_path / '2025-08.csv', encoding='utf-8-sig')
+    hint, source = load_hint(tmp_path, cur)
+    assert source.endswith('2025-08.csv')
+    assert (hint.loc['A'] == '夜').all()
+
+
+def test_add_hints_and_report():
+    model = cp_model.CpModel()
+    x = {('A', d, s): model.NewBoolVar(f'x_{d}_{s}') for d in range(2) for s in ['休', '夜']}
+    hint = pd.DataFrame({'day_0': ['夜'], 'day_1': [None]}, index=['A'])
+    assert add_hints(model, x, hint, ['休', '夜'], 2) == 1
+    assert add_hints(model, x, hint, ['休', '夜'], 2, blank_as_zero=True) == 2
+
+    result = pd.DataFrame({'day_0': ['休'], 'day_1': ['休']}, index=['A'])
+    assert hint_report(hint, result) == {'hinted': 1, 'kept': 0, 'kept_ratio': 0.0}
@@ -0,0 +1,36 @@
+from ortools.sat.python import cp_model
+
+import instrument
+from solver_params import run_solver
+
+
+def test_disabled_records_nothing():
+    assert not instrument.enabled()
+    with instrument.stage('build'):
+        instrument.count('moves')
+    profiler = instrument.Profiler()
+    assert profiler.to_dict()['stages'] == []
+
+
+def test_stages_counters_and_solve_stats():
+    model = cp_model.CpModel()
+    x = [model.NewBoolVar(f'x{i}') for i in range(3)]
+    model.AddExactlyOne(x)
+    model.Add(x[0] + x[1] <= 1)
+    model.Maximize(x[2])
+
+    profiler = instrument.Profiler()
+    with profiler.activate():
+        with instrument.stage('solve'):
+            run_solver(model, name='tiny')
+            instrument.count('moves', 2)
+    assert not instrument.enabled()
+
+    data = profiler.to_dict()
+    assert [s['name'] for s in data['stages']] == ['solve/cp_sat:tiny', 'solve']
+    assert data['counters'] == {'moves': 2}
+    solve = data['solves'][0]
+    assert solve['status'] == 'OPTIMAL'
+    assert solve['model']['variables'] == 3
+    assert solve['model']['constraints_by_type'] == {'exactly_one': 1, 'linear': 1}
+    assert solve['response']['objective'] == 1
@@ -0,0 +1,39 @@
+import random
+
+from lns import Neighbourhood, improve_schedule, solve_neighbourhood
+from optimize_cp import ScheduleModel
+from period import HALF
+from request_index import RequestIndex
+from solver_params import SolverParams
+from synthetic import generate_instance
+
+FIRST = SolverParams.from_config(max_time_in_seconds=30, relative_gap_limit=1.0, random_seed=0)
+
+
+def test_neighbourhoods():
+    inst = generate_instance(6, 28, seed=0)
+    rng = random.Random(0)
+    days = Neighbourhood.make('days', inst.nurses, inst.period, rng, block_days=5)
+    assert len(days.cells) == 6 * 5 and len({d for _, d in days.cells}) == 5
+    nurses = Neighbourhood.make('nurses', inst.nurses, inst.period, rng, nurse_count=2)
+    assert len({n for n, _ in nurses.cells}) == 2 and len(nurses.cells) == 2 * 28
+    saturdays = Neighbourhood.make('saturdays', inst.nurses, inst.period, rng)
+    assert {inst.period.day_types[d] for _, d in saturdays.cells} == {HALF}
+
+
+def test_improve_schedule_never_gets_worse():
+    inst = generate_instance(14, 14, density=0.05, seed=2)
+    requests = RequestIndex.from_frame(inst.frame, inst.period)
+    options = dict(yakin_workers=inst.yakin_workers, target_rest_score=6)
+    start = ScheduleModel(requests, period=inst.period, **options).solve(FIRST)
+    assert start is not None
+
+    result = improve_schedule(start, requests, inst.period, time_limit=4, step_time=1, **options)
+    assert result.initial_objective is not None
+    assert result.objective <= result.initial_objective
+    objectives = [h['objective'] for h in result.history]
+    assert objectives == sorted(objectives, reverse=True)
+
+    model = ScheduleModel(requests, period=inst.period, strict_rest=False, symmetry=False, **options)
+    objective, shifts = solve_neighbourhood(model, result.shifts, params=FIRST)
+    assert objective == result.objective and shifts.equals(result.shifts)
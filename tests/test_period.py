@@ -0,0 +1,32 @@
+from datetime import date
+
+from period import FULL, HALF, HOLIDAY, WEEKDAY, PeriodCalendar, japanese_holidays
+
+
+def test_period_spans_21st_to_20th():
+    period = PeriodCalendar(2025, 8)
+    assert period.start == date(2025, 7, 21)
+    assert period.end == date(2025, 8, 20)
+    assert period.days == 31
+    assert period.day_to_index(21) == 0
+    assert period.day_to_index(20) == 30
+    assert period.index_of(date(2025, 8, 1)) == 11
+
+
+def test_january_period_starts_in_previous_year():
+    period = PeriodCalendar(2025, 1)
+    assert period.start == date(2024, 12, 21)
+    assert period.end == date(2025, 1, 20)
+
+
+def test_day_types_and_second_thursday():
+    period = PeriodCalendar(2025, 8)
+    assert period.day_types[0] == HOLIDAY  # 7/21 海の日
+    assert period.day_types[1] == WEEKDAY
+    assert period.day_types[3] == FULL
+    assert period.day_types[5] == HALF
+    assert period.date_of(period.second_thursday) == date(2025, 7, 31)
+
+
+def test_substitute_holiday():
+    assert date(2025, 5, 6) in japanese_holidays(2025)  # こどもの日の振替休日
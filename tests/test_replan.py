@@ -0,0 +1,71 @@
+import pytest
+
+from optimize_cp import OFF_SET, ScheduleModel
+from replan import ChangeEvent, replan
+from request_index import RequestIndex
+from solver_params import SolverParams
+from synthetic import generate_instance
+from validator import validate
+
+FIRST = SolverParams.from_config(max_time_in_seconds=30, relative_gap_limit=1.0, random_seed=0)
+OPTIONS = {'target_rest_score': 6}
+
+
+@pytest.fixture(scope='module')
+def published():
+    inst = generate_instance(14, 14, density=0.05, seed=2)
+    requests = RequestIndex.from_frame(inst.frame, inst.period)
+    shifts = ScheduleModel(requests, period=inst.period, yakin_workers=inst.yakin_workers, **OPTIONS).solve(FIRST)
+    assert shifts is not None
+    return inst, requests, shifts
+
+
+def test_absence_changes_few_cells_and_keeps_elapsed_days(published):
+    inst, requests, shifts = published
+    nurse = shifts.index[3]
+    day = next(d for d in range(6, 14) if shifts.at[nurse, f'day_{d}'] not in OFF_SET | {'×'})
+    result = replan(shifts, [ChangeEvent('absence', nurse, day)], requests, inst.period, start=6,
+                    yakin_workers=inst.yakin_workers, **OPTIONS)
+    assert result.shifts.at[nurse, f'day_{day}'] == '休'
+    assert result.shifts.iloc[:, :6].equals(shifts.iloc[:, :6])
+    assert result.changes > 0
+    assert (result.diff['day'] >= 6).all()
+    for row in result.diff.itertuples():
+        assert (shifts.at[row.nurse, f'day_{row.day}'], result.shifts.at[row.nurse, f'day_{row.day}']) \
+            == (row.before, row.after)
+    assert not validate(result.shifts, inst.period, requests, inst.yakin_workers, 6)
+
+
+def test_absence_on_night_is_covered_without_restoring_quota(published):
+    inst, requests, shifts = published
+    nurse, day = next((n, d) for d in range(6, 12) for n in inst.yakin_workers if shifts.at[n, f'day_{d}'] == '夜')
+    result = replan(shifts, [ChangeEvent('absence', nurse, day)], requests, inst.period,
+                    yakin_workers=inst.yakin_workers, **OPTIONS)
+    assert result.shifts.at[nurse, f'day_{day}'] == '休'
+    assert (result.shifts[f'day_{day}'] == '夜').sum() == 1
+    unweighted = replan(shifts, [ChangeEvent('absence', nurse, day)], requests, inst.period, change_weight=0,
+                        yakin_workers=inst.yakin_workers, **OPTIONS)
+    assert result.changes <= unweighted.changes
+
+
+def test_swap_and_new_request(published):
+    inst, requests, shifts = published
+    ward = [n for n in shifts.index if n not in inst.yakin_workers]
+    day, a, b = next((d, a, b) for d in range(8, 12) for a in ward for b in ward
+                     if shifts.at[a, f'day_{d}'] == '早' and shifts.at[b, f'day_{d}'] in ('残', '〇'))
+    c = shifts.index[2]
+    events = [ChangeEvent('swap', a, day, other=b), ChangeEvent('request', c, 12, request='①')]
+    result = replan(shifts, events, requests, inst.period, yakin_workers=inst.yakin_workers, **OPTIONS)
+    assert result.start == day
+    assert result.shifts.at[a, f'day_{day}'] == shifts.at[b, f'day_{day}']
+    assert result.shifts.at[b, f'day_{day}'] == '早'
+    assert result.shifts.at[c, 'day_12'] == '休'
+    assert result.shifts.iloc[:, :day].equals(shifts.iloc[:, :day])
+
+
+def test_events_before_start_are_rejected(published):
+    inst, requests, shifts = published
+    with pytest.raises(ValueError):
+        replan(shifts, [ChangeEvent('absence', shifts.index[0], 2)], requests, inst.period, start=5)
+    with pytest.raises(ValueError):
+        ChangeEvent('request', shifts.index[0], 2, request='⑨')
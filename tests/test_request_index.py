@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from period import PeriodCalendar
+from request_index import RequestIndex
+
+PERIOD = PeriodCalendar(2025, 8)
+
+
+def _csv():
+    return pd.DataFrame({
+        '日付': ['曜日', 'A', 'B'],
+        'Unnamed: 1': [None, None, None],
+        '21': ['月', '①', None],
+        '22': ['火', None, '⑥'],
+        '20': ['木', '③', '④'],
+        '特記事項': [None, '夜勤なし', None],
+    })
+
+
+def test_index_by_nurse_and_day():
+    index = RequestIndex.from_frame(_csv(), PERIOD)
+    assert index.nurses == ['A', 'B']
+    assert [(r.day, r.kind, r.shift) for r in index.by_nurse['A']] == [(0, '①', '休'), (30, '③', '休/')]
+    assert index.by_day[30] == [('A', '③'), ('B', '④')]
+    assert index.get('B', 30).shift == '/休'
+    assert index.get('B', 0) is None
+    assert index.notes == {'A': '夜勤なし'}
+
+
+def test_unknown_symbols_and_weekday_row_are_reported():
+    index = RequestIndex.from_frame(_csv(), PERIOD)
+    assert index.unknown == [('B', 22, '⑥')]
+    assert any('20日の曜日' in issue for issue in index.issues)  # 8/20 は水曜日
+    with pytest.raises(ValueError):
+        RequestIndex.from_frame(_csv(), PERIOD, strict=True)
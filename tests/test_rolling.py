@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from boundary import BoundaryState
+from optimize_cp import FULL_OFF_SHIFTS, HALF_OFF_SHIFTS, OFF_SET, ScheduleModel
+from request_index import DayRequest, RequestIndex
+from rolling import window_requests
+from solver_params import SolverParams
+from synthetic import generate_instance
+
+
+def test_state_from_schedule_carries_streaks_and_counts():
+    first = pd.DataFrame({'day_0': ['夜', '休', '早日'], 'day_1': ['×', '休', '夜'], 'day_2': ['早', '休', '×']},
+                         index=['a', 'b', 'c'])
+    second = pd.DataFrame({'day_0': ['残', '休', '休'], 'day_1': ['〇', '休', '夜']}, index=['a', 'b', 'c'])
+    state = BoundaryState.from_schedule(second, BoundaryState.from_schedule(first))
+    assert state.after_night == {'c'}
+    assert state.work_streak == {'a': 5, 'b': 0, 'c': 1}
+    assert state.rest_streak == {'a': 0, 'b': 5, 'c': 0}
+    assert state.nights == {'a': 1, 'b': 0, 'c': 2} and state.duties == {'a': 0, 'b': 0, 'c': 1}
+    assert state.periods == 2
+    assert BoundaryState.from_dict(state.to_dict()) == state
+
+
+def test_state_from_schedule_reads_day_columns_only():
+    shifts = pd.DataFrame({'day_0': ['休', '早'], 'day_1': ['夜', '×'], '休み合計': [2.0, 0.0]}, index=['a', 'b'])
+    state = BoundaryState.from_schedule(shifts)
+    assert state.after_night == {'a'} and state.work_streak == {'a': 1, 'b': 2}
+    with pytest.raises(ValueError, match='missing'):
+        BoundaryState.from_schedule(shifts, period=generate_instance(2, 3).period)
+    shifts.at['b', 'day_0'] = None
+    with pytest.raises(ValueError, match='blank'):
+        BoundaryState.from_schedule(shifts)
+
+
+@pytest.mark.parametrize('encoding', ['bool', 'table'])
+def test_model_respects_boundary(encoding):
+    inst = generate_instance(14, 14, density=0.05, seed=2)
+    requests = RequestIndex.from_frame(inst.frame, inst.period)
+    night, tired = inst.yakin_workers[:2]
+    state = BoundaryState(after_night=frozenset([night]), work_streak={tired: 6})
+    model = ScheduleModel(requests, period=inst.period, yakin_workers=inst.yakin_workers, target_rest_score=6,
+                          encoding=encoding, boundary=state)
+    assert model.domains.shifts(night, 0) == ('×',)
+    shifts = model.solve(SolverParams.from_config(max_time_in_seconds=30, relative_gap_limit=1.0, random_seed=0))
+    assert shifts is not None
+    assert shifts.at[night, 'day_0'] == '×'
+    assert shifts.at[tired, 'day_0'] in OFF_SET
+
+
+def test_window_requests_shift_following_period():
+    first = RequestIndex(['a', 'b'], {'a': [DayRequest(3, '①')]})
+    following = RequestIndex(['a', 'c'], {'a': [DayRequest(0, '③')], 'c': [DayRequest(1, '①')]})
+    merged = window_requests(first, following, 31)
+    assert merged.nurses == ['a', 'b']
+    assert merged.by_nurse == {'a': [DayRequest(3, '①'), DayRequest(31, '③')], 'b': []}
+
+
+def test_model_splits_apply_targets_per_period():
+    inst = generate_instance(14, 14, density=0.05, seed=2)
+    requests = RequestIndex.from_frame(inst.frame, inst.period)
+    with pytest.raises(ValueError):
+        ScheduleModel(requests, period=inst.period, yakin_workers=inst.yakin_workers, splits=(20,))
+    model = ScheduleModel(requests, period=inst.period, yakin_workers=inst.yakin_workers, target_rest_score=3,
+                          splits=(7,))
+    shifts = model.solve(SolverParams.from_config(max_time_in_seconds=30, relative_gap_limit=1.0, random_seed=0))
+    assert shifts is not None
+    for half in (shifts.iloc[:, :7], shifts.iloc[:, 7:]):
+        scores = half.isin(FULL_OFF_SHIFTS).sum(axis=1) * 2 + half.isin(HALF_OFF_SHIFTS).sum(axis=1)
+        assert scores.min() >= 6
+        nights = (half.loc[inst.yakin_workers] == '夜').sum(axis=1)
+        assert nights.max() - nights.min() <= 1
@@ -0,0 +1,64 @@
+from config import Config
+from scenarios import expand_grid, parse_grid_value, run_scenario
+
+
+def test_expand_grid_and_yakin_diff():
+    base = Config()
+    yakin = parse_grid_value('yakin_workers', '-前野+御書', base)
+    assert '前野' not in yakin and yakin[-1] == '御書'
+    assert parse_grid_value('weekday_crew', 'auto', base) is None
+    assert parse_grid_value('target_rest_score', '12.5', base) == 12.5
+
+    scenarios = expand_grid({'target_rest_score': [12.5, 13], 'yakin_workers': [yakin]}, base)
+    assert [name for name, _ in scenarios] == [
+        'target_rest_score=12.5, yakin_workers=-前野+御書',
+        'target_rest_score=13, yakin_workers=-前野+御書',
+    ]
+
+
+def test_variants_share_loaded_requests():
+    base = Config()
+    requests = base.requests
+    variant = base.variant(target_rest_score=12.5, weekday_crew=7)
+    assert variant.requests is requests and variant.period is base.period
+    assert base.variant(month=9).__dict__.get('requests') is None
+
+
+def test_scenario_without_night_workers_is_reported():
+    base = Config()
+    for config in (base.variant(yakin_workers=()), base.variant(yakin_workers=('不明',))):
+        row = run_scenario('no-yakin', config)
+        assert not row['feasible'] and row['status'].startswith('ValueError: yakin_workers')
+
+
+def test_solver_params_follow_each_scenario(monkeypatch):
+    import pipeline
+
+    seen = []
+
+    def fake_build_schedule(config, params):
+        seen.append(params)
+        raise pipeline.ScheduleError('skipped')
+
+    monkeypatch.setattr(pipeline, 'build_schedule', fake_build_schedule)
+    base = Config()
+    for seed in (1, 2):
+        run_scenario(f'seed={seed}', base.variant(solver_params={'random_seed': seed, 'num_workers': 2}),
+                     {'num_workers': 4, 'max_time_in_seconds': None})
+    assert [(p.random_seed, p.num_workers) for p in seen] == [(1, 4), (2, 4)]
+    assert all(p.max_time_in_seconds == base.solver_params.get('max_time_in_seconds') for p in seen)
+
+
+def test_uncovered_days_counts_coverage_violations():
+    from pipeline import build_schedule
+    from scenarios import schedule_metrics
+    from solver_params import SolverParams
+
+    base = Config()
+    params = SolverParams.from_config(relative_gap_limit=1.0, max_time_in_seconds=60)
+    shifts = build_schedule(config=base, params=params).shifts
+    assert schedule_metrics(shifts, base)['uncovered_days'] == 0
+    broken = shifts.copy()
+    night = broken.columns[(broken == '夜').any(axis=0)][0]
+    broken.loc[broken[night] == '夜', night] = '休'
+    assert schedule_metrics(broken, base)['uncovered_days'] == 1
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from config import INPUT_CSV, NURSES
+from optimize_1 import solve_strict
+from optimize_2 import assign_matrix, assign_rest_shifts, fill_matrix
+from schedule_matrix import CODE, EMPTY, REST_POINTS, ScheduleMatrix, ShiftCounters
+
+
+def test_frame_round_trip_keeps_blanks_unfixed():
+    df = pd.DataFrame({'day_0': ['夜', None], 'day_1': ['×', 1]}, index=pd.Index(['A', 'B'], name='nurse'))
+    m = ScheduleMatrix.from_frame(df)
+    assert m.codes.dtype == np.int8
+    assert m.codes[1, 0] == EMPTY and not m.fixed[1, 0]
+    assert m.codes[1, 1] == CODE['1']
+    out = m.to_frame()
+    assert out.at['A', 'day_1'] == '×'
+    assert pd.isna(out.at['B', 'day_0'])
+
+
+def test_counters_follow_greedy_fill():
+    strict = solve_strict(INPUT_CSV, NURSES)
+    m = ScheduleMatrix.from_frame(strict)
+    fill_matrix(m)
+    recount = ShiftCounters(m.codes)
+    assert (m.counters.by_code == recount.by_code).all()
+    assert (m.counters.rest == recount.rest).all()
+    assert (m.counters.work_per_day == recount.work_per_day).all()
+    assert not (m.codes == EMPTY).any()
+    again = ScheduleMatrix.from_frame(strict)
+    fill_matrix(again)
+    assert (again.codes == m.codes).all()  # 外来の割当順は seed で決まる
+
+
+def test_rest_assignment_follows_target_rest_score():
+    df = pd.DataFrame({'day_0': ['休', None], 'day_1': [None, None]}, index=pd.Index(['A', 'B'], name='nurse'))
+    m = ScheduleMatrix.from_frame(df)
+    assign_rest_shifts(m, [0, 1], 1, target_rest_score=1.5)
+    assert m.to_frame()['day_1'].tolist() == ['休/', '休']  # A は残り半日分、B は1日分
+
+
+def test_greedy_fill_assigns_rest_up_to_target_rest_score():
+    strict = solve_strict(INPUT_CSV, NURSES)
+    for target in (4, 8.5):
+        m = ScheduleMatrix.from_frame(strict)
+        m.fill_empty = lambda code: None  # 残った空欄の「休」は数えない
+        assign_matrix(m, target_rest_score=target)
+        fixed = np.where(m.fixed, REST_POINTS[m.codes], 0).sum(axis=1)
+        rest = m.codes == CODE['休']
+        given = np.where(~m.fixed, 2 * rest + (m.codes == CODE['休/']), 0).sum(axis=1)
+        assert (given > 0).any()
+        assert (fixed + given <= np.maximum(2 * target, fixed)).all()
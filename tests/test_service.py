@@ -0,0 +1,135 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from config import Config
+from request_index import RequestIndex
+from service import MAX_BODY, HTTPError, ScheduleService, apply_edits, _read_csv, _read_request
+
+ROOT = Path(__file__).resolve().parents[1]
+REQUESTS = (ROOT / 'data' / 'req_shift_8.csv').read_bytes()
+
+
+async def request(port, method, path, body=b'', content_type='text/csv'):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: {content_type}\r\n' \
+           f'Content-Length: {len(body)}\r\n\r\n'
+    writer.write(head.encode() + body)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b'\r\n\r\n')
+    status = int(head.split()[1])
+    if b'Transfer-Encoding: chunked' in head:
+        chunks = []
+        while True:
+            size, _, rest = body.partition(b'\r\n')
+            n = int(size, 16)
+            if n == 0:
+                break
+            chunks.append(rest[:n])
+            body = rest[n + 2:]
+        body = b''.join(chunks)
+    return status, body
+
+
+def run_service(scenario, tmp_path, **kwargs):
+    async def main():
+        service = ScheduleService(Config(history_dir=str(tmp_path / 'history')), workers=1, **kwargs)
+        port = await service.start(port=0)
+        try:
+            return await scenario(service, port)
+        finally:
+            await service.close()
+    return asyncio.run(main())
+
+
+def test_upload_job_streams_status_and_result(tmp_path):
+    async def scenario(service, port):
+        status, body = await request(port, 'POST', '/jobs?engine=greedy&year=2025&month=8', REQUESTS)
+        assert status == 202
+        job = json.loads(body)
+        status, body = await request(port, 'GET', f'/jobs/{job["id"]}/events')
+        assert status == 200
+        events = [json.loads(line) for line in body.splitlines()]
+        assert [e['status'] for e in events[:-1]] == ['queued', 'running', 'done']
+        result = events[-1]['result']
+        assert len(result['columns']) == 31
+        assert set(result['shifts']) >= {'樋渡', '三好'}
+        status, body = await request(port, 'GET', f'/jobs/{job["id"]}/result?format=csv')
+        assert status == 200 and '休み合計' in body.decode('utf-8-sig')
+        return (tmp_path / 'out' / job['id'] / 'schedule.npz').exists()
+
+    assert run_service(scenario, tmp_path, output_dir=tmp_path / 'out')
+
+
+def test_roster_edits_and_errors(tmp_path):
+    async def scenario(service, port):
+        status, _ = await request(port, 'PUT', '/rosters/3A', REQUESTS)
+        assert status == 201
+        job = {'roster': '3A', 'engine': 'greedy', 'threads': 2,
+               'edits': [{'nurse': '中山', 'day': '21', 'request': '①'}]}
+        status, body = await request(port, 'POST', '/jobs', json.dumps(job).encode(), 'application/json')
+        assert status == 202 and json.loads(body)['threads'] == 2
+        job_id = json.loads(body)['id']
+        await request(port, 'GET', f'/jobs/{job_id}/events')
+        status, body = await request(port, 'GET', f'/jobs/{job_id}/result')
+        assert json.loads(body)['shifts']['中山'][0] == '休'
+        # 名簿の索引は名簿・期間ごとに1回だけ作り、編集は複製に反映する
+        cached = service.indexes['3A', 2025, 8]
+        assert cached.get('中山', 0) is None
+        await request(port, 'POST', '/jobs', json.dumps(job).encode(), 'application/json')
+        assert service.indexes['3A', 2025, 8] is cached
+        await request(port, 'PUT', '/rosters/3A', REQUESTS)
+        assert not service.indexes
+
+        status, _ = await request(port, 'POST', '/jobs', json.dumps({'roster': '3A', 'threads': 0}).encode(),
+                                  'application/json')
+        assert status == 400
+
+        bad = {'roster': '3A', 'edits': [{'nurse': '不明', 'day': '21', 'request': '①'}]}
+        status, _ = await request(port, 'POST', '/jobs', json.dumps(bad).encode(), 'application/json')
+        assert status == 400
+        status, _ = await request(port, 'POST', '/jobs', b'{"roster": "3B"}', 'application/json')
+        assert status == 404
+        status, _ = await request(port, 'GET', '/jobs/missing')
+        assert status == 404
+
+    run_service(scenario, tmp_path)
+
+
+def test_content_length_is_validated_before_reading():
+    async def read(length):
+        reader = asyncio.StreamReader()
+        reader.feed_data(f'POST /jobs HTTP/1.1\r\nContent-Length: {length}\r\n\r\nabc'.encode())
+        reader.feed_eof()
+        return await _read_request(reader)
+
+    assert asyncio.run(read(3)).body == b'abc'
+    for length, status in (('-1', 400), ('abc', 400), ('²', 400), ('', 400), (MAX_BODY + 1, 413)):
+        with pytest.raises(HTTPError) as e:
+            asyncio.run(read(length))
+        assert e.value.status == status
+
+
+def test_apply_edits_copies_roster():
+    period = Config().period
+    roster = RequestIndex.from_frame(_read_csv(REQUESTS), period)
+    day = period.label_to_index('30')
+    edited = apply_edits(roster, [{'nurse': '樋渡', 'day': '30', 'request': None},
+                                  {'nurse': '樋渡', 'day': '21', 'request': '③'}], period)
+    assert roster.get('樋渡', day).kind == '②' and roster.get('樋渡', 0) is None
+    assert edited.get('樋渡', day) is None and edited.get('樋渡', 0).shift == '休/'
+    for edit in ({'nurse': '樋渡', 'day': '99'}, {'nurse': '不明', 'day': '21'},
+                 {'nurse': '樋渡', 'day': '21', 'request': '⑨'}):
+        with pytest.raises(HTTPError):
+            apply_edits(roster, [edit], period)
+
+
+def test_rejects_non_loopback_host():
+    async def main():
+        with pytest.raises(ValueError):
+            await ScheduleService().start(host='0.0.0.0')
+    asyncio.run(main())
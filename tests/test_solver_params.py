@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pytest
+from ortools.sat.python import cp_model
+
+from solver_params import SolverParams, run_solver
+
+
+def test_from_config_with_overrides():
+    cfg = SimpleNamespace(SOLVER_PARAMS={'num_workers': 8, 'max_time_in_seconds': 10.0})
+    params = SolverParams.from_config(cfg, num_workers=2, random_seed=None)
+    assert params.num_workers == 2
+    assert params.max_time_in_seconds == 10.0
+    assert params.random_seed is None
+
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        SolverParams.from_config(SimpleNamespace(SOLVER_PARAMS={'workers': 8}))
+    with pytest.raises(ValueError):
+        SolverParams(presolve_level=3)
+
+
+def test_run_solver_records_params_and_status():
+    model = cp_model.CpModel()
+    x = model.NewIntVar(0, 10, 'x')
+    model.Maximize(x)
+    params = SolverParams(num_workers=1, max_time_in_seconds=5.0, presolve_level=0, max_memory_in_mb=512)
+    solver, status, info = run_solver(model, params, 'toy')
+    assert status == cp_model.OPTIMAL
+    assert solver.parameters.max_memory_in_mb == 512
+    assert not solver.parameters.cp_model_presolve
+    assert info['status'] == 'OPTIMAL'
+    assert info['params']['num_workers'] == 1
+    assert info['objective'] == 10
@@ -0,0 +1,98 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from optimize_2 import repair_streaks
+from schedule_matrix import CODE, OFF, WORK, ScheduleMatrix
+
+
+def matrix(rows, fixed=None):
+    df = pd.DataFrame(rows, index=[f'N{i}' for i in range(len(rows))]).rename(columns=lambda d: f'day_{d}')
+    m = ScheduleMatrix.from_frame(df)
+    m.fixed = np.zeros(m.shape, dtype=bool) if fixed is None else fixed
+    return m
+
+
+def longest(row, mask):
+    best = run = 0
+    for c in row:
+        run = run + 1 if mask[c] else 0
+        best = max(best, run)
+    return best
+
+
+def columns(m):
+    return [Counter(m.codes[:, d].tolist()) for d in range(m.shape[1])]
+
+
+def test_work_streak_is_exchanged_with_another_nurse():
+    m = matrix([
+        ['早', '早', '早', '早', '早', '早', '早', '休', '休', '休'],
+        ['残', '残', '休', '残', '残', '休', '残', '残', '残', '早'],
+    ])
+    before, rest = columns(m), m.rest_points()
+    repair_streaks(m)
+    assert longest(m.codes[0], WORK) <= 6
+    assert longest(m.codes[1], WORK) <= 6
+    assert columns(m) == before  # 各日の配置は変わらない
+    assert (m.rest_points() == rest).all()
+
+
+def test_rest_streak_is_exchanged_with_another_nurse():
+    m = matrix([
+        ['早', '早', '休', '休', '休', '休', '休', '早', '早', '早'],
+        ['残', '休', '残', '残', '残', '早', '残', '休', '休', '残'],
+    ])
+    before, rest = columns(m), m.rest_points()
+    repair_streaks(m)
+    assert longest(m.codes[0], OFF) <= 3
+    assert longest(m.codes[1], OFF) <= 3
+    assert columns(m) == before
+    assert (m.rest_points() == rest).all()
+
+
+def test_work_streak_is_handed_to_a_resting_nurse():
+    m = matrix([
+        ['早', '早', '早', '早', '早', '早', '早'],
+        ['休', '休', '休', '残', '休', '休', '休'],
+    ])
+    before = columns(m)
+    assert repair_streaks(m) == []
+    assert longest(m.codes[0], WORK) <= 6 and longest(m.codes[1], OFF) <= 3
+    assert columns(m) == before
+
+
+def test_unresolved_streak_keeps_coverage_and_fixed_and_night():
+    m = matrix([['早', '早', '夜', '×', '早', '早', '早', '早', '早']])
+    m.fixed[0, 8] = True
+    codes = m.codes.copy()
+    assert repair_streaks(m) == [('N0', 6, 'work')]
+    assert (m.codes == codes).all()  # 入れ替え先が無ければ勤務を外さない
+
+
+def streaks(row, mask, limit):
+    runs, run = 0, 0
+    for c in list(row) + [None]:
+        if c is not None and mask[c]:
+            run += 1
+            continue
+        runs, run = runs + (run > limit), 0
+    return runs
+
+
+def test_long_horizon_streaks():
+    rng = np.random.default_rng(0)
+    shifts = ['早', '残', '〇', '休']
+    rows = [[shifts[k] for k in rng.choice(4, size=365, p=[0.25, 0.25, 0.2, 0.3])] for _ in range(12)]
+    m = matrix(rows, fixed=rng.random((12, 365)) < 0.1)
+    fixed_codes, before = m.codes[m.fixed].copy(), columns(m)
+    work_before = sum(streaks(row, WORK, 6) for row in m.codes)
+    rest_before = sum(streaks(row, OFF, 3) for row in m.codes)
+    unresolved = repair_streaks(m)
+    assert (m.codes[m.fixed] == fixed_codes).all()
+    assert columns(m) == before
+    work = sum(streaks(row, WORK, 6) for row in m.codes)
+    rest = sum(streaks(row, OFF, 3) for row in m.codes)
+    assert work <= sum(kind == 'work' for _, _, kind in unresolved) <= 1 < work_before
+    assert rest <= sum(kind == 'rest' for _, _, kind in unresolved) < rest_before
@@ -0,0 +1,40 @@
+from optimize_cp import ScheduleModel
+from request_index import RequestIndex
+from synthetic import generate_instance
+
+
+def _model(density, **options):
+    inst = generate_instance(20, 14, density=density, seed=1)
+    requests = RequestIndex.from_frame(inst.frame, inst.period)
+    return ScheduleModel(requests, period=inst.period, yakin_workers=inst.yakin_workers,
+                         target_rest_score=6, **options), requests
+
+
+def test_nurses_without_requests_form_classes():
+    model, requests = _model(0.05)
+    assert model.symmetry_classes
+    grouped = [n for c in model.symmetry_classes for n in c]
+    assert len(grouped) == len(set(grouped))
+    for members in model.symmetry_classes:
+        days = {frozenset(r.day for r in requests.by_nurse.get(n, [])) for n in members}
+        yakin = {n in model.yakin_workers for n in members}
+        assert len(days) == 1 and len(yakin) == 1
+
+
+def test_symmetry_can_be_disabled():
+    model, _ = _model(0.05, symmetry=False)
+    assert model.symmetry_classes == []
+    assert not any(v.name.startswith('lex_') for v in model.model.Proto().variables)
+
+
+def test_solution_rows_are_ordered_within_classes():
+    from solver_params import SolverParams
+
+    model, _ = _model(0.05)
+    shifts = model.solve(SolverParams.from_config(max_time_in_seconds=30, relative_gap_limit=1.0, random_seed=0))
+    assert shifts is not None
+    assert len(model.solve_info['symmetry_classes']) == len(model.symmetry_classes)
+    for members in model.symmetry_classes:
+        rows = [[shifts.at[n, f'day_{d}'] == s for d in range(model.days) for s in model.domains.shifts(n, d)]
+                for n in members]
+        assert rows == sorted(rows, reverse=True)
@@ -0,0 +1,65 @@
+import pytest
+
+from config import default_config
+from boundary import BoundaryState
+from pipeline import build_schedule
+from schedule_matrix import ScheduleMatrix
+from solver_params import SolverParams
+from validator import ALL_RULES, validate
+
+
+@pytest.fixture(scope='module')
+def config():
+    return default_config()
+
+
+@pytest.fixture(scope='module')
+def schedule(config):
+    params = SolverParams.from_config(relative_gap_limit=1.0, max_time_in_seconds=60)
+    return build_schedule(config=config, params=params).shifts
+
+
+def rules_of(shifts, config, **kwargs):
+    return {v.rule for v in validate(shifts, config.period, config.requests, **kwargs)}
+
+
+def test_solver_output_has_no_hard_violations(schedule, config):
+    assert validate(schedule, config.period, config.requests) == []
+    # DataFrame と ScheduleMatrix のどちらでも同じ結果
+    assert validate(ScheduleMatrix.from_frame(schedule), config.period, rules=ALL_RULES) == \
+        validate(schedule, config.period, rules=ALL_RULES)
+
+
+def test_detects_injected_violations(schedule, config):
+    period = config.period
+    saturday = period.day_types.index('half')
+    broken = schedule.copy()
+    broken.at['久保', f'day_{saturday}'] = '早'
+    assert 'kubo' in rules_of(broken, config)
+
+    n, d = next((n, d) for n in broken.index for d in range(period.days - 1)
+                if broken.at[n, f'day_{d}'] == '夜')
+    broken = schedule.copy()
+    broken.at[n, f'day_{d + 1}'] = '休'
+    found = validate(broken, period, rules=['night_cross'])
+    assert [(v.nurse, v.day) for v in found] == [(n, d + 1)]
+
+    broken = schedule.copy()
+    broken.loc['三好'] = '2'
+    found = rules_of(broken, config)
+    assert {'work_streak', 'rest_minimum', 'coverage', 'day_shift'} <= found
+
+    broken = schedule.copy()
+    broken.at['御書', 'day_1'] = None
+    assert 'empty' in rules_of(broken, config)
+
+
+def test_boundary_state_is_respected(schedule, config):
+    nurse = next(n for n in schedule.index if schedule.at[n, 'day_0'] != '×')
+    found = validate(schedule, config.period, rules=['night_cross'],
+                     boundary=BoundaryState(after_night=frozenset([nurse])))
+    assert [(v.nurse, v.day) for v in found] == [(nurse, 0)]
+    run = next(n for n in schedule.index if schedule.at[n, 'day_0'] not in ('休', '休/', '/休'))
+    found = validate(schedule, config.period, rules=['work_streak'],
+                     boundary=BoundaryState(work_streak={run: 30}))
+    assert [(v.nurse, v.day) for v in found] == [(run, 0)]
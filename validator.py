@@ -0,0 +1,208 @@
+"""シフト表がルールを満たしているかを、看護師 × 日の行列に対するベクトル演算でまとめて検査する。
+
+    violations = validate(shifts, period, requests)
+    if violations:
+        print(summarize(violations))
+
+shifts は DataFrame（index=看護師, 列=day_i）か ScheduleMatrix。セルごとの Python ループは行わず、
+違反があったセルだけを Violation にするため、探索・修正のループやバッチ処理の中でも呼び出せる。
+"""
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+
+from config import (
+    CT_WORKERS, HOLIDAY_NO_WORKERS, NO_OUTPATIENT_WORKERS, TARGET_REST_SCORE, YAKIN_WORKERS, default_config,
+)
+from optimize_cp import (
+    CT_SHIFTS, DAY_TYPE_SHIFTS, FULL_DAY_CREW, FULL_DAY_SHIFTS, MAX_REST_STREAK, MAX_WORK_STREAK,
+    OUTPATIENT_SHIFTS, SATURDAY_CREW, WEEKDAY_FULL_CREW, WEEKDAY_SHORT_CREW,
+)
+from period import HALF, WEEKDAY
+from schedule_matrix import CODE, EMPTY, OFF, REST_POINTS, SHIFT_CODES, WORK, ScheduleMatrix, code_mask
+
+# 規則名（CP-SAT で必須制約のもの）
+RULES = (
+    'empty',           # 未割当のセル
+    'day_shift',       # 日種別に無いシフト
+    'coverage',        # 日種別ごとの配置（平日は8人体制か7人体制、木日祝は早日・残日、土曜は外来など）
+    'night_coverage',  # 夜勤は各日1人
+    'eligibility',     # 担当外のシフト（夜勤メンバー以外の夜勤、CT、外来、/訪）
+    'kubo',            # 久保は平日はCTのみ、土曜は2/のみ
+    'holiday_off',     # 木日祝休みのメンバー（Strict1）
+    'requests',        # 希望休（Strict2）
+    'night_cross',     # 夜勤の翌日は×、×は夜勤明けのみ（Strict4）
+    'rest_minimum',    # 休みスコアの目標
+    'work_streak',     # 7日連続勤務の禁止
+)
+SOFT_RULES = ('rest_streak',)  # 4日以上の連続休み（CP-SAT ではペナルティ）
+ALL_RULES = RULES + SOFT_RULES
+
+
+class Violation(NamedTuple):
+    rule: str
+    nurse: str | None  # 日ごとの規則では None
+    day: int | None    # 看護師ごとの規則では None
+    detail: str
+
+
+def _codes(shifts) -> list[int]:
+    return [CODE[s] for s in shifts]
+
+
+def _runs(mask, carried=None):
+    """mask の行ごとに True が続く区間の (行, 開始日, 長さ)。carried は初日から続く区間に足す日数。"""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    diff = np.diff(padded, axis=1)
+    starts, ends = np.argwhere(diff == 1), np.argwhere(diff == -1)  # どちらも行優先なので対応する
+    rows, first = starts[:, 0], starts[:, 1]
+    lengths = ends[:, 1] - first
+    if carried is not None:
+        lengths = lengths + np.where(first == 0, carried[rows], 0)
+    return rows, first, lengths
+
+
+def validate(schedule, period=None, requests=None, yakin_workers=None, target_rest_score=TARGET_REST_SCORE,
+             boundary=None, rules=RULES) -> list[Violation]:
+    """schedule の違反を rules の順に返す（違反が無ければ空のリスト）。
+
+    requests（RequestIndex）を渡すと希望休も検査する。boundary（boundary.BoundaryState）を渡すと
+    初日の×と連続勤務・連続休みに前期間の末尾を含める。
+    """
+    m = schedule if isinstance(schedule, ScheduleMatrix) else ScheduleMatrix.from_frame(schedule)
+    period = period or default_config().period
+    if m.shape[1] != period.days:
+        raise ValueError(f'schedule has {m.shape[1]} days, period has {period.days}')
+    yakin = set(YAKIN_WORKERS if yakin_workers is None else yakin_workers)
+    codes, nurses = m.codes.astype(np.intp), m.nurses
+    days = np.arange(period.days)
+    full = np.array([period.is_full(d) for d in days])
+    half = np.array([t == HALF for t in period.day_types]) & ~full
+    weekday = np.array([t == WEEKDAY for t in period.day_types]) & ~full
+    # counts[d, c] は d 日目にシフトコード c の看護師の人数
+    counts = np.zeros((period.days, len(SHIFT_CODES)), dtype=np.int64)
+    np.add.at(counts, (np.broadcast_to(days, codes.shape), codes), 1)
+    row = {n: i for i, n in enumerate(nurses)}
+
+    def label(c):
+        return SHIFT_CODES[c] or '未割当'
+
+    found = []
+    for rule in rules:
+        if rule == 'empty':
+            found += [Violation(rule, nurses[i], d, '未割当') for i, d in np.argwhere(codes == EMPTY)]
+
+        elif rule == 'day_shift':
+            allowed = np.where(full[:, None], code_mask(FULL_DAY_SHIFTS),
+                               np.where(half[:, None], code_mask(DAY_TYPE_SHIFTS[HALF]),
+                                        code_mask(DAY_TYPE_SHIFTS[WEEKDAY])))
+            bad = ~allowed[days, codes] & (codes != EMPTY)
+            found += [Violation(rule, nurses[i], d, f'{period.day_types[d]} の日に {label(codes[i, d])}')
+                      for i, d in np.argwhere(bad)]
+
+        elif rule == 'coverage':
+            def staffed(crew, absent=()):
+                return ((counts[:, _codes(crew)] == 1).all(axis=1)
+                        & (counts[:, _codes(absent)] == 0).all(axis=1))
+
+            weekday_ok = staffed(WEEKDAY_FULL_CREW, ['2・CT']) | staffed(WEEKDAY_SHORT_CREW, ['2', 'CT'])
+            bad = (weekday & ~weekday_ok) | (full & ~staffed(FULL_DAY_CREW)) | (half & ~staffed(SATURDAY_CREW))
+            for d in np.flatnonzero(bad):
+                if full[d]:
+                    crew = FULL_DAY_CREW
+                elif half[d]:
+                    crew = SATURDAY_CREW
+                else:
+                    crew = WEEKDAY_SHORT_CREW if counts[d, CODE['2・CT']] else WEEKDAY_FULL_CREW
+                found.append(Violation(rule, None, d, _crew_detail(counts[d], crew)))
+
+        elif rule == 'night_coverage':
+            nights = counts[:, CODE['夜']]
+            found += [Violation(rule, None, d, f'夜勤が{nights[d]}人') for d in np.flatnonzero(nights != 1)]
+
+        elif rule == 'eligibility':
+            forbidden = np.zeros((len(nurses), len(SHIFT_CODES)), dtype=bool)
+            for i, n in enumerate(nurses):
+                if n not in yakin:
+                    forbidden[i, CODE['夜']] = True
+                if n not in CT_WORKERS:
+                    forbidden[i, _codes(CT_SHIFTS)] = True
+                if n in NO_OUTPATIENT_WORKERS:
+                    forbidden[i, _codes(OUTPATIENT_SHIFTS)] = True
+            bad = forbidden[np.arange(len(nurses))[:, None], codes]
+            # /訪 は久保の第2木曜日のみ
+            visit = codes == CODE['/訪']
+            if '久保' in row and period.second_thursday is not None:
+                visit[row['久保'], period.second_thursday] = False
+            found += [Violation(rule, nurses[i], d, f'{nurses[i]} に {label(codes[i, d])}')
+                      for i, d in np.argwhere(bad | visit)]
+
+        elif rule == 'kubo' and '久保' in row:
+            kubo = codes[row['久保']]
+            working = WORK[kubo] & (kubo != CODE['夜']) & (kubo != CODE['×'])
+            bad = (weekday & working & ~code_mask(CT_SHIFTS)[kubo]) | (half & working & (kubo != CODE['2/']))
+            found += [Violation(rule, '久保', d, f'{period.day_types[d]} の日に {label(kubo[d])}（平日はCT、土曜は2/のみ）')
+                      for d in np.flatnonzero(bad)]
+
+        elif rule == 'holiday_off':
+            members = [n for n in HOLIDAY_NO_WORKERS if n in row]
+            if not members:
+                continue
+            expected = np.full((len(members), period.days), CODE['休'])
+            if '久保' in members and period.second_thursday is not None:
+                expected[members.index('久保'), period.second_thursday] = CODE['/訪']
+            sub = codes[[row[n] for n in members]]
+            bad = full & (sub != expected)
+            found += [Violation(rule, members[k], d, f'木日祝は {label(expected[k, d])} のはずが {label(sub[k, d])}')
+                      for k, d in np.argwhere(bad)]
+
+        elif rule == 'requests' and requests is not None:
+            cells = [(row[n], r.day, CODE[r.shift]) for n, reqs in requests.by_nurse.items() if n in row
+                     for r in reqs]
+            if not cells:
+                continue
+            i, d, want = map(np.array, zip(*cells))
+            bad = codes[i, d] != want
+            found += [Violation(rule, nurses[a], b, f'希望 {label(c)} のはずが {label(codes[a, b])}')
+                      for a, b, c in zip(i[bad], d[bad], want[bad])]
+
+        elif rule == 'night_cross':
+            night, cross = codes == CODE['夜'], codes == CODE['×']
+            found += [Violation(rule, nurses[i], d + 1, '夜勤の翌日が×ではない')
+                      for i, d in np.argwhere(night[:, :-1] & ~cross[:, 1:])]
+            found += [Violation(rule, nurses[i], d + 1, '夜勤明けでない×')
+                      for i, d in np.argwhere(cross[:, 1:] & ~night[:, :-1])]
+            after = np.array([boundary is not None and n in boundary.after_night for n in nurses], dtype=bool)
+            found += [Violation(rule, nurses[i], 0, '前期間の夜勤の翌日が×ではない' if after[i] else '夜勤明けでない×')
+                      for i in np.flatnonzero(cross[:, 0] != after)]
+
+        elif rule == 'rest_minimum':
+            points = REST_POINTS[codes].sum(axis=1)
+            target = round(target_rest_score * 2)
+            found += [Violation(rule, nurses[i], None, f'休み {points[i] / 2:g}（目標 {target_rest_score:g}）')
+                      for i in np.flatnonzero(points < target)]
+
+        elif rule in ('work_streak', 'rest_streak'):
+            work = rule == 'work_streak'
+            mask, limit = (WORK[codes], MAX_WORK_STREAK) if work else (OFF[codes], MAX_REST_STREAK)
+            carried = None
+            if boundary is not None:
+                streaks = boundary.work_streak if work else boundary.rest_streak
+                carried = np.array([streaks.get(n, 0) for n in nurses])
+            rows, first, lengths = _runs(mask, carried)
+            kind = '勤務' if work else '休み'
+            found += [Violation(rule, nurses[i], d, f'{length}日連続の{kind}（上限 {limit}日）')
+                      for i, d, length in zip(rows, first, lengths) if length > limit]
+    return [v._replace(day=None if v.day is None else int(v.day)) for v in found]
+
+
+def _crew_detail(day_counts, crew) -> str:
+    wrong = [f'{s}×{day_counts[CODE[s]]}' for s in crew if day_counts[CODE[s]] != 1]
+    return '配置が不足・重複: ' + ', '.join(wrong) if wrong else '8人体制と7人体制のシフトが混在'
+
+
+def summarize(violations) -> dict:
+    """規則ごとの違反数。"""
+    return dict(Counter(v.rule for v in violations))